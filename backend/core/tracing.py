@@ -0,0 +1,82 @@
+"""Per-request stage timings, reported as a Server-Timing header and structured log fields.
+
+Services wrap their stages in ``with span("embed"):``. ``RequestTimingMiddleware``
+starts a trace per request when ``server_timing_enabled`` is set; otherwise no
+trace is active and ``span`` returns a shared no-op context manager after a
+single context-variable lookup. Repeated stages are summed, so the header shows
+e.g. total LLM time and the number of calls.
+
+The trace is a mutable list held in a context variable, so stages that run in
+``asyncio.to_thread`` workers or other tasks of the same request still report
+into it.
+"""
+
+import time
+from collections.abc import Callable
+from contextlib import AbstractContextManager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+_trace_var: ContextVar["list[tuple[str, float]] | None"] = ContextVar("trace", default=None)
+_NOOP = nullcontext()
+
+
+@dataclass
+class Stage:
+    name: str
+    duration_ms: float
+    count: int
+
+
+class _Span(AbstractContextManager):
+    __slots__ = ("name", "trace", "started")
+
+    def __init__(self, name: str, trace: list[tuple[str, float]]):
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.append((self.name, (time.perf_counter() - self.started) * 1000))
+        return False
+
+
+def span(name: str) -> AbstractContextManager:
+    """Time a stage of the current request; a no-op when no trace is active."""
+    trace = _trace_var.get()
+    if trace is None:
+        return _NOOP
+    return _Span(name, trace)
+
+
+def start_trace() -> Callable[[], list[Stage]]:
+    """Begin collecting stages for the current context; returns a function that summarizes them."""
+    trace: list[tuple[str, float]] = []
+    _trace_var.set(trace)
+
+    def stages() -> list[Stage]:
+        summary: dict[str, Stage] = {}
+        for name, duration in list(trace):
+            stage = summary.get(name)
+            if stage is None:
+                summary[name] = Stage(name, duration, 1)
+            else:
+                stage.duration_ms += duration
+                stage.count += 1
+        return list(summary.values())
+
+    return stages
+
+
+def server_timing_header(stages: list[Stage], total_ms: float) -> str:
+    parts = []
+    for stage in stages:
+        entry = f"{stage.name};dur={stage.duration_ms:.1f}"
+        if stage.count > 1:
+            entry += f';desc="{stage.count} calls"'
+        parts.append(entry)
+    parts.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(parts)
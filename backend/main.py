@@ -18,11 +18,23 @@ from backend.routers import (
     chat,
     documents,
     health,
+    index,
     legal,
     llm_config,
     search,
 )
-from backend.services import embeddings
+from backend.services import (
+    clause_index,
+    embeddings,
+    index_reconciler,
+    lexical_backfill,
+    reindex,
+    reranker,
+    server_presence,
+    tenant_backfill,
+    vector_store,
+)
+from backend.services.health import health_monitor
 
 settings = get_settings()
 setup_logging(log_format=settings.log_format, log_level=settings.log_level)
@@ -38,13 +50,47 @@ async def lifespan(app: FastAPI):
     db = await connect_db(settings.mongo_uri, settings.mongo_db_name)
     app.state.db = db
 
+    # Tell maintenance scripts not to write the stores this process holds open
+    await server_presence.start_heartbeat()
+
     # Load embedding model
     embeddings.load_model()
+    if settings.rerank_enabled:
+        reranker.load_model()
+
+    # Resolve the active vector collection; resumes any re-embedding migration
+    await reindex.init_vector_index()
+
+    # Tag chunks from before tenant partitioning with their organization
+    await tenant_backfill.init_tenant_backfill()
+
+    # Give chunks indexed before hybrid search their term postings
+    await lexical_backfill.init_lexical_backfill()
+
+    # Tag existing chunks with clause categories they have not been scored against
+    await clause_index.init_clause_tags()
+
+    # Background component probes backing /health/detailed
+    health_monitor.start()
+
+    # Periodic recount of the cached per-tenant chunk totals
+    vector_store.start_count_reconciler()
+
+    # Scheduled Mongo ↔ vector store consistency sweep
+    index_reconciler.start_scheduler()
 
     logger.info("LegalLens backend ready")
     yield
 
     # Shutdown
+    await health_monitor.stop()
+    await vector_store.stop_count_reconciler()
+    await index_reconciler.stop_scheduler()
+    await reindex.stop_migration()
+    await clause_index.stop_backfill()
+    await lexical_backfill.stop_backfill()
+    await tenant_backfill.stop_backfill()
+    await server_presence.stop_heartbeat()
     await close_db()
     logger.info("Shutting down LegalLens backend")
 
@@ -80,3 +126,4 @@ app.include_router(legal.router, prefix="/api")
 app.include_router(llm_config.router, prefix="/api")
 app.include_router(ai.router, prefix="/api")
 app.include_router(audit.router, prefix="/api")
+app.include_router(index.router, prefix="/api")
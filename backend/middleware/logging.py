@@ -10,6 +10,9 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
 
+from backend.core.settings import get_settings
+from backend.core.tracing import server_timing_header, start_trace
+
 # Async-safe request ID available throughout the request lifecycle
 request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
 
@@ -25,17 +28,27 @@ class StructuredFormatter(logging.Formatter):
             "message": record.getMessage(),
             "request_id": request_id_var.get("-"),
         }
+        timings = getattr(record, "timings", None)
+        if timings:
+            payload["timings_ms"] = timings
         if record.exc_info and record.exc_info[0] is not None:
             payload["exception"] = self.formatException(record.exc_info)
         return json.dumps(payload, default=str)
 
 
 class RequestTimingMiddleware(BaseHTTPMiddleware):
-    """Add X-Request-ID + X-Response-Time-Ms headers and log every request."""
+    """Add X-Request-ID + X-Response-Time-Ms headers and log every request.
+
+    With ``server_timing_enabled``, stages timed by ``core.tracing.span`` are
+    added as a Server-Timing header and a ``timings_ms`` log field. Stages
+    that run while a streamed body is being sent (e.g. ``/chat/stream``
+    generation) come after both and are not reported.
+    """
 
     async def dispatch(self, request: Request, call_next) -> Response:
         rid = request.headers.get("X-Request-ID", str(uuid.uuid4()))
         request_id_var.set(rid)
+        stages = start_trace() if get_settings().server_timing_enabled else None
 
         start = time.perf_counter()
         response: Response = await call_next(request)
@@ -43,6 +56,11 @@ class RequestTimingMiddleware(BaseHTTPMiddleware):
 
         response.headers["X-Request-ID"] = rid
         response.headers["X-Response-Time-Ms"] = str(elapsed_ms)
+        extra = {}
+        if stages is not None:
+            summary = stages()
+            response.headers["Server-Timing"] = server_timing_header(summary, elapsed_ms)
+            extra["timings"] = {stage.name: round(stage.duration_ms, 2) for stage in summary}
 
         logger = logging.getLogger("legallens.access")
         logger.info(
@@ -51,6 +69,7 @@ class RequestTimingMiddleware(BaseHTTPMiddleware):
             request.url.path,
             response.status_code,
             elapsed_ms,
+            extra=extra,
         )
         return response
 
@@ -1,5 +1,6 @@
 from datetime import datetime
 from enum import Enum
+from typing import Literal
 
 from pydantic import BaseModel, Field
 
@@ -22,6 +23,8 @@ class DocumentMetadata(BaseModel):
     error_message: str | None = None
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
     processed_at: datetime | None = None
+    # Near-duplicate cluster (the ID of its first document); None until processed
+    duplicate_cluster: str | None = None
 
 
 class DocumentResponse(BaseModel):
@@ -29,6 +32,20 @@ class DocumentResponse(BaseModel):
     total: int
 
 
+class BulkDeleteRequest(BaseModel):
+    """Documents to delete: explicit IDs and/or every document of a matter or client."""
+    document_ids: list[str] = Field(default_factory=list, max_length=10000)
+    matter: str = ""
+    client: str = ""
+
+
+class Highlight(BaseModel):
+    # Character (code point) offsets into Citation.text, end exclusive
+    start: int
+    end: int
+    kind: Literal["term", "sentence"]  # A query term match, or the sentence closest to the query
+
+
 class Citation(BaseModel):
     document_id: str
     document_name: str
@@ -36,22 +53,68 @@ class Citation(BaseModel):
     paragraph: int | None = None
     text: str
     score: float
+    chunk_id: str = ""
+    highlights: list[Highlight] = []
+
+
+class SearchFilters(BaseModel):
+    """Restrict a search to documents with all of these attributes."""
+    matter: str = ""
+    client: str = ""
+    tags: list[str] = Field(default_factory=list, max_length=20)
+    document_type: str = ""  # As classified at ingest, e.g. "Contract"
+    date_from: datetime | None = None  # Upload date range, inclusive
+    date_to: datetime | None = None
 
 
 class SearchRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=1000)
     top_k: int = Field(default=10, ge=1, le=50)
+    # "hybrid" fuses embedding similarity with BM25 term matching; "boolean" takes
+    # phrases, wildcards, NEAR/n and AND/OR/NOT (e.g. "hold harmless" NEAR/5 indemnif*)
+    mode: Literal["semantic", "hybrid", "boolean"] = "semantic"
+    # Boolean mode only: rank matches by semantic similarity to this text instead of BM25
+    rank_query: str = Field(default="", max_length=1000)
+    filters: SearchFilters | None = None
+    # Rank up to search_cursor_depth results once; top_k becomes the page size and
+    # the response carries a cursor for GET /search/page and /search/export
+    paginate: bool = False
+    # Fold overlapping neighbour chunks of one page into a single result
+    merge_adjacent: bool = True
+    # Maximal marginal relevance: 0 keeps the ranking, 1 favours novelty only
+    diversity: float = Field(default=0.0, ge=0.0, le=1.0)
+    # Order results by document (best document first) with at most per_document hits each
+    group_by_document: bool = False
+    per_document: int = Field(default=3, ge=1, le=10)
+    # Keep results from one document per near-duplicate cluster (drafts, copies)
+    collapse_duplicates: bool = False
+
+
+class DocumentGroup(BaseModel):
+    document_id: str
+    document_name: str
+    score: float  # Best hit's score
+    hits: list[Citation]
 
 
 class SearchResult(BaseModel):
     query: str
     results: list[Citation]
     total_results: int
+    # group_by_document only: the same results, nested by document
+    groups: list[DocumentGroup] | None = None
+    # Paginated searches only: this page's position (also accepted by /search/export) and the next page's
+    cursor: str | None = None
+    next_cursor: str | None = None
+    # Hybrid searches only: existing chunks are still being added to the term index,
+    # so exact-term matches may be missing until it finishes
+    index_building: bool = False
 
 
 class ChatRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=2000)
     top_k: int = Field(default=5, ge=1, le=20)
+    filters: SearchFilters | None = None
 
 
 class ChatResponse(BaseModel):
@@ -67,6 +130,16 @@ class ChatResponseWithFollowUps(BaseModel):
     follow_up_suggestions: list[str] = []
 
 
+class FollowUpRequest(BaseModel):
+    query: str = Field(..., min_length=1, max_length=2000)
+    answer: str = Field(..., min_length=1, max_length=20000)
+    citations: list[Citation] = []
+
+
+class FollowUpResponse(BaseModel):
+    follow_up_suggestions: list[str]
+
+
 class StatsResponse(BaseModel):
     total_documents: int
     total_chunks: int
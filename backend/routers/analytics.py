@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends
 from backend.core.settings import get_settings
 from backend.middleware.auth import get_current_user, require_role
 from backend.models.user import Role
+from backend.services import search_cache
 from backend.services.activity import (
     get_activity_log,
     get_recent_searches,
@@ -30,6 +31,7 @@ async def get_analytics(user: dict = Depends(require_role(Role.LAWYER))):
     settings = get_settings()
     org_id = user["organization_id"]
     search_analytics = await get_search_analytics(org_id)
+    search_analytics["cache"] = search_cache.get_cache().stats(org_id)
     return {
         "search": search_analytics,
         "storage": {
@@ -1,12 +1,26 @@
+import json
 import logging
+from collections.abc import AsyncIterator
 
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
 from backend.middleware.auth import get_current_user
 from backend.middleware.rate_limit import AI_LIMIT, limiter
-from backend.models.schemas import ChatRequest, ChatResponseWithFollowUps
+from backend.models.schemas import (
+    ChatRequest,
+    ChatResponseWithFollowUps,
+    FollowUpRequest,
+    FollowUpResponse,
+)
+from backend.services import search_filters
 from backend.services.llm.manager import get_llm_manager
-from backend.services.rag_engine import ask_with_follow_ups
+from backend.services.rag_engine import (
+    NO_RESULTS_ANSWER,
+    ask_stream,
+    ask_with_follow_ups,
+    follow_ups,
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["chat"])
@@ -19,17 +33,18 @@ async def chat(request: Request, data: ChatRequest, user: dict = Depends(get_cur
     manager = get_llm_manager()
 
     try:
-        answer, citations, follow_ups = await ask_with_follow_ups(
+        answer, citations, suggestions = await ask_with_follow_ups(
             query=data.query,
             top_k=data.top_k,
             llm_manager=manager,
             org_id=org_id,
+            where=search_filters.where_clause(data.filters),
         )
         return ChatResponseWithFollowUps(
             answer=answer,
             citations=citations,
             ollama_available=True,
-            follow_up_suggestions=follow_ups,
+            follow_up_suggestions=suggestions,
         )
     except ConnectionError as e:
         raise HTTPException(503, detail=str(e))
@@ -40,6 +55,81 @@ async def chat(request: Request, data: ChatRequest, user: dict = Depends(get_cur
         raise HTTPException(500, detail="An error occurred while generating the response.")
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/chat/stream")
+@limiter.limit(AI_LIMIT)
+async def chat_stream(request: Request, data: ChatRequest, user: dict = Depends(get_current_user)):
+    """The answer as server-sent events, written as the model produces it.
+
+    Events: ``citations`` (sent once retrieval is done), ``token`` (``{"text"}``,
+    repeated), then ``done``, or ``error`` (``{"detail"}``) if generation fails.
+    Retrieval errors are returned as 503/504/500 responses, as from ``/chat``.
+    After ``done`` a trailing ``follow_ups`` event (``{"follow_up_suggestions"}``)
+    is generated from the finished answer; the stream closes after it.
+    """
+    manager = get_llm_manager()
+    org_id = user["organization_id"]
+    # Retrieval fails before the stream opens, so it maps to a status code like /chat
+    try:
+        citations, answer = await ask_stream(
+            query=data.query,
+            top_k=data.top_k,
+            llm_manager=manager,
+            org_id=org_id,
+            where=search_filters.where_clause(data.filters),
+        )
+    except ConnectionError as e:
+        raise HTTPException(503, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(504, detail=str(e))
+    except Exception as e:
+        logger.error(f"Chat stream retrieval error: {e}")
+        raise HTTPException(500, detail="An error occurred while searching the documents.")
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse("citations", {"citations": [c.model_dump() for c in citations]})
+        parts = []
+        try:
+            async for text in answer:
+                parts.append(text)
+                yield _sse("token", {"text": text})
+        except (ConnectionError, TimeoutError) as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}")
+            yield _sse("error", {"detail": "An error occurred while generating the response."})
+            return
+        yield _sse("done", {})
+        if citations:
+            suggestions = await follow_ups(data.query, "".join(parts), citations, manager, org_id)
+            yield _sse("follow_ups", {"follow_up_suggestions": suggestions})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Proxies (nginx) must pass events through as they are written
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/chat/follow-ups", response_model=FollowUpResponse)
+@limiter.limit(AI_LIMIT)
+async def chat_follow_ups(request: Request, data: FollowUpRequest, user: dict = Depends(get_current_user)):
+    """Model-written follow-up questions for an answer from ``/chat``, fetched after it is shown.
+
+    Falls back to heuristic suggestions when the LLM fails or exceeds
+    ``follow_up_timeout_seconds``.
+    """
+    if data.answer == NO_RESULTS_ANSWER:
+        return FollowUpResponse(follow_up_suggestions=[])
+    suggestions = await follow_ups(data.query, data.answer, data.citations, get_llm_manager(), user["organization_id"])
+    return FollowUpResponse(follow_up_suggestions=suggestions)
+
+
 @router.get("/chat/status")
 async def chat_status(user: dict = Depends(get_current_user)):
     org_id = user["organization_id"]
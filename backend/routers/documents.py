@@ -17,63 +17,27 @@ from backend.core.database import get_db
 from backend.core.settings import get_settings
 from backend.middleware.auth import get_current_user, require_role
 from backend.middleware.rate_limit import UPLOAD_LIMIT, limiter
-from backend.models.schemas import DocumentMetadata, DocumentResponse, ProcessingStatus
+from backend.models.schemas import (
+    BulkDeleteRequest,
+    DocumentMetadata,
+    DocumentResponse,
+    ProcessingStatus,
+)
 from backend.models.user import Role
-from backend.services import vector_store
+from backend.services import document_cleanup, vector_store
 from backend.services.activity import log_activity, log_audit_event
-from backend.services.chunker import chunk_pages
 from backend.services.document_processor import extract_text
+from backend.services.ingestion import process_document
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["documents"])
 
-
-async def _process_document(doc_id: str, file_path: Path, filename: str, org_id: str):
-    """Background task to process an uploaded document."""
-    db = get_db()
-
-    try:
-        await db.documents.update_one(
-            {"document_id": doc_id},
-            {"$set": {"status": ProcessingStatus.PROCESSING}},
-        )
-
-        pages = extract_text(file_path)
-        page_count = len(pages)
-
-        chunks = chunk_pages(pages, document_id=doc_id, document_name=filename)
-        count = vector_store.add_chunks(chunks)
-
-        await db.documents.update_one(
-            {"document_id": doc_id},
-            {"$set": {
-                "page_count": page_count,
-                "chunk_count": count,
-                "status": ProcessingStatus.READY,
-                "processed_at": datetime.now(timezone.utc),
-            }},
-        )
-        await log_activity(org_id, "", "document_processed", f"{filename} — {page_count} pages, {count} chunks")
-        logger.info(f"Document {filename} processed: {page_count} pages, {count} chunks")
-
-        # Auto-summarize (non-blocking — failure doesn't affect processing)
-        try:
-            from backend.services import ai_features
-            from backend.services.llm.manager import get_llm_manager
-            full_text = "\n".join(p.text for p in pages)
-            llm = get_llm_manager()
-            summary = await ai_features.generate_summary(full_text, llm, org_id)
-            await ai_features.save_analysis(doc_id, "summary", org_id, summary)
-            logger.info(f"Auto-summary generated for {filename}")
-        except Exception as summary_err:
-            logger.warning(f"Auto-summary failed for {filename} (non-blocking): {summary_err}")
-
-    except Exception as e:
-        logger.error(f"Error processing {filename}: {e}")
-        await db.documents.update_one(
-            {"document_id": doc_id},
-            {"$set": {"status": ProcessingStatus.ERROR, "error_message": str(e)}},
-        )
+# Only the fields DocumentMetadata reads; leaves minhash/defined_terms in Mongo
+_METADATA_PROJECTION = {
+    "_id": 0, "document_id": 1, "filename": 1, "file_type": 1, "file_size": 1,
+    "page_count": 1, "chunk_count": 1, "status": 1, "error_message": 1,
+    "uploaded_at": 1, "processed_at": 1, "duplicate_cluster": 1,
+}
 
 
 @router.post("/documents/upload")
@@ -146,7 +110,7 @@ async def upload_document(
     }
     await db.documents.insert_one(doc_record)
 
-    background_tasks.add_task(_process_document, doc_id, file_path, file.filename, org_id)
+    background_tasks.add_task(process_document, doc_id, file_path, file.filename, org_id)
     await log_activity(org_id, user["id"], "document_uploaded", f"{file.filename} ({size_mb:.1f} MB)")
     await log_audit_event(
         org_id, user["id"], "document_uploaded",
@@ -162,7 +126,7 @@ async def upload_document(
 async def list_documents(user: dict = Depends(get_current_user)):
     db = get_db()
     cursor = db.documents.find(
-        {"organization_id": user["organization_id"]},
+        {"organization_id": user["organization_id"]}, _METADATA_PROJECTION,
     ).sort("uploaded_at", -1)
 
     docs = []
@@ -178,6 +142,7 @@ async def list_documents(user: dict = Depends(get_current_user)):
             error_message=d.get("error_message"),
             uploaded_at=d["uploaded_at"],
             processed_at=d.get("processed_at"),
+            duplicate_cluster=d.get("duplicate_cluster"),
         ))
     return DocumentResponse(documents=docs, total=len(docs))
 
@@ -188,7 +153,7 @@ async def get_document(doc_id: str, user: dict = Depends(get_current_user)):
     doc = await db.documents.find_one({
         "document_id": doc_id,
         "organization_id": user["organization_id"],
-    })
+    }, _METADATA_PROJECTION)
     if not doc:
         raise HTTPException(404, "Document not found")
     return DocumentMetadata(
@@ -202,9 +167,35 @@ async def get_document(doc_id: str, user: dict = Depends(get_current_user)):
         error_message=doc.get("error_message"),
         uploaded_at=doc["uploaded_at"],
         processed_at=doc.get("processed_at"),
+        duplicate_cluster=doc.get("duplicate_cluster"),
     )
 
 
+@router.get("/documents/{doc_id}/duplicates")
+async def get_document_duplicates(doc_id: str, user: dict = Depends(get_current_user)):
+    """Other documents in this document's near-duplicate cluster (drafts, copies)."""
+    db = get_db()
+    doc = await db.documents.find_one(
+        {"document_id": doc_id, "organization_id": user["organization_id"]},
+        {"_id": 0, "duplicate_cluster": 1},
+    )
+    if not doc:
+        raise HTTPException(404, "Document not found")
+    cluster = doc.get("duplicate_cluster")
+    duplicates = []
+    if cluster:
+        cursor = db.documents.find(
+            {
+                "organization_id": user["organization_id"],
+                "duplicate_cluster": cluster,
+                "document_id": {"$ne": doc_id},
+            },
+            {"_id": 0, "document_id": 1, "filename": 1, "uploaded_at": 1},
+        ).sort("uploaded_at", 1)
+        duplicates = [{"id": d["document_id"], "filename": d["filename"], "uploaded_at": d["uploaded_at"]} async for d in cursor]
+    return {"document_id": doc_id, "duplicate_cluster": cluster, "duplicates": duplicates}
+
+
 @router.delete("/documents/{doc_id}")
 async def delete_document(doc_id: str, user: dict = Depends(require_role(Role.LAWYER))):
     db = get_db()
@@ -215,17 +206,8 @@ async def delete_document(doc_id: str, user: dict = Depends(require_role(Role.LA
     if not doc:
         raise HTTPException(404, "Document not found")
 
-    # Delete from vector store
-    vector_store.delete_by_document_id(doc_id)
-
-    # Delete uploaded file
-    settings = get_settings()
-    for ext in settings.allowed_extensions:
-        path = settings.uploads_dir / f"{doc_id}{ext}"
-        if path.exists():
-            path.unlink()
-
-    await db.documents.delete_one({"document_id": doc_id})
+    # Chunks, uploaded file, document record and cached analyses
+    await document_cleanup.delete_documents(user["organization_id"], [doc_id])
     await log_activity(user["organization_id"], user["id"], "document_deleted", doc["filename"])
     await log_audit_event(
         user["organization_id"], user["id"], "document_deleted",
@@ -235,6 +217,62 @@ async def delete_document(doc_id: str, user: dict = Depends(require_role(Role.LA
     return {"message": f"Document '{doc['filename']}' deleted"}
 
 
+@router.post("/documents/{doc_id}/reprocess")
+async def reprocess_document(
+    doc_id: str,
+    background_tasks: BackgroundTasks,
+    user: dict = Depends(require_role(Role.PARALEGAL)),
+):
+    """Re-run extraction and indexing; safe to repeat since chunk writes are idempotent."""
+    db = get_db()
+    doc = await db.documents.find_one({
+        "document_id": doc_id,
+        "organization_id": user["organization_id"],
+    })
+    if not doc:
+        raise HTTPException(404, "Document not found")
+    if doc["status"] == ProcessingStatus.PROCESSING:
+        raise HTTPException(409, "Document is already being processed")
+
+    settings = get_settings()
+    file_path = settings.uploads_dir / f"{doc_id}{doc['file_type']}"
+    if not file_path.exists():
+        raise HTTPException(404, "Original upload not found")
+
+    await db.documents.update_one({"document_id": doc_id}, {"$set": {"status": ProcessingStatus.PENDING}})
+    background_tasks.add_task(process_document, doc_id, file_path, doc["filename"], user["organization_id"])
+    await log_activity(user["organization_id"], user["id"], "document_reprocessed", doc["filename"])
+    return {"id": doc_id, "status": "pending", "message": f"Reprocessing '{doc['filename']}'"}
+
+
+@router.post("/documents/bulk-delete")
+async def bulk_delete_documents(req: BulkDeleteRequest, user: dict = Depends(require_role(Role.LAWYER))):
+    """Delete many documents, or a whole matter/client, with batched cleanup."""
+    if not (req.document_ids or req.matter or req.client):
+        raise HTTPException(400, "Provide document_ids, matter or client")
+
+    org_id = user["organization_id"]
+    docs = await document_cleanup.resolve_documents(org_id, req.document_ids, req.matter, req.client)
+    if not docs:
+        raise HTTPException(404, "No matching documents")
+
+    result = await document_cleanup.delete_documents(org_id, [d["document_id"] for d in docs])
+    scope = ", ".join(
+        part for part in (
+            f"matter '{req.matter}'" if req.matter else "",
+            f"client '{req.client}'" if req.client else "",
+            f"{len(req.document_ids)} selected" if req.document_ids else "",
+        ) if part
+    )
+    await log_activity(org_id, user["id"], "documents_bulk_deleted", f"{result['documents']} documents ({scope})")
+    await log_audit_event(
+        org_id, user["id"], "documents_bulk_deleted",
+        resource_type="document", resource_id=",".join(d["document_id"] for d in docs[:50]),
+        detail=f"{result['documents']} documents, {result['chunks']} chunks ({scope})",
+    )
+    return result
+
+
 @router.get("/documents/{doc_id}/content")
 async def get_document_content(doc_id: str, user: dict = Depends(get_current_user)):
     """Return extracted text content of a document, page by page."""
@@ -290,7 +328,7 @@ async def get_stats(user: dict = Depends(get_current_user)):
 
     return {
         "total_documents": total,
-        "total_chunks": vector_store.get_total_chunks(),
+        "total_chunks": vector_store.get_total_chunks(org_id),
         "documents_by_status": by_status,
         "documents_by_type": by_type,
         "llm_status": "connected" if llm_ok else "disconnected",
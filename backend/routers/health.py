@@ -6,6 +6,7 @@ import time
 from fastapi import APIRouter
 
 from backend.core.settings import get_settings
+from backend.services.health import health_monitor
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["health"])
@@ -26,47 +27,12 @@ async def health():
 
 @router.get("/health/detailed")
 async def health_detailed():
+    """Serve cached probe results; probes refresh in the background on their own TTLs."""
     settings = get_settings()
-    checks = {}
-
-    # MongoDB
-    try:
-        from backend.core.database import get_db
-        db = get_db()
-        await db.command("ping")
-        checks["mongodb"] = {"status": "ok"}
-    except Exception as e:
-        checks["mongodb"] = {"status": "error", "detail": str(e)}
-
-    # ChromaDB
-    try:
-        from backend.services.vector_store import get_total_chunks
-        count = get_total_chunks()
-        checks["chromadb"] = {"status": "ok", "chunks": count}
-    except Exception as e:
-        checks["chromadb"] = {"status": "error", "detail": str(e)}
-
-    # Embeddings
-    try:
-        from backend.services.embeddings import embed_query
-        embed_query("test")
-        checks["embeddings"] = {"status": "ok"}
-    except Exception as e:
-        checks["embeddings"] = {"status": "error", "detail": str(e)}
-
-    # Ollama (optional)
-    try:
-        from backend.services.ollama_client import check_ollama_health
-        ok = await check_ollama_health()
-        checks["ollama"] = {"status": "ok" if ok else "unavailable"}
-    except Exception:
-        checks["ollama"] = {"status": "unavailable"}
-
-    all_ok = all(
-        c["status"] == "ok"
-        for name, c in checks.items()
-        if name != "ollama"  # Ollama is optional
-    )
+    if not health_monitor.has_results:
+        # First call before the background loop has produced anything
+        await health_monitor.refresh(force=True)
+    all_ok, checks = health_monitor.snapshot()
 
     return {
         "status": "ok" if all_ok else "degraded",
@@ -0,0 +1,28 @@
+"""Vector index administration — collection versioning, migration progress and consistency sweeps."""
+
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from backend.middleware.auth import require_role
+from backend.models.user import Role
+from backend.services import index_reconciler
+from backend.services.reindex import get_migration_status
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/index", tags=["index"])
+
+
+@router.get("/status")
+async def index_status(user: dict = Depends(require_role(Role.ADMIN))):
+    """Active vector collection, its embedding model and re-embedding progress."""
+    return await get_migration_status()
+
+
+@router.post("/reconcile")
+async def reconcile_index(dry_run: bool = False, user: dict = Depends(require_role(Role.ADMIN))):
+    """Run a MongoDB ↔ vector store consistency sweep inside the server and return its report."""
+    report = await index_reconciler.sweep_now(dry_run=dry_run)
+    if report is None:
+        raise HTTPException(409, "A consistency sweep is already running")
+    return report
@@ -1,17 +1,25 @@
+import asyncio
 import logging
+from datetime import datetime
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, ValidationError
+from pymongo import ReturnDocument
 
 from backend.core.database import get_db
+from backend.core.settings import get_settings
 from backend.middleware.auth import get_current_user, require_role
+from backend.models.schemas import SearchFilters
 from backend.models.user import Role
+from backend.services import clause_index, search_filters, vector_store
 from backend.services.activity import log_activity
 from backend.services.bookmarks import add_bookmark, delete_bookmark, get_bookmarks
 from backend.services.clause_library import get_clause_by_id, get_clause_library
 from backend.services.document_utils import get_doc_text as _get_doc_text
 from backend.services.key_terms import classify_document, extract_key_terms
-from backend.services.search_engine import semantic_search
+from backend.services.result_processing import merge_adjacent
+from backend.services.search_engine import multi_query_search
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["legal"])
@@ -52,24 +60,42 @@ async def list_clauses(user: dict = Depends(get_current_user)):
 
 
 @router.get("/clauses/{clause_id}/search")
-async def search_clause(clause_id: str, top_k: int = 10, user: dict = Depends(get_current_user)):
+async def search_clause(
+    clause_id: str,
+    top_k: int = 10,
+    fusion: Literal["max", "rrf"] = "max",
+    matter: str = "",
+    client: str = "",
+    tag: list[str] = Query([]),
+    document_type: str = "",
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    user: dict = Depends(get_current_user),
+):
     clause = get_clause_by_id(clause_id)
     if not clause:
         raise HTTPException(404, "Clause type not found")
-
-    all_results = []
-    seen_texts: set[str] = set()
-
-    for query in clause["queries"]:
-        results = semantic_search(query=query, top_k=top_k)
-        for r in results:
-            key = r.text[:100]
-            if key not in seen_texts:
-                seen_texts.add(key)
-                all_results.append(r)
-
-    all_results.sort(key=lambda r: r.score, reverse=True)
-    all_results = all_results[:top_k]
+    try:
+        filters = SearchFilters(
+            matter=matter, client=client, tags=tag, document_type=document_type, date_from=date_from, date_to=date_to,
+        )
+    except ValidationError as e:
+        raise HTTPException(400, f"Invalid filters: {e.errors()[0]['msg']}")
+    where = search_filters.where_clause(filters)
+    # Over-fetch so merging overlapping neighbour chunks still fills top_k results
+    depth = top_k * get_settings().postprocess_candidate_multiplier
+
+    if clause_id not in await clause_index.uncovered_categories():
+        # Chunks were scored against this category at ingest: a filtered, pre-ranked read
+        all_results = await asyncio.to_thread(
+            clause_index.tagged_search, clause_id, depth, user["organization_id"], where,
+        )
+    else:
+        # Backfill pending: all phrasings in one embedding batch and one vector query
+        all_results = multi_query_search(
+            clause["queries"], top_k=depth, org_id=user["organization_id"], fusion=fusion, where=where,
+        )
+    all_results = merge_adjacent(all_results)[:top_k]
 
     await log_activity(user["organization_id"], user["id"], "clause_search", f'{clause["name"]} — {len(all_results)} results')
 
@@ -130,12 +156,19 @@ class MatterTagRequest(BaseModel):
 async def tag_document_matter(doc_id: str, req: MatterTagRequest, user: dict = Depends(require_role(Role.PARALEGAL))):
     """Tag a document with client/matter information."""
     db = get_db()
-    result = await db.documents.update_one(
+    previous = await db.documents.find_one_and_update(
         {"document_id": doc_id, "organization_id": user["organization_id"]},
         {"$set": {"matter": req.matter, "client": req.client, "tags": req.tags}},
+        return_document=ReturnDocument.BEFORE,
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(404, "Document not found")
+    # Keep the copies on the document's chunks in step so filtered searches see the new tags
+    attributes = search_filters.chunk_attributes(
+        {**previous, "matter": req.matter, "client": req.client, "tags": req.tags},
+        previous_tags=previous.get("tags", []),
+    )
+    await asyncio.to_thread(vector_store.update_document_metadata, doc_id, user["organization_id"], attributes)
     return {"message": "Tags updated", "document_id": doc_id}
 
 
@@ -1,23 +1,271 @@
-from fastapi import APIRouter, Depends, Request
+import asyncio
+import csv
+import io
+import json
+from collections.abc import Iterator
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from backend.core.settings import get_settings
+from backend.core.tracing import span
 from backend.middleware.auth import get_current_user
 from backend.middleware.rate_limit import SEARCH_LIMIT, limiter
-from backend.models.schemas import SearchRequest, SearchResult
+from backend.models.schemas import Citation, SearchRequest, SearchResult
+from backend.services import (
+    autocomplete,
+    lexical_backfill,
+    near_duplicates,
+    result_processing,
+    search_cache,
+    search_cursors,
+    search_filters,
+)
 from backend.services.activity import log_activity, log_search
-from backend.services.search_engine import semantic_search
+from backend.services.highlighting import highlight_results
+from backend.services.query_language import QuerySyntaxError
+from backend.services.search_engine import (
+    boolean_search,
+    hybrid_search,
+    semantic_search,
+    similar_chunks,
+)
 
 router = APIRouter(tags=["search"])
 
+# CSV rows serialized per chunk of a streamed export
+EXPORT_BATCH_ROWS = 200
+
+
+async def _ranked_results(data: SearchRequest, org_id: str, top_k: int) -> list[Citation]:
+    cache = search_cache.get_cache()
+    # Taken before searching: a write that lands mid-search leaves this entry unreachable
+    cache_key = cache.key(
+        org_id, data.mode, data.query, top_k,
+        rank_query=data.rank_query, filters=data.filters.model_dump_json() if data.filters else "",
+    )
+    results = cache.get(cache_key)
+    if results is None:
+        where = search_filters.where_clause(data.filters)
+        # The term index holds no document attributes; it is narrowed to the matching documents instead
+        document_ids = await search_filters.matching_document_ids(org_id, data.filters) if data.mode != "semantic" else None
+        # Query embedding, vector store and term index calls block, so searches run in a worker thread
+        if data.mode == "boolean":
+            if lexical_backfill.is_building():
+                # Matches in documents not yet indexed would be silently missing
+                raise HTTPException(
+                    503, "The term index is still being built from existing documents; try boolean search shortly",
+                    headers={"Retry-After": "60"},
+                )
+            try:
+                results = await asyncio.to_thread(
+                    boolean_search,
+                    query=data.query, top_k=top_k, org_id=org_id, rank_query=data.rank_query,
+                    document_ids=document_ids,
+                )
+            except QuerySyntaxError as e:
+                raise HTTPException(400, f"Invalid query: {e}")
+        elif data.mode == "hybrid":
+            results = await asyncio.to_thread(
+                hybrid_search,
+                query=data.query, top_k=top_k, org_id=org_id, where=where, document_ids=document_ids,
+            )
+        else:
+            results = await asyncio.to_thread(
+                semantic_search, query=data.query, top_k=top_k, org_id=org_id, where=where,
+            )
+        cache.put(cache_key, results)
+    return results
+
+
+async def _processed_results(data: SearchRequest, org_id: str, limit: int, over_fetch: bool = True) -> list[Citation]:
+    """Ranked results after merging, diversification and per-document capping, best ``limit`` first."""
+    per_document = data.per_document if data.group_by_document else None
+    depth = limit
+    if over_fetch and (data.merge_adjacent or data.diversity > 0 or per_document or data.collapse_duplicates):
+        depth *= get_settings().postprocess_candidate_multiplier
+    ranked = await _ranked_results(data, org_id, depth)
+    cluster_of = None
+    if data.collapse_duplicates:
+        cluster_of = await near_duplicates.get_index().clusters(org_id, list({c.document_id for c in ranked}))
+    # Diversification reads chunk embeddings from the vector store
+    return await asyncio.to_thread(
+        result_processing.postprocess,
+        ranked, limit,
+        merge=data.merge_adjacent, diversity=data.diversity, per_document=per_document, org_id=org_id,
+        cluster_of=cluster_of,
+    )
+
+
+async def _highlighted(results: list[Citation], query: str, mode: str, rank_query: str = "") -> list[Citation]:
+    """Highlights for the citations a response returns, computed off the event loop."""
+    with span("highlight"):
+        return await asyncio.to_thread(highlight_results, results, query, mode, rank_query)
+
+
+def _index_building(mode: str) -> bool:
+    return mode == "hybrid" and lexical_backfill.is_building()
+
+
+def _csv_cell(value) -> str:
+    # Spreadsheet apps evaluate cells starting with these as formulas
+    text = str(value)
+    return f"'{text}" if text[:1] in ("=", "+", "-", "@") else text
+
+
+def _resolve_cursor(cursor: str, org_id: str) -> tuple[str, int, search_cursors.CursorResults]:
+    try:
+        token, offset = search_cursors.decode(cursor)
+    except ValueError:
+        raise HTTPException(400, "Invalid cursor")
+    stored = search_cursors.get_store().get(token, org_id)
+    if stored is None:
+        raise HTTPException(404, "Cursor expired or not found; run the search again")
+    return token, offset, stored
+
 
 @router.post("/search", response_model=SearchResult)
 @limiter.limit(SEARCH_LIMIT)
 async def search_documents(request: Request, data: SearchRequest, user: dict = Depends(get_current_user)):
-    results = semantic_search(query=data.query, top_k=data.top_k)
     org_id = user["organization_id"]
+    cursor = next_cursor = None
+    if not data.paginate:
+        results = await _processed_results(data, org_id, data.top_k)
+    else:
+        # One retrieval ranks every page; later pages and exports read the stored list
+        ranked = await _processed_results(data, org_id, get_settings().search_cursor_depth, over_fetch=False)
+        results = ranked[:data.top_k]
+        token = search_cursors.get_store().create(
+            org_id, data.query, ranked, grouped=data.group_by_document, mode=data.mode, rank_query=data.rank_query,
+        )
+        cursor = search_cursors.encode(token, 0)
+        if len(ranked) > data.top_k:
+            next_cursor = search_cursors.encode(token, data.top_k)
+    results = await _highlighted(results, data.query, data.mode, data.rank_query)
     await log_search(org_id, user["id"], data.query, len(results))
     await log_activity(org_id, user["id"], "search", f'"{data.query}" — {len(results)} results')
     return SearchResult(
         query=data.query,
         results=results,
         total_results=len(results),
+        groups=result_processing.group_by_document(results, len(results)) if data.group_by_document else None,
+        cursor=cursor,
+        next_cursor=next_cursor,
+        index_building=_index_building(data.mode),
+    )
+
+
+@router.get("/search/similar/{chunk_id}", response_model=SearchResult)
+@limiter.limit(SEARCH_LIMIT)
+async def search_similar(
+    request: Request,
+    chunk_id: str,
+    top_k: int = Query(10, ge=1, le=50),
+    exclude_document: bool = False,
+    user: dict = Depends(get_current_user),
+):
+    """Passages most like a stored chunk ("more like this"), e.g. the same clause in other contracts."""
+    org_id = user["organization_id"]
+    # Over-fetch so overlapping neighbour chunks merged together still fill top_k
+    depth = top_k * get_settings().postprocess_candidate_multiplier
+    results = await asyncio.to_thread(similar_chunks, chunk_id, depth, org_id, exclude_document)
+    if results is None:
+        raise HTTPException(404, "Chunk not found")
+    results = result_processing.postprocess(results, top_k, org_id=org_id)
+    await log_activity(org_id, user["id"], "search_similar", f"{chunk_id} — {len(results)} results")
+    return SearchResult(query="", results=results, total_results=len(results))
+
+
+@router.get("/search/suggest")
+async def suggest_queries(
+    q: str = Query(..., max_length=200),
+    limit: int = Query(8, ge=1, le=20),
+    user: dict = Depends(get_current_user),
+):
+    """Completions for a typed prefix: the organization's past searches, then defined terms."""
+    return {"suggestions": await autocomplete.get_autocomplete().suggest(user["organization_id"], q, limit)}
+
+
+@router.get("/search/page", response_model=SearchResult)
+@limiter.limit(SEARCH_LIMIT)
+async def search_page(
+    request: Request,
+    cursor: str,
+    limit: int = Query(10, ge=1, le=50),
+    user: dict = Depends(get_current_user),
+):
+    """The next page of a paginated search, served from its stored ranking."""
+    token, offset, stored = _resolve_cursor(cursor, user["organization_id"])
+    results = stored.results[offset:offset + limit]
+    end = offset + len(results)
+    results = await _highlighted(results, stored.query, stored.mode, stored.rank_query)
+    return SearchResult(
+        query=stored.query,
+        results=results,
+        total_results=len(results),
+        groups=result_processing.group_by_document(results, len(results)) if stored.grouped else None,
+        cursor=cursor,
+        next_cursor=search_cursors.encode(token, end) if end < len(stored.results) else None,
+        index_building=_index_building(stored.mode),
+    )
+
+
+@router.post("/search/stream")
+@limiter.limit(SEARCH_LIMIT)
+async def search_documents_stream(
+    request: Request,
+    data: SearchRequest,
+    limit: int | None = Query(None, ge=1),
+    user: dict = Depends(get_current_user),
+):
+    """/search as NDJSON: a header line, one line per result (best first), then a closing line.
+
+    ``limit`` raises the result count past ``top_k``, up to ``search_cursor_depth``.
+    Lines are serialized as the client reads them, so the first result arrives
+    without building the whole response.
+    """
+    org_id = user["organization_id"]
+    limit = min(limit or data.top_k, get_settings().search_cursor_depth)
+    results = await _highlighted(await _processed_results(data, org_id, limit), data.query, data.mode, data.rank_query)
+    await log_search(org_id, user["id"], data.query, len(results))
+    await log_activity(org_id, user["id"], "search", f'"{data.query}" — {len(results)} results')
+
+    def lines() -> Iterator[str]:
+        yield json.dumps({
+            "type": "header", "query": data.query, "total_results": len(results),
+            "index_building": _index_building(data.mode),
+        }) + "\n"
+        for rank, citation in enumerate(results, 1):
+            yield json.dumps({"type": "result", "rank": rank, **citation.model_dump()}) + "\n"
+        # Lets clients tell a complete stream from a dropped connection
+        yield json.dumps({"type": "end"}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/search/export")
+async def export_search(cursor: str, user: dict = Depends(get_current_user)):
+    """Every ranked result of a paginated search (any of its cursors) as CSV, streamed in batches of rows."""
+    _, _, stored = _resolve_cursor(cursor, user["organization_id"])
+    await log_activity(
+        user["organization_id"], user["id"], "search_export", f'"{stored.query}" — {len(stored.results)} results',
+    )
+
+    def rows() -> Iterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["rank", "document_name", "page", "paragraph", "score", "text"])
+        for rank, c in enumerate(stored.results, 1):
+            paragraph = c.paragraph if c.paragraph is not None else ""
+            writer.writerow([rank, _csv_cell(c.document_name), c.page or "", paragraph, c.score, _csv_cell(c.text)])
+            if rank % EXPORT_BATCH_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return StreamingResponse(
+        rows(),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="search-results.csv"'},
     )
@@ -0,0 +1,15 @@
+"""Guard for scripts that write the vector store, lexical index or near-duplicate state."""
+
+import sys
+
+from backend.core.database import close_db
+from backend.services import server_presence
+
+
+async def exit_if_server_running(instead: str = "") -> None:
+    """Exit while an API server is running: it holds the stores open and would not see these writes."""
+    servers = await server_presence.running_servers()
+    if servers:
+        print(f"An API server is running ({', '.join(servers)}). Stop it first{', or ' + instead if instead else ''}.")
+        await close_db()
+        sys.exit(1)
@@ -0,0 +1,37 @@
+"""Tag chunks indexed before tenant partitioning with their organization_id.
+
+Usage: python -m backend.scripts.backfill_chunk_tenants
+
+The backend also runs this in the background on startup until it has
+completed once for the active collection (see ``services/tenant_backfill.py``).
+
+Refuses to run while an API server is up, since the server holds the same
+stores open.
+"""
+
+import asyncio
+import logging
+
+from backend.core.database import close_db, connect_db
+from backend.core.settings import get_settings
+from backend.scripts._server_check import exit_if_server_running
+from backend.services import tenant_backfill, vector_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    settings = get_settings()
+    db = await connect_db(settings.mongo_uri, settings.mongo_db_name)
+    await exit_if_server_running("let it run the same backfill in the background at startup")
+    active = await db.vector_index_state.find_one({"_id": "active"})
+    if active:
+        vector_store.set_active_collection(active["collection"], active["embedding_model"])
+
+    await tenant_backfill.backfill()
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""Score existing chunks against clause categories and store the tags as chunk metadata.
+
+Usage: python -m backend.scripts.backfill_clause_tags [--category indemnification ...] [--all]
+
+By default only categories the active collection has not been tagged with
+(new categories, or ones whose queries changed) are processed.
+
+Refuses to run while an API server is up, since the server holds the same
+stores open.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from backend.core.database import close_db, connect_db
+from backend.core.settings import get_settings
+from backend.scripts._server_check import exit_if_server_running
+from backend.services import clause_index, vector_store
+from backend.services.clause_library import CLAUSE_CATEGORIES
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--category", action="append", choices=[c["id"] for c in CLAUSE_CATEGORIES])
+    parser.add_argument("--all", action="store_true", help="Rescore every category")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    db = await connect_db(settings.mongo_uri, settings.mongo_db_name)
+    await exit_if_server_running("let it tag uncovered categories in the background at startup")
+    active = await db.vector_index_state.find_one({"_id": "active"})
+    if active:
+        vector_store.set_active_collection(active["collection"], active["embedding_model"])
+
+    if args.all:
+        categories = [c["id"] for c in CLAUSE_CATEGORIES]
+    else:
+        categories = args.category or await clause_index.uncovered_categories()
+    if categories:
+        await clause_index.backfill(categories)
+    else:
+        logger.info("All clause categories are already tagged")
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,68 @@
+"""Copy document attributes (matter, client, tags, type, upload date) onto indexed chunks.
+
+Usage: python -m backend.scripts.backfill_document_attributes [--org ORG_ID]
+
+Chunks ingested before search filters existed carry none of these attributes,
+so filtered searches skip them. Documents without a stored ``document_type``
+are classified from their indexed text first. Re-running is safe: attributes
+are merged into existing chunk metadata.
+
+Refuses to run while an API server is up, since the server holds the same
+stores open.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from backend.core.database import close_db, connect_db
+from backend.core.settings import get_settings
+from backend.models.schemas import ProcessingStatus
+from backend.scripts._server_check import exit_if_server_running
+from backend.services import search_filters, vector_store
+from backend.services.key_terms import classify_document
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--org", default=None, help="Only this organization's documents")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    db = await connect_db(settings.mongo_uri, settings.mongo_db_name)
+    await exit_if_server_running()
+    active = await db.vector_index_state.find_one({"_id": "active"})
+    if active:
+        vector_store.set_active_collection(active["collection"], active["embedding_model"])
+
+    query: dict = {"status": ProcessingStatus.READY}
+    if args.org:
+        query["organization_id"] = args.org
+    documents = updated = 0
+    async for doc in db.documents.find(query):
+        org_id = doc.get("organization_id", "")
+        if not doc.get("document_type"):
+            chunks = await asyncio.to_thread(
+                vector_store.get_store().get, tenant=org_id or None, where={"document_id": doc["document_id"]},
+            )
+            chunks.sort(key=lambda c: c.metadata.get("chunk_index", 0))
+            doc["document_type"] = classify_document("\n".join(c.text for c in chunks), doc.get("filename", ""))
+            await db.documents.update_one(
+                {"document_id": doc["document_id"]}, {"$set": {"document_type": doc["document_type"]}},
+            )
+        updated += await asyncio.to_thread(
+            vector_store.update_document_metadata,
+            doc["document_id"], org_id, search_filters.chunk_attributes(doc),
+        )
+        documents += 1
+        if documents % 100 == 0:
+            logger.info(f"Updated {documents} documents ({updated} chunks)")
+    logger.info(f"Done: {documents} documents, {updated} chunks")
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
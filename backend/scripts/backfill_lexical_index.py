@@ -0,0 +1,47 @@
+"""Build the BM25 term index from chunks already in the vector store.
+
+Usage: python -m backend.scripts.backfill_lexical_index [--page-size 1000]
+
+Chunks ingested before hybrid search existed have no term postings, and
+postings logged before word positions were indexed are skipped on load. Chunks
+are read page by page from the active collection and indexed per tenant unless
+the term index already holds them; re-running is safe.
+
+The backend also runs this in the background on startup until it has
+completed once (see ``services/lexical_backfill.py``).
+
+Refuses to run while an API server is up, since the server holds the same
+stores open.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from backend.core.database import close_db, connect_db
+from backend.core.settings import get_settings
+from backend.scripts._server_check import exit_if_server_running
+from backend.services import lexical_backfill, vector_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--page-size", type=int, default=lexical_backfill.PAGE_SIZE)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    db = await connect_db(settings.mongo_uri, settings.mongo_db_name)
+    await exit_if_server_running()
+    active = await db.vector_index_state.find_one({"_id": "active"})
+    if active:
+        vector_store.set_active_collection(active["collection"], active["embedding_model"])
+
+    await lexical_backfill.backfill(page_size=args.page_size)
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""Compute MinHash signatures and near-duplicate clusters for documents ingested earlier.
+
+Usage: python -m backend.scripts.backfill_near_duplicates [--org ORG_ID]
+
+Signatures are computed from each document's indexed chunks, oldest upload
+first, so the earliest copy names its cluster. Documents that already have a
+signature are left as they are; re-running is safe.
+
+Refuses to run while an API server is up, since the server holds the same
+stores open.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from backend.core.database import close_db, connect_db
+from backend.core.settings import get_settings
+from backend.models.schemas import ProcessingStatus
+from backend.scripts._server_check import exit_if_server_running
+from backend.services import near_duplicates, vector_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--org", default=None, help="Only this organization's documents")
+    args = parser.parse_args()
+
+    settings = get_settings()
+    db = await connect_db(settings.mongo_uri, settings.mongo_db_name)
+    await exit_if_server_running()
+    active = await db.vector_index_state.find_one({"_id": "active"})
+    if active:
+        vector_store.set_active_collection(active["collection"], active["embedding_model"])
+
+    query: dict = {"status": ProcessingStatus.READY, "minhash": {"$exists": False}}
+    if args.org:
+        query["organization_id"] = args.org
+    index = near_duplicates.get_index()
+    documents = clustered = 0
+    async for doc in db.documents.find(query).sort("uploaded_at", 1):
+        org_id = doc.get("organization_id", "")
+        chunks = await asyncio.to_thread(
+            vector_store.get_store().get, tenant=org_id or None, where={"document_id": doc["document_id"]},
+        )
+        minhash = near_duplicates.signature([c.text for c in chunks])
+        if minhash is None:
+            continue
+        cluster, _ = await index.add(org_id, doc["document_id"], minhash)
+        await db.documents.update_one(
+            {"document_id": doc["document_id"]}, {"$set": {"minhash": minhash, "duplicate_cluster": cluster}},
+        )
+        documents += 1
+        clustered += cluster != doc["document_id"]
+        if documents % 100 == 0:
+            logger.info(f"Signed {documents} documents ({clustered} near-duplicates)")
+    logger.info(f"Done: {documents} documents, {clustered} near-duplicates")
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
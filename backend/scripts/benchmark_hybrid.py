@@ -0,0 +1,119 @@
+"""Recall@k of semantic vs hybrid (BM25 + vector) search on exact-term queries.
+
+Usage: python -m backend.scripts.benchmark_hybrid [--documents 400] [--clauses 12] [--queries 300]
+
+Builds a synthetic contract corpus in which every clause carries identifiers
+that embeddings handle poorly (section numbers, dollar amounts, party names),
+indexes it with the configured embedding model into a temporary NumPy store
+and term index, then asks questions that name those identifiers. Each query
+has exactly one relevant chunk; recall@k is the fraction of queries whose
+chunk appears in the top k. Requires the embedding model to be available.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.models.schemas import Citation
+from backend.services import lexical_index, search_engine, vector_store
+from backend.services.embeddings import embed_texts
+from backend.services.vectordb.base import TENANT_KEY
+from backend.services.vectordb.numpy_store import NumpyVectorStore
+
+TENANT = "benchmark"
+
+_PARTIES = [
+    "Harrow", "Meridian", "Castell", "Brightwater", "Okafor", "Lindqvist", "Tessaro", "Vantage",
+    "Northgate", "Pellham", "Quorra", "Ashby", "Delacroix", "Ferngrove", "Kestrel", "Moreau",
+]
+_SUFFIXES = ["Logistics", "Holdings", "Partners", "Capital", "Biotech", "Foods", "Systems", "Energy"]
+_CLAUSES = [
+    ("payment", "Section {section}. {party} shall pay the Purchase Price of ${amount} within thirty days of Closing."),
+    ("indemnity", "Section {section}. {party} shall indemnify the Buyer against losses up to ${amount} arising from breach."),
+    ("termination", "Section {section}. Either party may terminate on ninety days notice; {party} owes a fee of ${amount}."),
+    ("cap", "Section {section}. The aggregate liability of {party} shall not exceed ${amount} in any contract year."),
+    ("deposit", "Section {section}. {party} shall place ${amount} in escrow as a security deposit."),
+    ("insurance", "Section {section}. {party} shall maintain insurance coverage of at least ${amount} per occurrence."),
+]
+_QUESTIONS = {
+    "payment": "How much does {party} pay under Section {section}?",
+    "indemnity": "What is {party}'s indemnity limit in Section {section}?",
+    "termination": "What termination fee does {party} owe under Section {section}?",
+    "cap": "What caps {party}'s liability in Section {section}?",
+    "deposit": "How much escrow does {party} deposit per Section {section}?",
+    "insurance": "What insurance must {party} carry under Section {section}?",
+}
+
+
+def _corpus(documents: int, clauses: int, seed: int = 5):
+    rng = random.Random(seed)
+    ids, texts, metadatas, facts = [], [], [], []
+    for d in range(documents):
+        party = f"{rng.choice(_PARTIES)} {rng.choice(_SUFFIXES)} {d}"
+        for c in range(clauses):
+            kind, template = rng.choice(_CLAUSES)
+            section = f"{rng.randint(1, 20)}.{rng.randint(1, 9)}"
+            amount = f"{rng.randint(1, 900) * 1000:,}"
+            ids.append(f"doc{d}_chunk_{c}")
+            texts.append(template.format(section=section, party=party, amount=amount))
+            metadatas.append({"document_id": f"doc{d}", "document_name": f"contract_{d}.pdf", "chunk_index": c, TENANT_KEY: TENANT})
+            facts.append((kind, party, section))
+    return ids, texts, metadatas, facts
+
+
+def _recall_at(results: list[list[str]], truth: list[str], k: int) -> float:
+    return sum(t in r[:k] for r, t in zip(results, truth)) / max(len(truth), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=400)
+    parser.add_argument("--clauses", type=int, default=12)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--k", type=lambda v: [int(x) for x in v.split(",")], default=[1, 3, 5, 10, 20])
+    args = parser.parse_args()
+
+    ids, texts, metadatas, facts = _corpus(args.documents, args.clauses)
+    picks = random.Random(9).sample(range(len(ids)), min(args.queries, len(ids)))
+    queries = [_QUESTIONS[facts[i][0]].format(party=facts[i][1], section=facts[i][2]) for i in picks]
+    truth = [ids[i] for i in picks]
+    depth = max(args.k)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        store = NumpyVectorStore(Path(tmp) / "vectors")
+        store.add(ids, embed_texts(texts, vector_store.get_active_model()), texts, metadatas)
+        index = lexical_index.LexicalIndex(Path(tmp) / "lexical")
+        index.add(TENANT, ids, [m["document_id"] for m in metadatas], texts)
+        print(f"Indexed {len(ids)} chunks in {time.perf_counter() - start:.1f}s\n")
+
+        # Route the search functions to the temporary indexes
+        vector_store._stores[vector_store.get_active_collection_name()] = store
+        lexical_index._index = index
+
+        modes = {
+            "semantic": search_engine.semantic_search,
+            "bm25": lambda q, top_k, org_id: [
+                Citation(document_id="", document_name="", text="", score=s, chunk_id=c)
+                for c, s in lexical_index.search(q, top_k, org_id)
+            ],
+            "hybrid": search_engine.hybrid_search,
+        }
+        print(f"{'mode':<10} {'p50 ms':>8} " + " ".join(f"{'R@' + str(k):>7}" for k in args.k))
+        for mode, search in modes.items():
+            latencies, results = [], []
+            for query in queries:
+                start = time.perf_counter()
+                citations = search(query, top_k=depth, org_id=TENANT)
+                latencies.append((time.perf_counter() - start) * 1000)
+                results.append([c.chunk_id for c in citations])
+            recalls = " ".join(f"{_recall_at(results, truth, k):>7.3f}" for k in args.k)
+            print(f"{mode:<10} {np.percentile(latencies, 50):>8.2f} {recalls}")
+
+
+if __name__ == "__main__":
+    main()
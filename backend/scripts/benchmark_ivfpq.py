@@ -0,0 +1,77 @@
+"""Recall@k and latency of the IVF-PQ index against exact search.
+
+Usage: python -m backend.scripts.benchmark_ivfpq [--chunks 200000] [--nprobe 4,8,16,32] [--rerank 100,200]
+
+Builds one NumPy-backend partition from a synthetic clustered corpus, then
+sweeps the recall/latency knobs (``nprobe`` and the exact re-scoring
+shortlist) and reports recall@k against exact float32 search.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from backend.scripts.benchmark_vector_stores import (
+    _load,
+    _query,
+    _recall,
+    _synthetic_corpus,
+)
+from backend.services.vectordb.ivfpq import IVFPQConfig
+from backend.services.vectordb.numpy_store import NumpyVectorStore, top_k_rows
+
+
+def _ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--subvectors", type=int, default=48)
+    parser.add_argument("--nlist", type=int, default=0)
+    parser.add_argument("--nprobe", type=_ints, default=[4, 8, 16, 32])
+    parser.add_argument("--rerank", type=_ints, default=[100, 200, 400])
+    args = parser.parse_args()
+
+    ids, vectors, metadatas = _synthetic_corpus(args.chunks, args.dim, tenants=1)
+    rng = np.random.default_rng(11)
+    queries = vectors[rng.integers(0, len(vectors), args.queries)] + 0.1 * rng.normal(size=(args.queries, args.dim))
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+    truth = [[ids[r] for r in top_k_rows(vectors @ q, args.top_k)] for q in queries]
+    tenant = metadatas[0]["organization_id"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = IVFPQConfig(nlist=args.nlist, subvectors=args.subvectors, min_rows=1)
+        store = NumpyVectorStore(Path(tmp), config)
+        start = time.perf_counter()
+        _load(store, ids, vectors, metadatas, batch=args.chunks)
+        partition = store._partition(tenant)
+        partition._trainer.join()
+        print(f"Indexed {args.chunks} × {args.dim} in {time.perf_counter() - start:.1f}s "
+              f"({args.subvectors} code bytes/vector vs {args.dim * 2} for float16)\n")
+
+        # Exact baseline on the same partition
+        index, partition.index = partition.index, None
+        latencies, results = _query(store, queries, args.top_k, tenant)
+        print(f"{'mode':<8} {'nprobe':>6} {'rerank':>6} {'p50 ms':>8} {'p95 ms':>8} {'recall':>8}")
+        print(f"{'exact':<8} {'-':>6} {'-':>6} {np.percentile(latencies, 50):>8.2f} "
+              f"{np.percentile(latencies, 95):>8.2f} {_recall(results, truth):>8.3f}")
+        partition.index = index
+
+        for nprobe in args.nprobe:
+            for rerank in args.rerank:
+                config.nprobe, config.rerank_candidates = nprobe, rerank
+                latencies, results = _query(store, queries, args.top_k, tenant)
+                print(f"{'ivfpq':<8} {nprobe:>6} {rerank:>6} {np.percentile(latencies, 50):>8.2f} "
+                      f"{np.percentile(latencies, 95):>8.2f} {_recall(results, truth):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
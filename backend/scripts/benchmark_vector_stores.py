@@ -0,0 +1,103 @@
+"""Compare vector store backends on a synthetic corpus.
+
+Usage: python -m backend.scripts.benchmark_vector_stores [--chunks 20000] [--queries 200]
+
+Measures bulk-append throughput and single-query latency (p50/p95) for the
+ChromaDB and in-process NumPy backends, plus recall@k of each against exact
+float32 search.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+
+from backend.services.vectordb.base import VectorStore
+from backend.services.vectordb.chroma import ChromaVectorStore
+from backend.services.vectordb.numpy_store import NumpyVectorStore, top_k_rows
+
+
+def _synthetic_corpus(n: int, dim: int, tenants: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    # Clustered vectors resemble real embeddings better than uniform noise
+    centers = rng.normal(size=(max(n // 200, 8), dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.35 * rng.normal(size=(n, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"doc{i // 20}_chunk_{i % 20}" for i in range(n)]
+    metadatas = [
+        {"document_id": f"doc{i // 20}", "organization_id": f"org{(i // 20) % tenants}", "chunk_index": i % 20}
+        for i in range(n)
+    ]
+    return ids, vectors, metadatas
+
+
+def _load(store: VectorStore, ids, vectors, metadatas, batch: int = 500) -> float:
+    start = time.perf_counter()
+    for i in range(0, len(ids), batch):
+        store.add(
+            ids[i:i + batch],
+            vectors[i:i + batch].tolist(),
+            [f"chunk text {j}" for j in range(i, min(i + batch, len(ids)))],
+            metadatas[i:i + batch],
+        )
+    return time.perf_counter() - start
+
+
+def _query(store: VectorStore, queries: np.ndarray, top_k: int, tenant: str) -> tuple[list[float], list[list[str]]]:
+    latencies, results = [], []
+    for q in queries:
+        start = time.perf_counter()
+        hits = store.search([q.tolist()], top_k, tenant=tenant)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append([h.id for h in hits])
+    return latencies, results
+
+
+def _recall(results: list[list[str]], truth: list[list[str]]) -> float:
+    found = sum(len(set(r) & set(t)) for r, t in zip(results, truth))
+    return found / max(sum(len(t) for t in truth), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--chunks", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--tenants", type=int, default=4)
+    parser.add_argument("--top-k", type=int, default=10)
+    args = parser.parse_args()
+
+    ids, vectors, metadatas = _synthetic_corpus(args.chunks, args.dim, args.tenants)
+    rng = np.random.default_rng(11)
+    queries = vectors[rng.integers(0, len(vectors), args.queries)] + 0.1 * rng.normal(size=(args.queries, args.dim))
+    queries = (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+    tenant = "org0"
+    tenant_rows = np.array([i for i, m in enumerate(metadatas) if m["organization_id"] == tenant])
+    truth = [
+        [ids[tenant_rows[r]] for r in top_k_rows(vectors[tenant_rows] @ q, args.top_k)]
+        for q in queries
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backends: dict[str, VectorStore] = {
+            "chroma": ChromaVectorStore(chromadb.PersistentClient(path=str(Path(tmp) / "chroma")), "benchmark", "synthetic"),
+            "numpy": NumpyVectorStore(Path(tmp) / "numpy"),
+        }
+        print(f"{args.chunks} chunks × {args.dim} dims, {args.tenants} tenants, {args.queries} queries, top_k={args.top_k}\n")
+        print(f"{'backend':<8} {'append/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'recall':>8}")
+        for name, store in backends.items():
+            load_seconds = _load(store, ids, vectors, metadatas)
+            latencies, results = _query(store, queries, args.top_k, tenant)
+            print(
+                f"{name:<8} {args.chunks / load_seconds:>10.0f} "
+                f"{np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 95):>8.2f} "
+                f"{_recall(results, truth):>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Find and repair drift between MongoDB document records and the vector store.
+
+Usage: python -m backend.scripts.reconcile_index [--dry-run] [--throttle 0.1] [--max-requeue 20]
+
+Deletes orphaned chunks and re-processes documents whose index is incomplete.
+With --dry-run, only reports what it would do.
+
+Repairs write stores an API server holds open, so without --dry-run the
+script refuses to run while one is up; use ``POST /api/index/reconcile`` then.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+from backend.core.database import close_db, connect_db
+from backend.core.settings import get_settings
+from backend.scripts._server_check import exit_if_server_running
+from backend.services import index_reconciler, vector_store
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--throttle", type=float, default=None, help="Seconds to pause between pages")
+    parser.add_argument("--max-requeue", type=int, default=None)
+    args = parser.parse_args()
+
+    settings = get_settings()
+    db = await connect_db(settings.mongo_uri, settings.mongo_db_name)
+    if not args.dry_run:
+        await exit_if_server_running("run the sweep in the server with POST /api/index/reconcile")
+    active = await db.vector_index_state.find_one({"_id": "active"})
+    if active:
+        vector_store.set_active_collection(active["collection"], active["embedding_model"])
+
+    report = await index_reconciler.reconcile(
+        dry_run=args.dry_run, throttle=args.throttle, max_requeue=args.max_requeue,
+    )
+    print(json.dumps(report, indent=2))
+    await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,6 +5,7 @@ from datetime import datetime, timezone
 from typing import Any
 
 from backend.core.database import get_db
+from backend.services import autocomplete
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,7 @@ async def log_search(org_id: str, user_id: str, query: str, result_count: int):
         "result_count": result_count,
         "created_at": datetime.now(timezone.utc),
     })
+    autocomplete.get_autocomplete().record(org_id, query)
 
 
 async def get_recent_searches(org_id: str, limit: int = 10) -> list[dict]:
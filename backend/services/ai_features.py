@@ -9,6 +9,8 @@ import logging
 from datetime import datetime, timezone
 
 from backend.core.database import get_db
+from backend.models.schemas import Citation
+from backend.services.clause_library import CLAUSE_CATEGORIES
 from backend.services.llm.manager import LLMManager
 
 logger = logging.getLogger(__name__)
@@ -386,3 +388,28 @@ Return ONLY a JSON array, no other text."""
     if isinstance(result, dict) and "questions" in result:
         return [str(q) for q in result["questions"][:3]]
     return []
+
+
+_GENERIC_FOLLOW_UPS = [
+    "Are there any exceptions or carve-outs to this?",
+    "What deadlines or notice periods apply?",
+    "Which party bears the risk if this is breached?",
+]
+
+
+def heuristic_follow_ups(question: str, answer: str, citations: list[Citation], limit: int = 3) -> list[str]:
+    """Follow-up questions without an LLM call, from the clause types and documents an answer draws on."""
+    asked = question.casefold()
+    cited = " ".join([answer, *(c.text for c in citations)]).casefold()
+    suggestions = [
+        f"What does the {category['name'].lower()} clause say?"
+        for category in CLAUSE_CATEGORIES
+        if category["name"].casefold() in cited and category["name"].casefold() not in asked
+    ][:limit - 1]
+    documents = list(dict.fromkeys(c.document_name for c in citations if c.document_name))
+    if len(documents) > 1:
+        suggestions.append(f"How do {documents[0]} and {documents[1]} differ on this?")
+    elif documents:
+        suggestions.append(f"What else in {documents[0]} relates to this?")
+    suggestions.extend(_GENERIC_FOLLOW_UPS)
+    return suggestions[:limit]
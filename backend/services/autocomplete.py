@@ -0,0 +1,165 @@
+"""Query suggestions per organization from search history and documents' defined terms.
+
+Each organization's suggestions are a sorted array of normalized phrases, so a
+prefix lookup is a binary search, and the phrases in that range are ranked by
+how often they were searched. One- and two-letter prefixes cover too much of
+the array to rank per keystroke, so their best phrases are kept up to date as
+weights change. Searched queries are suggested in their normalized form (the
+form the history is grouped by when loading), defined terms as written.
+
+The array is built from MongoDB on the organization's first lookup after a
+restart, then kept current in memory: ``log_search`` records each query and
+ingestion adds the defined terms it extracts. Suggestions live in process
+memory, like the search cache.
+"""
+
+import asyncio
+import bisect
+import heapq
+import logging
+import threading
+from dataclasses import dataclass
+
+from backend.core.database import get_db
+from backend.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Prefixes up to this long keep their best phrases instead of ranking their range per lookup
+_TOP_PREFIX_LENGTH = 2
+# Phrases kept per short prefix: the most a lookup returns
+TOP_PER_PREFIX = 20
+# Defined terms rank below any query that was actually searched
+_TERM_WEIGHT = 0.5
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+@dataclass
+class _Entry:
+    text: str  # Normalized for searched queries; defined terms as first seen, whitespace collapsed
+    weight: float
+    source: str  # "history" or "term"
+
+
+class _OrgSuggestions:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.keys: list[str] = []
+        self.entries: dict[str, _Entry] = {}
+        # Short prefix → keys with the highest weights, best first
+        self.top: dict[str, list[str]] = {}
+
+    def add(self, text: str, weight: float, source: str) -> None:
+        key = normalize(text)
+        if not key:
+            return
+        entry = self.entries.get(key)
+        if entry is not None:
+            entry.weight += weight
+            if source == "history":
+                entry.source = "history"
+                entry.text = key
+        elif len(self.keys) >= self.max_entries:
+            return
+        else:
+            self.entries[key] = _Entry(key if source == "history" else " ".join(text.split()), weight, source)
+            bisect.insort(self.keys, key)
+        self._update_top(key)
+
+    def _update_top(self, key: str) -> None:
+        # Weights only grow, so a key can only enter a prefix's list when its own weight changes
+        weight = self.entries[key].weight
+        for length in range(1, min(len(key), _TOP_PREFIX_LENGTH) + 1):
+            top = self.top.setdefault(key[:length], [])
+            if key not in top:
+                if len(top) >= TOP_PER_PREFIX and self.entries[top[-1]].weight >= weight:
+                    continue
+                top.append(key)
+            top.sort(key=lambda k: self.entries[k].weight, reverse=True)
+            del top[TOP_PER_PREFIX:]
+
+    def suggest(self, prefix: str, limit: int) -> list[_Entry]:
+        if len(prefix) <= _TOP_PREFIX_LENGTH and limit <= TOP_PER_PREFIX:
+            return [self.entries[key] for key in self.top.get(prefix, [])[:limit]]
+        start = bisect.bisect_left(self.keys, prefix)
+        end = bisect.bisect_left(self.keys, prefix + "\U0010ffff", lo=start)
+        matches = (self.entries[key] for key in self.keys[start:end])
+        return heapq.nlargest(limit, matches, key=lambda e: e.weight)
+
+
+class Autocomplete:
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._orgs: dict[str, _OrgSuggestions] = {}
+        self._loading: dict[str, asyncio.Lock] = {}
+        self._lock = threading.Lock()
+
+    async def _load(self, org_id: str) -> _OrgSuggestions:
+        suggestions = self._orgs.get(org_id)
+        if suggestions is not None:
+            return suggestions
+        lock = self._loading.setdefault(org_id, asyncio.Lock())
+        async with lock:
+            suggestions = self._orgs.get(org_id)
+            if suggestions is None:
+                suggestions = _OrgSuggestions(self.max_entries)
+                db = get_db()
+                pipeline = [
+                    {"$match": {"organization_id": org_id}},
+                    {"$group": {"_id": {"$toLower": {"$trim": {"input": "$query"}}}, "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}},
+                    {"$limit": self.max_entries},
+                ]
+                async for doc in db.search_history.aggregate(pipeline):
+                    suggestions.add(doc["_id"], doc["count"], "history")
+                cursor = db.documents.find(
+                    {"organization_id": org_id, "defined_terms": {"$exists": True}}, {"_id": 0, "defined_terms": 1},
+                )
+                async for doc in cursor:
+                    for term in doc["defined_terms"]:
+                        suggestions.add(term, _TERM_WEIGHT, "term")
+                with self._lock:
+                    self._orgs[org_id] = suggestions
+                logger.info(f"Autocomplete loaded {len(suggestions.keys)} suggestions for org {org_id}")
+        return suggestions
+
+    async def suggest(self, org_id: str, prefix: str, limit: int = 8) -> list[dict]:
+        key = normalize(prefix)
+        if not key:
+            return []
+        suggestions = await self._load(org_id)
+        with self._lock:
+            entries = suggestions.suggest(key, limit)
+            return [{"text": e.text, "source": e.source} for e in entries]
+
+    def record(self, org_id: str, text: str, weight: float = 1.0, source: str = "history") -> None:
+        """Count a search or add a term; organizations not loaded yet pick it up from MongoDB when they are."""
+        suggestions = self._orgs.get(org_id)
+        if suggestions is not None:
+            with self._lock:
+                suggestions.add(text, weight, source)
+
+    def add_terms(self, org_id: str, terms: list[str]) -> None:
+        for term in terms:
+            self.record(org_id, term, _TERM_WEIGHT, "term")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._orgs.clear()
+            self._loading.clear()
+
+
+_autocomplete: Autocomplete | None = None
+_autocomplete_lock = threading.Lock()
+
+
+def get_autocomplete() -> Autocomplete:
+    global _autocomplete
+    if _autocomplete is None:
+        with _autocomplete_lock:
+            if _autocomplete is None:
+                _autocomplete = Autocomplete(get_settings().autocomplete_max_entries)
+    return _autocomplete
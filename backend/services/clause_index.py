@@ -0,0 +1,246 @@
+"""Clause-category tags computed once per chunk at ingest time.
+
+Each clause category gets a centroid embedding (the normalized mean of its
+query phrasings), computed once per embedding model and cached in
+``data/clause_centroids.json``. When chunks are indexed their similarity to
+every centroid is computed with one matrix product, and categories scoring at
+least ``clause_tag_min_score`` are written into the chunk metadata as
+``clause_<category_id>: <score>``. A clause library lookup is then a
+nearest-neighbour query for the cached centroid, filtered to tagged chunks and
+limited to ``top_k``, instead of embedding every phrasing on every request.
+
+Chunks indexed before a category existed (or before its queries changed) are
+tagged by :func:`backfill`, which runs at startup for uncovered categories and
+from ``backend.scripts.backfill_clause_tags``. Coverage per collection is
+tracked in ``vector_index_state`` so lookups fall back to live search until a
+backfill has completed.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from backend.core.database import get_db
+from backend.core.settings import get_settings
+from backend.models.schemas import Citation
+from backend.services import vector_store
+from backend.services.clause_library import CLAUSE_CATEGORIES
+from backend.services.embeddings import embed_texts
+
+logger = logging.getLogger(__name__)
+
+TAG_PREFIX = "clause_"
+BACKFILL_PAGE_SIZE = 500
+COVERAGE_CACHE_SECONDS = 60.0
+
+# model name -> (category ids, centroid matrix)
+_centroids: dict[str, tuple[list[str], np.ndarray]] = {}
+_centroids_lock = threading.Lock()
+_task: asyncio.Task | None = None
+# collection -> (expiry on the monotonic clock, uncovered category ids)
+_coverage_cache: dict[str, tuple[float, list[str]]] = {}
+
+
+def tag_key(category_id: str) -> str:
+    return f"{TAG_PREFIX}{category_id}"
+
+
+def _category_hash(category: dict) -> str:
+    return hashlib.sha1(json.dumps(category["queries"]).encode()).hexdigest()[:12]
+
+
+def _centroid_file():
+    return get_settings().data_dir / "clause_centroids.json"
+
+
+def get_centroids(model_name: str) -> tuple[list[str], np.ndarray]:
+    """Category ids and their unit-length centroid embeddings for a model, computed once and cached on disk."""
+    cached = _centroids.get(model_name)
+    if cached is not None:
+        return cached
+    with _centroids_lock:
+        if model_name in _centroids:
+            return _centroids[model_name]
+        path = _centroid_file()
+        stored = json.loads(path.read_text()) if path.exists() else {}
+        by_model = stored.setdefault(model_name, {})
+
+        stale = [c for c in CLAUSE_CATEGORIES if by_model.get(c["id"], {}).get("hash") != _category_hash(c)]
+        if stale:
+            # One embedding batch for every query of every missing category
+            queries = [q for c in stale for q in c["queries"]]
+            vectors = np.asarray(embed_texts(queries, model_name), dtype=np.float32)
+            start = 0
+            for category in stale:
+                mean = vectors[start:start + len(category["queries"])].mean(axis=0)
+                start += len(category["queries"])
+                by_model[category["id"]] = {
+                    "hash": _category_hash(category),
+                    "embedding": (mean / np.linalg.norm(mean)).tolist(),
+                }
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(stored))
+            logger.info(f"Computed {len(stale)} clause centroids for {model_name}")
+
+        ids = [c["id"] for c in CLAUSE_CATEGORIES]
+        matrix = np.asarray([by_model[i]["embedding"] for i in ids], dtype=np.float32)
+        _centroids[model_name] = (ids, matrix)
+        return ids, matrix
+
+
+def tag_embeddings(
+    embeddings: list[list[float]],
+    model_name: str,
+    category_ids: list[str] | None = None,
+) -> list[dict[str, float]]:
+    """Clause tags for each chunk embedding: {clause_<id>: score} for categories above the threshold."""
+    if not embeddings:
+        return []
+    ids, centroids = get_centroids(model_name)
+    if category_ids is not None:
+        keep = [i for i, cid in enumerate(ids) if cid in category_ids]
+        ids, centroids = [ids[i] for i in keep], centroids[keep]
+    # Same scale as search scores: cosine similarity mapped to [0, 1]
+    scores = (1.0 + np.asarray(embeddings, dtype=np.float32) @ centroids.T) / 2.0
+    min_score = get_settings().clause_tag_min_score
+    return [
+        {tag_key(ids[j]): round(float(row[j]), 4) for j in np.flatnonzero(row >= min_score)}
+        for row in scores
+    ]
+
+
+def strip_tags(metadata: dict) -> dict:
+    return {k: v for k, v in metadata.items() if not k.startswith(TAG_PREFIX)}
+
+
+def tagged_search(
+    category_id: str, top_k: int = 10, org_id: str | None = None, where: dict | None = None,
+) -> list[Citation]:
+    """Pre-ranked chunks for a clause category: the top_k tagged chunks, no query embedding.
+
+    A chunk's tag score rises with its similarity to the category centroid, so
+    the centroid's nearest neighbours among tagged chunks are the best-scored
+    ones; the store returns only those, however many chunks carry the tag.
+    """
+    key = tag_key(category_id)
+    ids, centroids = get_centroids(vector_store.get_active_model())
+    condition = {key: {"$gte": get_settings().clause_tag_min_score}}
+    hits = vector_store.search(
+        centroids[ids.index(category_id)].tolist(), top_k=top_k, org_id=org_id,
+        where={"$and": [condition, where]} if where else condition,
+    )
+    hits.sort(key=lambda h: h.metadata[key], reverse=True)
+    return [
+        Citation(
+            document_id=h.metadata.get("document_id", ""),
+            document_name=h.metadata.get("document_name", "Unknown"),
+            page=h.metadata.get("page") or None,
+            paragraph=h.metadata.get("paragraph"),
+            text=h.text,
+            score=h.metadata[key],
+            chunk_id=h.id,
+        )
+        for h in hits
+    ]
+
+
+# ─── Coverage and backfill ───
+
+def _coverage_id(collection: str) -> str:
+    return f"clause_tags:{collection}"
+
+
+async def uncovered_categories(collection: str | None = None) -> list[str]:
+    """Categories whose current queries have not been backfilled into `collection` (default: active).
+
+    Cached for ``COVERAGE_CACHE_SECONDS``: coverage only changes when a backfill
+    finishes, which clears this process's entry (other workers see it on expiry).
+    """
+    collection = collection or vector_store.get_active_collection_name()
+    cached = _coverage_cache.get(collection)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    db = get_db()
+    state = await db.vector_index_state.find_one({"_id": _coverage_id(collection)}) or {}
+    covered = state.get("categories", {})
+    missing = [c["id"] for c in CLAUSE_CATEGORIES if covered.get(c["id"]) != _category_hash(c)]
+    _coverage_cache[collection] = (time.monotonic() + COVERAGE_CACHE_SECONDS, missing)
+    return missing
+
+
+async def mark_covered(collection: str, category_ids: list[str] | None = None) -> None:
+    db = get_db()
+    categories = [c for c in CLAUSE_CATEGORIES if category_ids is None or c["id"] in category_ids]
+    await db.vector_index_state.update_one(
+        {"_id": _coverage_id(collection)},
+        {"$set": {
+            **{f"categories.{c['id']}": _category_hash(c) for c in categories},
+            "updated_at": datetime.now(timezone.utc),
+        }},
+        upsert=True,
+    )
+    _coverage_cache.pop(collection, None)
+
+
+async def backfill(category_ids: list[str] | None = None) -> int:
+    """Score every chunk of the active collection against `category_ids` (default: all) and store the tags."""
+    settings = get_settings()
+    collection = vector_store.get_active_collection_name()
+    model_name = vector_store.get_active_model()
+    store = vector_store.get_store()
+    category_ids = category_ids or [c["id"] for c in CLAUSE_CATEGORIES]
+    keys = [tag_key(cid) for cid in category_ids]
+
+    offset = updated = 0
+    while True:
+        chunks = await asyncio.to_thread(
+            store.get, offset=offset, limit=BACKFILL_PAGE_SIZE, include_embeddings=True,
+        )
+        if not chunks:
+            break
+        offset += len(chunks)
+        tags = await asyncio.to_thread(tag_embeddings, [c.embedding for c in chunks], model_name, category_ids)
+
+        ids, metadatas = [], []
+        for chunk, new in zip(chunks, tags):
+            # Metadata updates merge keys, so tags that no longer apply are zeroed rather than removed
+            stale = {k: 0.0 for k in keys if chunk.metadata.get(k) and k not in new}
+            changes = {**stale, **{k: v for k, v in new.items() if chunk.metadata.get(k) != v}}
+            if changes:
+                ids.append(chunk.id)
+                metadatas.append(changes)
+        if ids:
+            await asyncio.to_thread(store.update_metadata, ids, metadatas)
+            updated += len(ids)
+        # Throttle so live search and ingestion keep priority
+        await asyncio.sleep(settings.reindex_throttle_seconds)
+
+    await mark_covered(collection, category_ids)
+    logger.info(f"Clause tag backfill of {len(category_ids)} categories: {updated}/{offset} chunks updated")
+    return updated
+
+
+async def init_clause_tags() -> None:
+    """Start a background backfill for categories the active collection has not been tagged with."""
+    global _task
+    missing = await uncovered_categories()
+    if missing:
+        logger.info(f"Backfilling clause tags for {len(missing)} categories")
+        _task = asyncio.create_task(backfill(missing))
+
+
+async def stop_backfill() -> None:
+    global _task
+    if _task and not _task.done():
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+    _task = None
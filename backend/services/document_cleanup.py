@@ -0,0 +1,81 @@
+"""Bulk document deletion: vector chunks, uploaded files and MongoDB records in batches."""
+
+import asyncio
+import logging
+import time
+
+from backend.core.database import get_db
+from backend.core.settings import get_settings
+from backend.services import near_duplicates, vector_store
+
+logger = logging.getLogger(__name__)
+
+# Document IDs per Mongo $in query
+MONGO_BATCH_SIZE = 1000
+
+
+def _remove_uploads(document_ids: list[str]) -> int:
+    settings = get_settings()
+    removed = 0
+    for doc_id in document_ids:
+        for ext in settings.allowed_extensions:
+            path = settings.uploads_dir / f"{doc_id}{ext}"
+            if path.exists():
+                path.unlink()
+                removed += 1
+    return removed
+
+
+async def resolve_documents(
+    org_id: str,
+    document_ids: list[str] | None = None,
+    matter: str = "",
+    client: str = "",
+) -> list[dict]:
+    """Documents of an organization selected by ID list and/or matter/client, ID and filename only."""
+    query: dict = {"organization_id": org_id}
+    if document_ids:
+        query["document_id"] = {"$in": document_ids}
+    if matter:
+        query["matter"] = matter
+    if client:
+        query["client"] = client
+    cursor = get_db().documents.find(query, {"_id": 0, "document_id": 1, "filename": 1})
+    return [doc async for doc in cursor]
+
+
+async def delete_documents(org_id: str, document_ids: list[str]) -> dict:
+    """Delete documents and everything derived from them; returns counts and per-stage timing."""
+    db = get_db()
+    timing: dict[str, float] = {}
+    started = time.perf_counter()
+
+    stage = time.perf_counter()
+    chunks = await asyncio.to_thread(vector_store.delete_documents, document_ids, org_id)
+    near_duplicates.get_index().remove(org_id, document_ids)
+    timing["vectors_ms"] = (time.perf_counter() - stage) * 1000
+
+    stage = time.perf_counter()
+    files = await asyncio.to_thread(_remove_uploads, document_ids)
+    timing["files_ms"] = (time.perf_counter() - stage) * 1000
+
+    stage = time.perf_counter()
+    documents = analyses = 0
+    for i in range(0, len(document_ids), MONGO_BATCH_SIZE):
+        batch = {"organization_id": org_id, "document_id": {"$in": document_ids[i:i + MONGO_BATCH_SIZE]}}
+        documents += (await db.documents.delete_many(batch)).deleted_count
+        analyses += (await db.ai_analyses.delete_many(batch)).deleted_count
+    timing["mongo_ms"] = (time.perf_counter() - stage) * 1000
+    timing["total_ms"] = (time.perf_counter() - started) * 1000
+
+    logger.info(
+        f"Deleted {documents} documents for org {org_id}: {chunks} chunks, {files} files, "
+        f"{analyses} cached analyses in {timing['total_ms']:.0f}ms"
+    )
+    return {
+        "documents": documents,
+        "chunks": chunks,
+        "files": files,
+        "analyses": analyses,
+        "timing": {k: round(v, 1) for k, v in timing.items()},
+    }
@@ -1,29 +1,47 @@
 import logging
+from functools import lru_cache
 
 from sentence_transformers import SentenceTransformer
 
 from backend.core.settings import get_settings
+from backend.core.tracing import span
 
 logger = logging.getLogger(__name__)
 
-_model: SentenceTransformer | None = None
+# Search queries whose embeddings are kept; retrieval, ranking and highlighting embed the same text
+QUERY_CACHE_SIZE = 1024
 
+# Loaded models keyed by name — two are resident while a re-embedding migration runs
+_models: dict[str, SentenceTransformer] = {}
 
-def load_model() -> SentenceTransformer:
-    global _model
-    if _model is None:
-        model_name = get_settings().embedding_model_name
+
+def load_model(model_name: str | None = None) -> SentenceTransformer:
+    model_name = model_name or get_settings().embedding_model_name
+    model = _models.get(model_name)
+    if model is None:
         logger.info(f"Loading embedding model: {model_name}")
-        _model = SentenceTransformer(model_name)
+        model = SentenceTransformer(model_name)
+        _models[model_name] = model
         logger.info("Embedding model loaded")
-    return _model
+    return model
 
 
-def embed_texts(texts: list[str]) -> list[list[float]]:
-    model = load_model()
-    embeddings = model.encode(texts, show_progress_bar=False, normalize_embeddings=True)
+def embed_texts(texts: list[str], model_name: str | None = None) -> list[list[float]]:
+    model = load_model(model_name)
+    with span("embed"):
+        embeddings = model.encode(texts, show_progress_bar=False, normalize_embeddings=True)
     return embeddings.tolist()
 
 
-def embed_query(query: str) -> list[float]:
-    return embed_texts([query])[0]
+def embed_query(query: str, model_name: str | None = None) -> list[float]:
+    return embed_texts([query], model_name)[0]
+
+
+@lru_cache(maxsize=QUERY_CACHE_SIZE)
+def _cached_query(model_name: str, query: str) -> tuple[float, ...]:
+    return tuple(embed_query(query, model_name))
+
+
+def query_embedding(query: str, model_name: str | None = None) -> list[float]:
+    """:func:`embed_query` cached per (model, query), so one search embeds its query once."""
+    return list(_cached_query(model_name or get_settings().embedding_model_name, query))
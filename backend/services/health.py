@@ -0,0 +1,169 @@
+"""Component health probes cached with per-component TTLs.
+
+Probes run in a background task, so ``/health/detailed`` reads the last
+result instead of pinging MongoDB, counting Chroma and running an embedding
+inference on every orchestrator probe.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import httpx
+
+from backend.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+ProbeFn = Callable[[], Awaitable[dict]]
+
+# How often the refresh loop wakes up to look for expired probes
+_TICK_SECONDS = 1.0
+_PROBE_TIMEOUT_SECONDS = 10.0
+
+
+@dataclass
+class _Probe:
+    name: str
+    fn: ProbeFn
+    ttl: float
+    optional: bool = False
+    result: dict = field(default_factory=lambda: {"status": "pending"})
+    checked_at: float = 0.0
+
+    @property
+    def expired(self) -> bool:
+        return time.monotonic() - self.checked_at >= self.ttl
+
+
+class HealthMonitor:
+    """Registry of probes whose results are refreshed in the background."""
+
+    def __init__(self):
+        self._probes: dict[str, _Probe] = {}
+        self._task: asyncio.Task | None = None
+
+    def register(self, name: str, fn: ProbeFn, ttl: float, optional: bool = False) -> None:
+        self._probes[name] = _Probe(name=name, fn=fn, ttl=ttl, optional=optional)
+
+    async def _run_probe(self, probe: _Probe) -> None:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(probe.fn(), timeout=_PROBE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            result = {"status": "unavailable" if probe.optional else "error", "detail": "probe timed out"}
+        except Exception as e:
+            result = {"status": "unavailable" if probe.optional else "error", "detail": str(e)}
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        probe.result = result
+        probe.checked_at = time.monotonic()
+
+    async def refresh(self, force: bool = False) -> None:
+        """Re-run every probe whose TTL has expired (or all of them when forced)."""
+        due = [p for p in self._probes.values() if force or p.expired]
+        if due:
+            await asyncio.gather(*(self._run_probe(p) for p in due))
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Health refresh failed: {e}")
+            await asyncio.sleep(_TICK_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        await _close_http_client()
+
+    @property
+    def has_results(self) -> bool:
+        return any(p.checked_at for p in self._probes.values())
+
+    def snapshot(self) -> tuple[bool, dict[str, dict]]:
+        """Return (all required components ok, cached checks with their age)."""
+        now = time.monotonic()
+        checks: dict[str, dict] = {}
+        all_ok = True
+        for probe in self._probes.values():
+            check = dict(probe.result)
+            if probe.checked_at:
+                check["age_seconds"] = round(now - probe.checked_at, 1)
+            checks[probe.name] = check
+            if not probe.optional and check["status"] != "ok":
+                all_ok = False
+        return all_ok, checks
+
+
+# ---------------------------------------------------------------------------
+# Probes
+# ---------------------------------------------------------------------------
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """One pooled client for all Ollama probes instead of a new connection per check."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=5.0)
+    return _http_client
+
+
+async def _close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def probe_mongodb() -> dict:
+    from backend.core.database import get_db
+    await get_db().command("ping")
+    return {"status": "ok"}
+
+
+async def probe_chromadb() -> dict:
+    from backend.services import vector_store
+    # Counts the store directly: the cached totals would not notice it going away
+    count = await asyncio.to_thread(vector_store.get_store().count)
+    return {"status": "ok", "chunks": count}
+
+
+async def probe_embeddings() -> dict:
+    from backend.services import vector_store
+    from backend.services.embeddings import embed_query
+    await asyncio.to_thread(embed_query, "test", vector_store.get_active_model())
+    return {"status": "ok"}
+
+
+async def probe_ollama() -> dict:
+    settings = get_settings()
+    resp = await _get_http_client().get(f"{settings.ollama_base_url}/api/tags")
+    return {"status": "ok" if resp.status_code == 200 else "unavailable"}
+
+
+def _build_monitor() -> HealthMonitor:
+    ttls = get_settings().health_probe_ttl_seconds
+    monitor = HealthMonitor()
+    monitor.register("mongodb", probe_mongodb, ttl=ttls.get("mongodb", 10.0))
+    monitor.register("chromadb", probe_chromadb, ttl=ttls.get("chromadb", 30.0))
+    monitor.register("embeddings", probe_embeddings, ttl=ttls.get("embeddings", 300.0))
+    # Ollama is optional
+    monitor.register("ollama", probe_ollama, ttl=ttls.get("ollama", 30.0), optional=True)
+    return monitor
+
+
+health_monitor = _build_monitor()
@@ -0,0 +1,166 @@
+"""Highlight spans for search results, returned in ``Citation.highlights``.
+
+Two kinds of span are computed once per result on the server, so clients do no
+text scanning:
+
+* ``term``: words that match a query term under the index tokenizer (so
+  ``$2,500,000`` and ``§`` match as they are searched); boolean queries match
+  their positive terms and wildcards. Matchers are compiled once per query.
+* ``sentence``: the sentence of the chunk closest to the query embedding,
+  which retrieval already computed (query embeddings are cached per model and
+  query in ``services/embeddings.py``). Sentence embeddings are cached per
+  (model, sentence), so a sentence is embedded once however many queries
+  surface it. ``highlight_sentences = False`` turns these off.
+
+Spans are character offsets into ``Citation.text``. Routes highlight only the
+citations they return, after merging and other post-processing, so over-fetched
+candidates that get trimmed are never scanned or embedded.
+"""
+
+import fnmatch
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+from backend.core.settings import get_settings
+from backend.models.schemas import Citation, Highlight
+from backend.services import lexical_index, query_language, vector_store
+from backend.services.embeddings import embed_texts, query_embedding
+
+# Sentence candidates: text up to terminal punctuation (or the end of the chunk)
+_SENTENCE_RE = re.compile(r"[^.!?]+(?:[.!?]+|$)")
+# Shorter fragments (headings, list markers) are not worth highlighting as a sentence
+_MIN_SENTENCE_WORDS = 4
+
+
+@dataclass(frozen=True)
+class _Matcher:
+    terms: frozenset[str]
+    wildcard: re.Pattern | None
+
+    def matches(self, terms: list[str]) -> bool:
+        return any(t in self.terms or (self.wildcard is not None and self.wildcard.match(t)) for t in terms)
+
+
+@lru_cache(maxsize=1024)
+def term_matcher(query: str, boolean: bool = False) -> _Matcher:
+    """Compiled term matcher for a query; boolean queries match their positive terms and wildcards."""
+    if not boolean:
+        return _Matcher(frozenset(lexical_index.tokenize(query)), None)
+    terms: set[str] = set()
+    patterns: list[str] = []
+    for part in query_language.positive_terms(query_language.parse(query)):
+        if isinstance(part, query_language.Wildcard):
+            patterns.append(fnmatch.translate(part.pattern))
+        else:
+            terms.add(part.term)
+    return _Matcher(frozenset(terms), re.compile("|".join(patterns)) if patterns else None)
+
+
+def term_spans(text: str, matcher: _Matcher) -> list[Highlight]:
+    return [
+        Highlight(start=start, end=end, kind="term")
+        for terms, start, end in lexical_index.token_spans(text)
+        if matcher.matches(terms)
+    ]
+
+
+def _sentences(text: str) -> list[tuple[int, int]]:
+    spans = []
+    for match in _SENTENCE_RE.finditer(text):
+        sentence = match.group()
+        start = match.start() + len(sentence) - len(sentence.lstrip())
+        end = match.end() - (len(sentence) - len(sentence.rstrip()))
+        if len(text[start:end].split()) >= _MIN_SENTENCE_WORDS:
+            spans.append((start, end))
+    return spans
+
+
+class _SentenceCache:
+    """Bounded LRU of normalized sentence embeddings keyed by (model, sentence)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._vectors: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embeddings(self, model_name: str, sentences: list[str]) -> np.ndarray:
+        """One row per sentence; only sentences not seen before are embedded (in one batch)."""
+        with self._lock:
+            found = {s: self._vectors[(model_name, s)] for s in set(sentences) if (model_name, s) in self._vectors}
+            for sentence in found:
+                self._vectors.move_to_end((model_name, sentence))
+        missing = [s for s in dict.fromkeys(sentences) if s not in found]
+        if missing:
+            vectors = np.asarray(embed_texts(missing, model_name), dtype=np.float32)
+            with self._lock:
+                for sentence, vector in zip(missing, vectors):
+                    found[sentence] = self._vectors[(model_name, sentence)] = vector
+                while len(self._vectors) > self.max_entries:
+                    self._vectors.popitem(last=False)
+        return np.stack([found[s] for s in sentences])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._vectors.clear()
+
+
+_sentence_cache = _SentenceCache(get_settings().highlight_sentence_cache_size)
+
+
+def highlight(
+    citations: list[Citation],
+    query: str,
+    query_embedding: list[float] | None = None,
+    boolean: bool = False,
+) -> list[Citation]:
+    """Citations with term spans, plus the best sentence per citation when a query embedding is given."""
+    if not citations:
+        return citations
+    matcher = term_matcher(query, boolean)
+    spans = [term_spans(c.text, matcher) for c in citations]
+
+    if query_embedding is not None:
+        sentence_spans = [_sentences(c.text) for c in citations]
+        texts = [c.text[start:end] for c, found in zip(citations, sentence_spans) for start, end in found]
+        if texts:
+            scores = _sentence_cache.embeddings(vector_store.get_active_model(), texts) @ np.asarray(
+                query_embedding, dtype=np.float32,
+            )
+            offset = 0
+            for i, found in enumerate(sentence_spans):
+                # A chunk that is a single sentence gains nothing from a sentence highlight
+                if len(found) > 1:
+                    start, end = found[int(np.argmax(scores[offset:offset + len(found)]))]
+                    spans[i].append(Highlight(start=start, end=end, kind="sentence"))
+                offset += len(found)
+
+    return [
+        c.model_copy(update={"highlights": sorted(found, key=lambda h: (h.start, h.end))})
+        for c, found in zip(citations, spans)
+    ]
+
+
+def highlight_results(citations: list[Citation], query: str, mode: str, rank_query: str = "") -> list[Citation]:
+    """Highlights for a search response's citations; blocking (embeds sentences), so run it in a thread.
+
+    Boolean queries get a sentence highlight only when they have a ``rank_query``,
+    and none get one with ``highlight_sentences`` off.
+    """
+    if not citations:
+        return citations
+    boolean = mode == "boolean"
+    sentence_query = rank_query if boolean else query
+    embedding = None
+    # Single-sentence results get no sentence highlight, so they never need the query embedded
+    if (
+        get_settings().highlight_sentences
+        and sentence_query
+        and any(len(_sentences(c.text)) > 1 for c in citations)
+    ):
+        embedding = query_embedding(sentence_query, vector_store.get_active_model())
+    return highlight(citations, query, embedding, boolean)
@@ -0,0 +1,222 @@
+"""Consistency sweep between MongoDB document records and the vector store.
+
+Crashes mid-ingest, failed deletes and manual cleanups leave the two stores
+disagreeing. A sweep streams chunk IDs from the vector store page by page,
+then document records from MongoDB, and compares them per document:
+
+- chunks whose document has no MongoDB record are orphans and are deleted,
+  as are chunks a failed (ERROR) run left behind
+- READY documents whose chunk count differs from ``chunk_count``, and
+  PENDING/PROCESSING documents older than ``index_reconcile_stuck_minutes``,
+  are re-queued through the (idempotent) ingestion pipeline
+
+The vector store is scanned first so a document uploaded mid-sweep is never
+mistaken for an orphan, and orphans are re-checked against MongoDB before
+deletion. Runs on a schedule or on demand through ``POST /api/index/reconcile``;
+``backend.scripts.reconcile_index`` repairs only while no API server is running,
+since the stores it writes are held open by the server.
+
+Every API worker runs the scheduler, but a sweep only starts in the worker
+holding the ``reconciler_lease`` document in ``vector_index_state``. The
+holder renews the lease for one interval at each sweep, and another worker
+takes over once it expires. Scheduled and on-demand sweeps in one process run
+one at a time. Re-queued documents go through the same ingestion
+pipeline as uploads, and its CPU-bound steps run in a worker thread.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from backend.core.database import get_db
+from backend.core.settings import get_settings
+from backend.models.schemas import ProcessingStatus
+from backend.services import vector_store
+
+logger = logging.getLogger(__name__)
+
+ID_PAGE_SIZE = 5000
+LEASE_ID = "reconciler_lease"
+_task: asyncio.Task | None = None
+_sweep = asyncio.Lock()
+# Identifies this process as a lease holder
+_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def document_id_of(chunk_id: str) -> str:
+    return chunk_id.rsplit("_chunk_", 1)[0]
+
+
+async def _vector_chunk_counts(throttle: float) -> tuple[Counter, int]:
+    store = vector_store.get_store()
+    pages = store.iter_ids(page_size=ID_PAGE_SIZE)
+    counts: Counter = Counter()
+    scanned = 0
+    while True:
+        page = await asyncio.to_thread(next, pages, None)
+        if page is None:
+            break
+        counts.update(document_id_of(chunk_id) for chunk_id in page)
+        scanned += len(page)
+        await asyncio.sleep(throttle)
+    return counts, scanned
+
+
+def _is_stuck(doc: dict, cutoff: datetime) -> bool:
+    if doc.get("status") not in (ProcessingStatus.PENDING, ProcessingStatus.PROCESSING):
+        return False
+    since = doc.get("processing_started_at") or doc.get("uploaded_at")
+    if since is None:
+        return True
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return since < cutoff
+
+
+async def _requeue(doc: dict) -> None:
+    from backend.services.ingestion import process_document
+
+    settings = get_settings()
+    file_path = settings.uploads_dir / f"{doc['document_id']}{doc.get('file_type', '')}"
+    if not file_path.exists():
+        logger.warning(f"Cannot re-queue {doc['document_id']}: original upload is missing")
+        await get_db().documents.update_one(
+            {"document_id": doc["document_id"]},
+            {"$set": {"status": ProcessingStatus.ERROR, "error_message": "Index incomplete and upload missing"}},
+        )
+        return
+    await process_document(doc["document_id"], file_path, doc.get("filename", ""), doc.get("organization_id", ""))
+
+
+async def reconcile(dry_run: bool = False, throttle: float | None = None, max_requeue: int | None = None) -> dict:
+    """Run one sweep; returns what was found and repaired."""
+    settings = get_settings()
+    db = get_db()
+    throttle = settings.index_reconcile_throttle_seconds if throttle is None else throttle
+    max_requeue = settings.index_reconcile_max_requeue if max_requeue is None else max_requeue
+    started = time.perf_counter()
+
+    chunk_counts, chunks_scanned = await _vector_chunk_counts(throttle)
+
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=settings.index_reconcile_stuck_minutes)
+    known: set[str] = set()
+    failed: list[str] = []
+    incomplete: list[dict] = []
+    cursor = db.documents.find(
+        {},
+        {"_id": 0, "document_id": 1, "organization_id": 1, "filename": 1, "file_type": 1,
+         "status": 1, "chunk_count": 1, "uploaded_at": 1, "processing_started_at": 1},
+    ).batch_size(ID_PAGE_SIZE)
+    async for doc in cursor:
+        doc_id = doc["document_id"]
+        known.add(doc_id)
+        if doc.get("status") == ProcessingStatus.ERROR and chunk_counts.get(doc_id):
+            failed.append(doc_id)
+        elif doc.get("status") == ProcessingStatus.READY and chunk_counts.get(doc_id, 0) != doc.get("chunk_count", 0):
+            incomplete.append(doc)
+        elif _is_stuck(doc, cutoff):
+            incomplete.append(doc)
+
+    orphans = sorted(set(chunk_counts) - known)
+    if orphans:
+        # Re-check: a record may have been created after its chunks were scanned
+        cursor = db.documents.find({"document_id": {"$in": orphans}}, {"_id": 0, "document_id": 1})
+        orphans = sorted(set(orphans) - {doc["document_id"] async for doc in cursor})
+
+    orphan_chunks = sum(chunk_counts[doc_id] for doc_id in orphans + failed)
+    deleted = requeued = 0
+    if not dry_run:
+        if orphans or failed:
+            deleted = await asyncio.to_thread(vector_store.delete_documents, orphans + failed)
+        for doc in incomplete[:max_requeue]:
+            await _requeue(doc)
+            requeued += 1
+            await asyncio.sleep(throttle)
+
+    report = {
+        "dry_run": dry_run,
+        "documents_checked": len(known),
+        "chunks_scanned": chunks_scanned,
+        "orphan_documents": len(orphans),
+        "failed_documents_with_chunks": len(failed),
+        "orphan_chunks": orphan_chunks,
+        "orphan_chunks_deleted": deleted,
+        "incomplete_documents": [d["document_id"] for d in incomplete],
+        "requeued": requeued,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    if orphans or failed or incomplete:
+        logger.warning(
+            f"Index reconcile: {len(orphans)} orphan and {len(failed)} failed documents ({orphan_chunks} chunks), "
+            f"{len(incomplete)} incomplete, {requeued} re-queued{' (dry run)' if dry_run else ''}"
+        )
+    else:
+        logger.info(f"Index reconcile: {len(known)} documents consistent ({chunks_scanned} chunks)")
+    return report
+
+
+async def acquire_lease(ttl_seconds: float, owner: str = _owner) -> bool:
+    """Take or renew the reconciler lease; False while another process holds an unexpired one."""
+    now = datetime.now(timezone.utc)
+    try:
+        lease = await get_db().vector_index_state.find_one_and_update(
+            {"_id": LEASE_ID, "$or": [{"owner": owner}, {"expires_at": {"$lt": now}}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=ttl_seconds)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+    except DuplicateKeyError:
+        # The lease exists and is held by someone else: the upsert's insert collided with it
+        return False
+    return lease is not None and lease.get("owner") == owner
+
+
+async def sweep_now(dry_run: bool = False) -> dict | None:
+    """Run a sweep in this process; None if one is already running or another worker holds the lease."""
+    settings = get_settings()
+    if not dry_run and not await acquire_lease(settings.index_reconcile_interval_seconds or 3600.0):
+        return None
+    if _sweep.locked():
+        return None
+    async with _sweep:
+        return await reconcile(dry_run=dry_run)
+
+
+async def _loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # Held for a whole interval, so workers on other schedules skip this round too
+            if await acquire_lease(interval):
+                async with _sweep:
+                    await reconcile()
+            else:
+                logger.debug("Index reconcile skipped: another worker holds the lease")
+        except Exception as e:
+            logger.error(f"Index reconcile failed: {e}")
+
+
+def start_scheduler() -> None:
+    global _task
+    interval = get_settings().index_reconcile_interval_seconds
+    if interval > 0 and (_task is None or _task.done()):
+        _task = asyncio.create_task(_loop(interval))
+
+
+async def stop_scheduler() -> None:
+    global _task
+    if _task and not _task.done():
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+    _task = None
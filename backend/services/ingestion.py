@@ -0,0 +1,117 @@
+"""Document ingestion pipeline: extract text, chunk, index, and record the result in MongoDB."""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pymongo import ReturnDocument
+
+from backend.core.database import get_db
+from backend.models.schemas import ProcessingStatus
+from backend.services import autocomplete, near_duplicates, search_filters, vector_store
+from backend.services.activity import log_activity
+from backend.services.chunker import chunk_pages
+from backend.services.document_processor import extract_text
+from backend.services.key_terms import classify_document, extract_key_terms
+
+logger = logging.getLogger(__name__)
+
+MAX_DEFINED_TERMS = 200
+
+
+@dataclass
+class _Indexed:
+    page_count: int
+    full_text: str
+    document_type: str
+    defined_terms: list[str]
+    chunk_count: int
+    minhash: list[int] | None
+
+
+def _extract_and_index(doc_id: str, file_path: Path, filename: str, org_id: str, generation: int, doc: dict) -> _Indexed:
+    pages = extract_text(file_path)
+    full_text = "\n".join(p.text for p in pages)
+    document_type = classify_document(full_text, filename)
+    # Suggested as search completions alongside the organization's past queries
+    defined_terms = extract_key_terms(full_text).defined_terms[:MAX_DEFINED_TERMS]
+
+    chunks = chunk_pages(pages, document_id=doc_id, document_name=filename)
+    # Filterable attributes travel with every chunk so filters run inside the vector query
+    attributes = search_filters.chunk_attributes({**doc, "document_type": document_type})
+    count = vector_store.add_chunks(chunks, org_id, generation, attributes=attributes)
+    return _Indexed(
+        page_count=len(pages),
+        full_text=full_text,
+        document_type=document_type,
+        defined_terms=defined_terms,
+        chunk_count=count,
+        minhash=near_duplicates.signature([c.text for c in chunks]),
+    )
+
+
+async def process_document(doc_id: str, file_path: Path, filename: str, org_id: str):
+    """Extract, chunk and index a document; safe to re-run for the same document."""
+    db = get_db()
+
+    try:
+        # Each run gets a new index generation; chunks from older runs are garbage-collected after the write
+        doc = await db.documents.find_one_and_update(
+            {"document_id": doc_id},
+            {
+                "$set": {"status": ProcessingStatus.PROCESSING, "processing_started_at": datetime.now(timezone.utc)},
+                "$inc": {"index_generation": 1},
+            },
+            projection={"index_generation": 1, "matter": 1, "client": 1, "tags": 1, "uploaded_at": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        generation = doc["index_generation"] if doc else 1
+
+        # Extraction, embedding and hashing are CPU-bound; a worker thread keeps the event loop serving requests
+        indexed = await asyncio.to_thread(_extract_and_index, doc_id, file_path, filename, org_id, generation, doc or {})
+        page_count, full_text = indexed.page_count, indexed.full_text
+        document_type, defined_terms, count = indexed.document_type, indexed.defined_terms, indexed.chunk_count
+
+        duplicates: dict = {}
+        minhash = indexed.minhash
+        if minhash is not None:
+            cluster, similarity = await near_duplicates.get_index().add(org_id, doc_id, minhash)
+            duplicates = {"minhash": minhash, "duplicate_cluster": cluster}
+            if cluster != doc_id:
+                logger.info(f"Document {filename} is a near-duplicate (similarity {similarity:.2f}) in cluster {cluster}")
+
+        await db.documents.update_one(
+            {"document_id": doc_id},
+            {"$set": {
+                "page_count": page_count,
+                "chunk_count": count,
+                "document_type": document_type,
+                "defined_terms": defined_terms,
+                **duplicates,
+                "status": ProcessingStatus.READY,
+                "processed_at": datetime.now(timezone.utc),
+            }},
+        )
+        autocomplete.get_autocomplete().add_terms(org_id, defined_terms)
+        await log_activity(org_id, "", "document_processed", f"{filename} — {page_count} pages, {count} chunks")
+        logger.info(f"Document {filename} processed: {page_count} pages, {count} chunks")
+
+        # Auto-summarize (non-blocking — failure doesn't affect processing)
+        try:
+            from backend.services import ai_features
+            from backend.services.llm.manager import get_llm_manager
+            llm = get_llm_manager()
+            summary = await ai_features.generate_summary(full_text, llm, org_id)
+            await ai_features.save_analysis(doc_id, "summary", org_id, summary)
+            logger.info(f"Auto-summary generated for {filename}")
+        except Exception as summary_err:
+            logger.warning(f"Auto-summary failed for {filename} (non-blocking): {summary_err}")
+
+    except Exception as e:
+        logger.error(f"Error processing {filename}: {e}")
+        await db.documents.update_one(
+            {"document_id": doc_id},
+            {"$set": {"status": ProcessingStatus.ERROR, "error_message": str(e)}},
+        )
@@ -0,0 +1,117 @@
+"""Build the BM25 term index from chunks already in the vector store.
+
+Chunks ingested before hybrid search existed have no term postings, and
+postings written before a change of ``POSTINGS_FORMAT`` (e.g. before word
+positions were indexed) are skipped on load, so hybrid search would rank those
+chunks on embeddings alone and boolean search would never match them.
+:func:`init_lexical_backfill` indexes them in the background at startup until
+a run has completed for the current format, recorded as the ``lexical_index``
+document in ``vector_index_state``; ``backend.scripts.backfill_lexical_index``
+runs it by hand. Chunks the term
+index already holds are skipped, so a re-run (or one interrupted by a restart)
+only indexes what is missing. While it runs, :func:`is_building` lets hybrid
+responses say that lexical matching is incomplete, and boolean searches are
+refused rather than answered with missing matches.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from backend.core.database import get_db
+from backend.core.settings import get_settings
+from backend.services import lexical_index, search_cache, tenant_backfill, vector_store
+from backend.services.vectordb.base import TENANT_KEY
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+STATE_ID = "lexical_index"
+
+_task: asyncio.Task | None = None
+
+
+async def is_backfilled() -> bool:
+    state = await get_db().vector_index_state.find_one({"_id": STATE_ID})
+    return bool(state and state.get("completed_at") and state.get("format") == lexical_index.POSTINGS_FORMAT)
+
+
+def is_building() -> bool:
+    """True while the startup backfill is still indexing existing chunks."""
+    return _task is not None and not _task.done()
+
+
+async def backfill(page_size: int = PAGE_SIZE) -> int:
+    """Index every chunk of the active collection the term index lacks; returns chunks indexed."""
+    # Chunks are partitioned by tenant, so untagged chunks must get their organization first
+    await tenant_backfill.wait()
+    store = vector_store.get_store()
+    index = lexical_index.get_index()
+
+    tenants: set[str] = set()
+    offset = indexed = 0
+    while True:
+        page = await asyncio.to_thread(store.get, offset=offset, limit=page_size)
+        if not page:
+            break
+        offset += len(page)
+
+        by_tenant: dict[str, list] = defaultdict(list)
+        for chunk in page:
+            by_tenant[chunk.metadata.get(TENANT_KEY, "")].append(chunk)
+        for tenant, chunks in by_tenant.items():
+            present = index.indexed_ids(tenant or None, [c.id for c in chunks])
+            chunks = [c for c in chunks if c.id not in present]
+            if not chunks:
+                continue
+            await asyncio.to_thread(
+                index.add,
+                tenant or None,
+                [c.id for c in chunks],
+                [c.metadata.get("document_id", "") for c in chunks],
+                [c.text for c in chunks],
+            )
+            indexed += len(chunks)
+            tenants.add(tenant)
+        # Throttle so live search and ingestion keep priority
+        await asyncio.sleep(get_settings().reindex_throttle_seconds)
+
+    # Hybrid results cached while the index was incomplete become unreachable
+    for org_id in tenants - {""}:
+        search_cache.bump_generation(org_id)
+    await get_db().vector_index_state.update_one(
+        {"_id": STATE_ID},
+        {"$set": {
+            "completed_at": datetime.now(timezone.utc), "format": lexical_index.POSTINGS_FORMAT, "indexed": indexed,
+        }},
+        upsert=True,
+    )
+    logger.info(f"Lexical index backfill: indexed {indexed} chunks ({offset} scanned)")
+    return indexed
+
+
+async def _run() -> None:
+    try:
+        await backfill()
+    except Exception as e:
+        logger.error(f"Lexical index backfill failed: {e}")
+
+
+async def init_lexical_backfill() -> None:
+    """Start a background lexical backfill unless one has already completed."""
+    global _task
+    if not await is_backfilled():
+        logger.info("Indexing existing chunks for hybrid search")
+        _task = asyncio.create_task(_run())
+
+
+async def stop_backfill() -> None:
+    global _task
+    if _task and not _task.done():
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+    _task = None
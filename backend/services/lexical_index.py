@@ -0,0 +1,562 @@
+"""Per-tenant positional inverted index with BM25 scoring and boolean queries.
+
+Dense embeddings blur exact identifiers ("Section 14.2(b)", "$2,500,000",
+a defined term or party name); a term index recovers them. Each tenant gets a
+directory under ``lexical_dir`` holding ``postings.jsonl``, an append-only log
+of per-chunk term positions and per-document deletions that is replayed on
+load. In memory, every term maps to three compact ``array`` columns (row, term
+frequency, and the concatenated word positions); queries convert only the
+postings they touch to NumPy.
+
+Boolean queries (see :mod:`backend.services.query_language`) run as
+posting-list intersections; phrases and ``NEAR/n`` are then verified against
+word positions of the surviving rows only.
+
+Writes come from the vector store facade, so ingestion, re-processing, bulk
+deletion and the reconciler keep both indexes in step.
+"""
+
+from __future__ import annotations
+
+import bisect
+import fnmatch
+import json
+import logging
+import math
+import os
+import re
+import threading
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from backend.core.settings import get_settings
+from backend.services import query_language
+
+logger = logging.getLogger(__name__)
+
+# BM25 term-frequency saturation and document-length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Bumped when the postings layout changes; the startup backfill re-runs for a new format
+POSTINGS_FORMAT = 2  # 2: word positions per term
+
+_SHARED_PARTITION = "_shared"
+# Rewrite the log once dead rows outnumber live ones (and there are at least this many)
+_COMPACT_MIN_DEAD = 10000
+# Terms whose postings are kept as NumPy arrays between queries
+_TERM_CACHE_SIZE = 4096
+# Position keys are row << _ROW_SHIFT | word position
+_ROW_SHIFT = 32
+
+# "§", numbers with thousands separators / section dots / a leading "$", then words
+_TOKEN_RE = re.compile(r"§|\$?\d[\d,]*(?:\.\d+)*|[^\W\d_]\w*")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or s such that the their "
+    "there these this those to was were which will with".split()
+)
+
+
+def _terms_of(token: str) -> list[str]:
+    """Index terms for one lower-cased token: none for stop words, two for "$" amounts."""
+    if token[0] == "$" or token[0].isdigit():
+        token = token.replace(",", "")
+        if token.startswith("$"):
+            return [token, token[1:]] if len(token) > 1 else []
+        return [token]
+    return [] if token in _STOPWORDS else [token]
+
+
+def tokenize_positions(text: str) -> list[tuple[str, int]]:
+    """(term, word position) pairs; stop words are dropped but keep their position.
+
+    Amounts are indexed both with and without their "$", at the same position.
+    """
+    return [
+        (term, position)
+        for position, match in enumerate(_TOKEN_RE.finditer(text.lower()))
+        for term in _terms_of(match.group())
+    ]
+
+
+def token_spans(text: str) -> list[tuple[list[str], int, int]]:
+    """(index terms, start, end) per word of ``text``, with character offsets into the original text."""
+    # The token pattern is case-blind, so matching the original keeps offsets exact
+    spans = []
+    for match in _TOKEN_RE.finditer(text):
+        terms = _terms_of(match.group().lower())
+        if terms:
+            spans.append((terms, match.start(), match.end()))
+    return spans
+
+
+def tokenize(text: str) -> list[str]:
+    return [term for term, _ in tokenize_positions(text)]
+
+
+def count_positions(text: str) -> int:
+    """Word positions ``text`` occupies, stop words included."""
+    return sum(1 for _ in _TOKEN_RE.finditer(text.lower()))
+
+
+def _positions_of(text: str) -> dict[str, list[int]]:
+    positions: dict[str, list[int]] = {}
+    for term, position in tokenize_positions(text):
+        positions.setdefault(term, []).append(position)
+    return positions
+
+
+def _partition_dirname(tenant: str | None) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", tenant) if tenant else _SHARED_PARTITION
+
+
+def _sorted_unique(values: np.ndarray) -> np.ndarray:
+    if len(values) < 2:
+        return values
+    return values[np.concatenate(([True], values[1:] != values[:-1]))]
+
+
+def _member(values: np.ndarray, sorted_set: np.ndarray) -> np.ndarray:
+    """Mask of ``values`` present in ``sorted_set``, by binary search."""
+    if not len(sorted_set):
+        return np.zeros(len(values), dtype=bool)
+    return sorted_set[np.minimum(np.searchsorted(sorted_set, values), len(sorted_set) - 1)] == values
+
+
+def _sorted_intersect(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if len(a) > len(b):
+        a, b = b, a
+    return a[_member(a, b)]
+
+
+class _Match:
+    """Rows matching a query node and, for positional nodes, the matched word spans.
+
+    A span endpoint is a key ``row << 32 | word position``, so spans of all rows
+    sit in one sorted array and phrase/proximity checks run as array operations.
+    """
+
+    def __init__(self, rows: np.ndarray, starts: np.ndarray | None = None, ends: np.ndarray | None = None):
+        self.rows = rows
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def empty(cls) -> _Match:
+        none = np.zeros(0, dtype=np.int64)
+        return cls(none, none, none)
+
+    @classmethod
+    def from_spans(cls, starts: np.ndarray, ends: np.ndarray) -> _Match:
+        order = np.lexsort((ends, starts))
+        starts, ends = starts[order], ends[order]
+        return cls(_sorted_unique(starts >> _ROW_SHIFT), starts, ends)
+
+    @classmethod
+    def union(cls, matches: list[_Match]) -> _Match:
+        if not matches:
+            return cls.empty()
+        if any(m.starts is None for m in matches):
+            return cls(_sorted_unique(np.sort(np.concatenate([m.rows for m in matches]))))
+        return cls.from_spans(np.concatenate([m.starts for m in matches]), np.concatenate([m.ends for m in matches]))
+
+    def restrict(self, rows: np.ndarray) -> _Match:
+        keep = _member(self.starts >> _ROW_SHIFT, rows)
+        return _Match(rows, self.starts[keep], self.ends[keep])
+
+
+class _TenantIndex:
+    """One tenant's postings, chunk IDs and lengths."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self) -> None:
+        self.ids: list[str] = []
+        self.documents: list[str] = []
+        self.lengths = array("I")
+        self.alive = bytearray()
+        self.row_of: dict[str, int] = {}
+        self.rows_of_document: dict[str, list[int]] = {}
+        # term → (rows, term frequencies, positions of every row concatenated)
+        self.postings: dict[str, tuple[array, array, array]] = {}
+        self.live_length = 0
+        # NumPy views rebuilt on demand after writes: lengths/alive, per-term postings, sorted vocabulary
+        self._columns: tuple[np.ndarray, np.ndarray] | None = None
+        self._term_arrays: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._vocabulary: list[str] | None = None
+
+    @property
+    def _log_file(self) -> Path:
+        return self.path / "postings.jsonl"
+
+    @property
+    def live_count(self) -> int:
+        return len(self.row_of)
+
+    # ─── Persistence ───
+
+    def _load(self) -> None:
+        if not self._log_file.exists():
+            return
+        unpositioned = 0
+        with self._log_file.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Torn final line from a crash mid-append
+                if record["op"] == "add":
+                    if "pos" not in record:
+                        unpositioned += 1  # Written before positions were indexed
+                        continue
+                    self._add_row(record["id"], record["doc"], record["pos"])
+                elif record["op"] == "del":
+                    self._delete_document(record["doc"])
+        if unpositioned:
+            logger.warning(
+                f"Lexical index {self.path.name}: skipped {unpositioned} chunks without positions; "
+                f"the startup backfill re-indexes them"
+            )
+
+    def _append_log(self, records: list[dict]) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        with self._log_file.open("a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+
+    def _compact(self) -> None:
+        """Rewrite the log with live rows only and renumber them."""
+        positions: dict[int, dict[str, list[int]]] = {row: {} for row in self.row_of.values()}
+        for term, (rows, tfs, flat) in self.postings.items():
+            start = 0
+            for row, tf in zip(rows, tfs):
+                if row in positions:
+                    positions[row][term] = flat[start:start + tf].tolist()
+                start += tf
+        records = [
+            {"op": "add", "id": self.ids[row], "doc": self.documents[row], "pos": positions[row]}
+            for row in sorted(positions)
+        ]
+        tmp = self._log_file.with_suffix(".tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+        os.replace(tmp, self._log_file)
+        self._reset()
+        self._load()
+        logger.info(f"Compacted lexical index {self.path.name}: {self.live_count} chunks")
+
+    # ─── Mutations ───
+
+    def _add_row(self, chunk_id: str, document_id: str, positions: dict[str, list[int]]) -> None:
+        old = self.row_of.get(chunk_id)
+        if old is not None:
+            self._kill(old)
+        row = len(self.ids)
+        self.ids.append(chunk_id)
+        self.documents.append(document_id)
+        length = sum(len(p) for p in positions.values())
+        self.lengths.append(length)
+        self.alive.append(1)
+        self.row_of[chunk_id] = row
+        self.rows_of_document.setdefault(document_id, []).append(row)
+        self.live_length += length
+        for term, term_positions in positions.items():
+            postings = self.postings.get(term)
+            if postings is None:
+                postings = self.postings[term] = (array("I"), array("I"), array("I"))
+                self._vocabulary = None
+            postings[0].append(row)
+            postings[1].append(len(term_positions))
+            postings[2].extend(term_positions)
+            self._term_arrays.pop(term, None)
+
+    def _kill(self, row: int) -> None:
+        if self.alive[row]:
+            self.alive[row] = 0
+            self.live_length -= self.lengths[row]
+            del self.row_of[self.ids[row]]
+
+    def _delete_document(self, document_id: str) -> int:
+        rows = self.rows_of_document.pop(document_id, [])
+        live = [row for row in rows if self.alive[row]]
+        for row in live:
+            self._kill(row)
+        return len(live)
+
+    def add(self, chunk_ids: list[str], document_ids: list[str], texts: list[str]) -> None:
+        records = [
+            {"op": "add", "id": chunk_id, "doc": doc_id, "pos": _positions_of(text)}
+            for chunk_id, doc_id, text in zip(chunk_ids, document_ids, texts)
+        ]
+        with self.lock:
+            self._append_log(records)
+            for record in records:
+                self._add_row(record["id"], record["doc"], record["pos"])
+            self._columns = None
+
+    def delete_documents(self, document_ids: list[str]) -> int:
+        with self.lock:
+            present = [doc_id for doc_id in document_ids if doc_id in self.rows_of_document]
+            if not present:
+                return 0
+            self._append_log([{"op": "del", "doc": doc_id} for doc_id in present])
+            removed = sum(self._delete_document(doc_id) for doc_id in present)
+            self._columns = None
+            dead = len(self.ids) - self.live_count
+            if dead >= _COMPACT_MIN_DEAD and dead > self.live_count:
+                self._compact()
+            return removed
+
+    # ─── Search ───
+
+    def _alive_and_lengths(self) -> tuple[np.ndarray, np.ndarray]:
+        if self._columns is None:
+            self._columns = (
+                np.frombuffer(bytes(self.alive), dtype=bool),
+                np.array(self.lengths, dtype=np.float32),
+            )
+        return self._columns
+
+    def _arrays(self, term: str) -> tuple[np.ndarray, np.ndarray, np.ndarray] | None:
+        """(rows, term frequencies, sorted position keys) for a term; see :class:`_Match`."""
+        arrays = self._term_arrays.get(term)
+        if arrays is None:
+            postings = self.postings.get(term)
+            if postings is None:
+                return None
+            if len(self._term_arrays) >= _TERM_CACHE_SIZE:
+                self._term_arrays.clear()
+            rows = np.array(postings[0], dtype=np.int64)
+            tfs = np.array(postings[1], dtype=np.int64)
+            keys = (np.repeat(rows, tfs) << _ROW_SHIFT) | np.array(postings[2], dtype=np.int64)
+            arrays = self._term_arrays[term] = (rows, tfs, keys)
+        return arrays
+
+    def _bm25(self, terms: set[str]) -> np.ndarray:
+        n = self.live_count
+        if not self.live_length:
+            # Every live chunk tokenized to nothing (stopwords, punctuation): no term can match
+            return np.zeros(len(self.ids), dtype=np.float32)
+        alive, lengths = self._alive_and_lengths()
+        norm = BM25_K1 / (self.live_length / n)
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in terms:
+            arrays = self._arrays(term)
+            if arrays is None:
+                continue
+            rows = arrays[0]
+            live = alive[rows]
+            rows = rows[live]
+            if not len(rows):
+                continue
+            tfs = arrays[1][live].astype(np.float32)
+            df = len(rows)
+            idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            denom = tfs + BM25_K1 * (1.0 - BM25_B) + BM25_B * norm * lengths[rows]
+            scores[rows] += idf * tfs * (BM25_K1 + 1.0) / denom
+        return scores
+
+    def _top(self, rows: np.ndarray, scores: np.ndarray, top_k: int) -> list[tuple[str, float]]:
+        if len(rows) > top_k:
+            rows = rows[np.argpartition(-scores[rows], top_k - 1)[:top_k]]
+        rows = rows[np.argsort(-scores[rows], kind="stable")]
+        return [(self.ids[row], float(scores[row])) for row in rows]
+
+    def _document_rows(self, document_ids: set[str]) -> np.ndarray:
+        """Sorted rows of the given documents (live or not; callers already check liveness)."""
+        rows = [row for doc_id in document_ids for row in self.rows_of_document.get(doc_id, ())]
+        return np.sort(np.array(rows, dtype=np.int64))
+
+    def search(self, terms: list[str], top_k: int, document_ids: set[str] | None = None) -> list[tuple[str, float]]:
+        with self.lock:
+            if not self.live_count or not terms or top_k <= 0:
+                return []
+            scores = self._bm25(set(terms))
+            rows = np.flatnonzero(scores)
+            if document_ids is not None:
+                rows = _sorted_intersect(rows, self._document_rows(document_ids))
+            return self._top(rows, scores, top_k)
+
+    def _expand(self, pattern: str) -> list[str]:
+        """Indexed terms matching a wildcard, most frequent first."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        prefix = re.split(r"[*?]", pattern, maxsplit=1)[0]
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff") if prefix else len(self._vocabulary)
+        terms = [t for t in self._vocabulary[start:end] if fnmatch.fnmatchcase(t, pattern)]
+        terms.sort(key=lambda t: len(self.postings[t][0]), reverse=True)
+        return terms[:query_language.MAX_WILDCARD_TERMS]
+
+    def _term_match(self, term: str) -> _Match:
+        arrays = self._arrays(term)
+        if arrays is None:
+            return _Match.empty()
+        alive, _ = self._alive_and_lengths()
+        keys = arrays[2][alive[arrays[2] >> _ROW_SHIFT]]
+        return _Match(arrays[0][alive[arrays[0]]], keys, keys)
+
+    def _match(self, node: query_language.Node) -> _Match:
+        if isinstance(node, query_language.Term):
+            return self._term_match(node.term)
+        if isinstance(node, query_language.Wildcard):
+            return _Match.union([self._term_match(term) for term in self._expand(node.pattern)])
+        if isinstance(node, query_language.Or):
+            return _Match.union([self._match(child) for child in node.children])
+        if isinstance(node, query_language.And):
+            alive, _ = self._alive_and_lengths()
+            rows = np.flatnonzero(alive)
+            # Intersect the shortest posting lists first
+            for match in sorted((self._match(child) for child in node.include), key=lambda m: len(m.rows)):
+                rows = _sorted_intersect(rows, match.rows)
+                if not len(rows):
+                    break
+            for child in node.exclude:
+                if not len(rows):
+                    break
+                rows = rows[~_member(rows, self._match(child).rows)]
+            return _Match(rows)
+        if isinstance(node, query_language.Phrase):
+            return self._phrase([(self._match(part), offset) for part, offset in node.parts])
+        if isinstance(node, query_language.Near):
+            return self._near(self._match(node.left), self._match(node.right), node.distance)
+        raise TypeError(f"Unknown query node: {node!r}")
+
+    @staticmethod
+    def _phrase(parts: list[tuple[_Match, int]]) -> _Match:
+        # Parts are single words, so a phrase start is a key present in every (part key - offset) list
+        starts = None
+        for match, offset in sorted(parts, key=lambda p: len(p[0].starts)):
+            shifted = _sorted_unique(match.starts - offset)
+            starts = shifted if starts is None else _sorted_intersect(starts, shifted)
+            if not len(starts):
+                return _Match.empty()
+        return _Match.from_spans(starts, starts + max(offset for _, offset in parts))
+
+    @staticmethod
+    def _near(left: _Match, right: _Match, distance: int) -> _Match:
+        if left.starts is None or right.starts is None:
+            raise query_language.QuerySyntaxError("NEAR applies to terms, phrases and OR groups only")
+        rows = _sorted_intersect(left.rows, right.rows)
+        if not len(rows):
+            return _Match.empty()
+        left, right = left.restrict(rows), right.restrict(rows)
+        # Candidate right spans start within reach of each left span; keys share the row in their high bits
+        reach = distance + 1 + int((right.ends - right.starts).max())
+        lo = np.searchsorted(right.starts, left.starts - reach, side="left")
+        hi = np.searchsorted(right.starts, left.ends + distance + 1, side="right")
+        counts = hi - lo
+        li = np.repeat(np.arange(len(left.starts)), counts)
+        ri = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(lo, counts)
+        ls, le, rs, re_ = left.starts[li], left.ends[li], right.starts[ri], right.ends[ri]
+        # Words strictly between the two spans, in either order; overlapping spans count as adjacent
+        near = np.maximum(rs - le, ls - re_) - 1 <= distance
+        return _Match.from_spans(np.minimum(ls, rs)[near], np.maximum(le, re_)[near])
+
+    def boolean_search(
+        self, node: query_language.Node, top_k: int, document_ids: set[str] | None = None,
+    ) -> tuple[list[tuple[str, float]], int]:
+        """Matching chunks ranked by BM25 over the query's positive terms, and the total match count."""
+        with self.lock:
+            if not self.live_count or top_k <= 0:
+                return [], 0
+            rows = self._match(node).rows
+            if document_ids is not None:
+                rows = _sorted_intersect(rows, self._document_rows(document_ids))
+            terms: set[str] = set()
+            for part in query_language.positive_terms(node):
+                if isinstance(part, query_language.Wildcard):
+                    terms.update(self._expand(part.pattern))
+                else:
+                    terms.add(part.term)
+            return self._top(rows, self._bm25(terms), top_k), len(rows)
+
+
+class LexicalIndex:
+    """Tenant partitions of the term index, opened lazily."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self._tenants: dict[str, _TenantIndex] = {}
+        self._lock = threading.Lock()
+
+    def _tenant(self, tenant: str | None) -> _TenantIndex:
+        name = _partition_dirname(tenant)
+        index = self._tenants.get(name)
+        if index is None:
+            with self._lock:
+                index = self._tenants.get(name)
+                if index is None:
+                    index = self._tenants[name] = _TenantIndex(self.root / name)
+        return index
+
+    def _all_tenants(self) -> list[_TenantIndex]:
+        if self.root.exists():
+            for path in self.root.iterdir():
+                if path.is_dir():
+                    self._tenant(path.name if path.name != _SHARED_PARTITION else None)
+        return list(self._tenants.values())
+
+    def add(self, tenant: str | None, chunk_ids: list[str], document_ids: list[str], texts: list[str]) -> None:
+        """Index chunks; an existing chunk ID is replaced."""
+        if chunk_ids:
+            self._tenant(tenant).add(chunk_ids, document_ids, texts)
+
+    def indexed_ids(self, tenant: str | None, chunk_ids: list[str]) -> set[str]:
+        """The given chunk IDs that the tenant's index already holds."""
+        index = self._tenant(tenant)
+        with index.lock:
+            return {chunk_id for chunk_id in chunk_ids if chunk_id in index.row_of}
+
+    def delete_documents(self, document_ids: list[str], tenant: str | None = None) -> int:
+        """Drop every chunk of the given documents; tenant None searches all partitions."""
+        targets = [self._tenant(tenant)] if tenant else self._all_tenants()
+        return sum(index.delete_documents(document_ids) for index in targets)
+
+    def search(
+        self, query: str, top_k: int = 10, tenant: str | None = None, document_ids: set[str] | None = None,
+    ) -> list[tuple[str, float]]:
+        """(chunk ID, BM25 score) pairs, best first; ``document_ids`` restricts matches to those documents."""
+        return self._tenant(tenant).search(tokenize(query), top_k, document_ids)
+
+    def boolean_search(
+        self, query: str, top_k: int = 10, tenant: str | None = None, document_ids: set[str] | None = None,
+    ) -> tuple[list[tuple[str, float]], int]:
+        """Chunks matching a boolean/phrase/proximity query (best BM25 first) and the match count.
+
+        Raises :class:`QuerySyntaxError` for malformed queries.
+        """
+        return self._tenant(tenant).boolean_search(query_language.parse(query), top_k, document_ids)
+
+    def count(self, tenant: str | None = None) -> int:
+        return self._tenant(tenant).live_count
+
+
+_index: LexicalIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> LexicalIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LexicalIndex(get_settings().lexical_dir)
+    return _index
+
+
+def search(
+    query: str, top_k: int = 10, org_id: str | None = None, document_ids: set[str] | None = None,
+) -> list[tuple[str, float]]:
+    return get_index().search(query, top_k, org_id or None, document_ids)
+
+
+def boolean_search(
+    query: str, top_k: int = 10, org_id: str | None = None, document_ids: set[str] | None = None,
+) -> tuple[list[tuple[str, float]], int]:
+    return get_index().boolean_search(query, top_k, org_id or None, document_ids)
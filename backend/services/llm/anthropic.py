@@ -1,6 +1,7 @@
 """Anthropic Claude LLM provider."""
 
 import logging
+from collections.abc import AsyncIterator
 
 from backend.services.llm.base import BaseLLMProvider
 
@@ -14,13 +15,15 @@ class AnthropicProvider(BaseLLMProvider):
         self.api_key = api_key
         self.model = model
 
-    async def generate(self, prompt: str, system: str | None = None) -> str:
+    def _get_client(self):
         try:
             import anthropic
         except ImportError:
             raise ConnectionError("anthropic package not installed. Run: pip install anthropic")
+        return anthropic.AsyncAnthropic(api_key=self.api_key)
 
-        client = anthropic.AsyncAnthropic(api_key=self.api_key)
+    async def generate(self, prompt: str, system: str | None = None) -> str:
+        client = self._get_client()
         messages = [{"role": "user", "content": prompt}]
 
         response = await client.messages.create(
@@ -32,6 +35,17 @@ class AnthropicProvider(BaseLLMProvider):
 
         return response.content[0].text
 
+    async def generate_stream(self, prompt: str, system: str | None = None) -> AsyncIterator[str]:
+        client = self._get_client()
+        async with client.messages.stream(
+            model=self.model,
+            max_tokens=4096,
+            system=system or "",
+            messages=[{"role": "user", "content": prompt}],
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
     async def health_check(self) -> bool:
         if not self.api_key:
             return False
@@ -1,6 +1,7 @@
 """Abstract base class for LLM providers."""
 
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 
 
 class BaseLLMProvider(ABC):
@@ -13,6 +14,14 @@ class BaseLLMProvider(ABC):
         """Generate a completion for the given prompt."""
         ...
 
+    async def generate_stream(self, prompt: str, system: str | None = None) -> AsyncIterator[str]:
+        """Yield the completion in pieces as the model produces them.
+
+        Providers without a streaming API inherit this, which yields the whole
+        completion once it is ready.
+        """
+        yield await self.generate(prompt, system)
+
     @abstractmethod
     async def health_check(self) -> bool:
         """Return True if the provider is reachable and operational."""
@@ -1,11 +1,13 @@
 """LLM Manager: loads org config, tries fallback chain."""
 
 import logging
+from collections.abc import AsyncIterator, Iterator
 from functools import lru_cache
 
 from backend.core.database import get_db
 from backend.core.encryption import decrypt
 from backend.core.settings import get_settings
+from backend.core.tracing import span
 from backend.services.llm.anthropic import AnthropicProvider
 from backend.services.llm.base import BaseLLMProvider
 from backend.services.llm.ollama import OllamaProvider
@@ -58,16 +60,9 @@ class LLMManager:
         except Exception:
             return None
 
-    async def generate(self, prompt: str, system: str | None = None, org_id: str = "") -> str:
-        """Try the fallback chain until one provider succeeds."""
-        config = await self._get_org_config(org_id) if org_id else None
-
-        if config:
-            chain = config.get("fallback_chain", ["ollama"])
-        else:
-            chain = ["ollama"]
-
-        last_error = None
+    def _chain(self, config: dict | None) -> Iterator[tuple[str, BaseLLMProvider]]:
+        """Enabled, configured providers in fallback-chain order."""
+        chain = config.get("fallback_chain", ["ollama"]) if config else ["ollama"]
         for provider_name in chain:
             provider_config = {}
             if config:
@@ -76,11 +71,18 @@ class LLMManager:
                     continue
 
             provider = self._build_provider(provider_name, provider_config if isinstance(provider_config, dict) else {})
-            if not provider:
-                continue
+            if provider:
+                yield provider_name, provider
+
+    async def generate(self, prompt: str, system: str | None = None, org_id: str = "") -> str:
+        """Try the fallback chain until one provider succeeds."""
+        config = await self._get_org_config(org_id) if org_id else None
 
+        last_error = None
+        for provider_name, provider in self._chain(config):
             try:
-                result = await provider.generate(prompt, system)
+                with span("llm"):
+                    result = await provider.generate(prompt, system)
                 logger.info(f"LLM response from {provider_name}")
                 return result
             except Exception as e:
@@ -92,6 +94,35 @@ class LLMManager:
             raise last_error
         raise ConnectionError("No LLM provider available. Configure one in Settings or start Ollama.")
 
+    async def generate_stream(self, prompt: str, system: str | None = None, org_id: str = "") -> AsyncIterator[str]:
+        """Stream the completion from the first provider in the fallback chain that starts answering.
+
+        A provider that fails before its first piece falls through to the next
+        one; a failure after text has been yielded is raised, since the caller
+        has already passed that text on.
+        """
+        config = await self._get_org_config(org_id) if org_id else None
+
+        last_error = None
+        for provider_name, provider in self._chain(config):
+            started = False
+            try:
+                async for text in provider.generate_stream(prompt, system):
+                    if not started:
+                        logger.info(f"LLM stream from {provider_name}")
+                        started = True
+                    yield text
+                return
+            except Exception as e:
+                if started:
+                    raise
+                logger.warning(f"Provider {provider_name} failed: {e}")
+                last_error = e
+
+        if last_error:
+            raise last_error
+        raise ConnectionError("No LLM provider available. Configure one in Settings or start Ollama.")
+
     async def check_status(self, org_id: str = "") -> list[dict]:
         """Check health of all configured providers."""
         config = await self._get_org_config(org_id) if org_id else None
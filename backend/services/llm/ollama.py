@@ -1,6 +1,8 @@
 """Ollama LLM provider."""
 
+import json
 import logging
+from collections.abc import AsyncIterator
 
 import httpx
 
@@ -17,15 +19,18 @@ class OllamaProvider(BaseLLMProvider):
         self.model = model
         self.timeout = timeout
 
-    async def generate(self, prompt: str, system: str | None = None) -> str:
+    def _payload(self, prompt: str, system: str | None, stream: bool) -> dict:
         payload: dict = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
+            "stream": stream,
         }
         if system:
             payload["system"] = system
+        return payload
 
+    async def generate(self, prompt: str, system: str | None = None) -> str:
+        payload = self._payload(prompt, system, stream=False)
         try:
             async with httpx.AsyncClient(timeout=self.timeout) as client:
                 resp = await client.post(f"{self.base_url}/api/generate", json=payload)
@@ -39,6 +44,30 @@ class OllamaProvider(BaseLLMProvider):
         except httpx.TimeoutException:
             raise TimeoutError("Ollama request timed out. The model may still be loading.")
 
+    async def generate_stream(self, prompt: str, system: str | None = None) -> AsyncIterator[str]:
+        """Ollama streams one JSON object per line, each with the next piece of the response."""
+        payload = self._payload(prompt, system, stream=True)
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                async with client.stream("POST", f"{self.base_url}/api/generate", json=payload) as resp:
+                    resp.raise_for_status()
+                    async for line in resp.aiter_lines():
+                        if not line:
+                            continue
+                        data = json.loads(line)
+                        if "error" in data:
+                            raise RuntimeError(f"Ollama error: {data['error']}")
+                        if data.get("response"):
+                            yield data["response"]
+                        if data.get("done"):
+                            break
+        except httpx.ConnectError:
+            raise ConnectionError(
+                "Cannot connect to Ollama. Please start Ollama or configure a cloud LLM provider."
+            )
+        except httpx.TimeoutException:
+            raise TimeoutError("Ollama request timed out. The model may still be loading.")
+
     async def health_check(self) -> bool:
         try:
             async with httpx.AsyncClient(timeout=5.0) as client:
@@ -1,6 +1,7 @@
 """OpenAI / Azure OpenAI / OpenAI-compatible LLM provider."""
 
 import logging
+from collections.abc import AsyncIterator
 
 from backend.services.llm.base import BaseLLMProvider
 
@@ -43,20 +44,36 @@ class OpenAIProvider(BaseLLMProvider):
         else:
             return openai.AsyncOpenAI(api_key=self.api_key)
 
-    async def generate(self, prompt: str, system: str | None = None) -> str:
-        client = self._get_client()
+    @staticmethod
+    def _messages(prompt: str, system: str | None) -> list[dict]:
         messages = []
         if system:
             messages.append({"role": "system", "content": system})
         messages.append({"role": "user", "content": prompt})
+        return messages
 
+    async def generate(self, prompt: str, system: str | None = None) -> str:
+        client = self._get_client()
         response = await client.chat.completions.create(
             model=self.model,
-            messages=messages,
+            messages=self._messages(prompt, system),
             max_tokens=4096,
         )
         return response.choices[0].message.content or ""
 
+    async def generate_stream(self, prompt: str, system: str | None = None) -> AsyncIterator[str]:
+        client = self._get_client()
+        stream = await client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt, system),
+            max_tokens=4096,
+            stream=True,
+        )
+        async for chunk in stream:
+            # Azure sends content-filter chunks with no choices
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
     async def health_check(self) -> bool:
         if not self.api_key:
             return False
@@ -0,0 +1,193 @@
+"""Near-duplicate document detection with MinHash signatures and banded LSH.
+
+Each document's signature is the per-permutation minimum hash over the word
+shingles of its chunks; the fraction of equal signature slots estimates the
+Jaccard similarity of two documents' shingle sets. Signatures are split into
+bands, and only documents sharing a whole band with the new one are compared,
+so detection cost grows with the number of near matches, not the corpus.
+
+A document joins the cluster of its most similar match at or above
+``near_duplicate_threshold``, otherwise it starts its own (the cluster ID is
+the first document's ID). When a cluster's first document is reprocessed into
+another cluster, its remaining members move to the first of them indexed.
+Signatures and cluster IDs are stored on the MongoDB document record; the
+per-tenant band index is rebuilt from them on first use after a restart.
+"""
+
+import asyncio
+import logging
+import threading
+import zlib
+
+import numpy as np
+
+from backend.core.database import get_db
+from backend.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+NUM_PERMUTATIONS = 128
+# 32 bands of 4 rows: a pair shares a band with probability 1-(1-J⁴)³², so ≈0.99 at
+# J=0.6 and above 0.9998 from 0.7 up; pairs at or above near_duplicate_threshold
+# (0.8 by default) are found. Bands are derived from stored signatures on load.
+LSH_BANDS = 32
+SHINGLE_WORDS = 5
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240601)  # Fixed: stored signatures must stay comparable across restarts
+_A = _rng.integers(1, _PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, NUM_PERMUTATIONS, dtype=np.uint64)
+# Shingle hashes per vectorized block; bounds the (block x permutations) temporary
+_BLOCK = 4096
+
+
+def signature(texts: list[str]) -> list[int] | None:
+    """MinHash signature over the word shingles of a document's chunks; None if there are no words."""
+    shingles: set[int] = set()
+    for text in texts:
+        words = text.lower().split()
+        if len(words) < SHINGLE_WORDS:
+            if words:
+                shingles.add(zlib.crc32(" ".join(words).encode()))
+            continue
+        for i in range(len(words) - SHINGLE_WORDS + 1):
+            shingles.add(zlib.crc32(" ".join(words[i:i + SHINGLE_WORDS]).encode()))
+    if not shingles:
+        return None
+    hashes = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+    minimum = np.full(NUM_PERMUTATIONS, _PRIME, dtype=np.uint64)
+    for start in range(0, len(hashes), _BLOCK):
+        block = hashes[start:start + _BLOCK, None]
+        # a < 2^31 and crc32 < 2^32, so a*x + b fits in 64 bits
+        np.minimum(minimum, ((block * _A + _B) % _PRIME).min(axis=0), out=minimum)
+    return minimum.tolist()
+
+
+def similarity(a: list[int], b: list[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.mean(np.asarray(a) == np.asarray(b)))
+
+
+def _bands(sig: list[int]) -> list[tuple]:
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    return [(band, *sig[band * rows:(band + 1) * rows]) for band in range(LSH_BANDS)]
+
+
+class _TenantIndex:
+    def __init__(self):
+        self.signatures: dict[str, list[int]] = {}
+        self.clusters: dict[str, str] = {}
+        self.buckets: dict[tuple, set[str]] = {}
+
+    def insert(self, document_id: str, sig: list[int], cluster: str) -> None:
+        self.remove(document_id)
+        self.signatures[document_id] = sig
+        self.clusters[document_id] = cluster
+        for key in _bands(sig):
+            self.buckets.setdefault(key, set()).add(document_id)
+
+    def remove(self, document_id: str) -> None:
+        sig = self.signatures.pop(document_id, None)
+        self.clusters.pop(document_id, None)
+        if sig is None:
+            return
+        for key in _bands(sig):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(document_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def reroot(self, old_root: str) -> tuple[str, list[str]] | None:
+        """Move the members of ``old_root``'s cluster to the earliest-indexed of them."""
+        members = [d for d, c in self.clusters.items() if c == old_root and d != old_root]
+        if not members:
+            return None
+        for doc_id in members:
+            self.clusters[doc_id] = members[0]
+        return members[0], members
+
+    def best_match(self, document_id: str, sig: list[int], threshold: float) -> tuple[str, float] | None:
+        candidates = set()
+        for key in _bands(sig):
+            candidates.update(self.buckets.get(key, ()))
+        candidates.discard(document_id)
+        scored = [(c, similarity(sig, self.signatures[c])) for c in candidates]
+        scored = [(c, s) for c, s in scored if s >= threshold]
+        return max(scored, key=lambda cs: cs[1]) if scored else None
+
+
+class NearDuplicateIndex:
+    """Per-tenant LSH indexes, each loaded from MongoDB on first use."""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self._tenants: dict[str, _TenantIndex] = {}
+        self._loading: dict[str, asyncio.Lock] = {}
+        self._lock = threading.Lock()
+
+    async def _tenant(self, org_id: str) -> _TenantIndex:
+        index = self._tenants.get(org_id)
+        if index is not None:
+            return index
+        async with self._loading.setdefault(org_id, asyncio.Lock()):
+            index = self._tenants.get(org_id)
+            if index is None:
+                index = _TenantIndex()
+                cursor = get_db().documents.find(
+                    {"organization_id": org_id, "minhash": {"$exists": True}},
+                    {"_id": 0, "document_id": 1, "minhash": 1, "duplicate_cluster": 1},
+                )
+                async for doc in cursor:
+                    index.insert(doc["document_id"], doc["minhash"], doc.get("duplicate_cluster") or doc["document_id"])
+                self._tenants[org_id] = index
+                logger.info(f"Near-duplicate index loaded {len(index.signatures)} documents for org {org_id}")
+        return index
+
+    async def add(self, org_id: str, document_id: str, sig: list[int]) -> tuple[str, float]:
+        """Index a document's signature; returns its cluster ID and the similarity to its closest match (0 if none)."""
+        index = await self._tenant(org_id)
+        with self._lock:
+            was_root = index.clusters.get(document_id) == document_id
+            index.remove(document_id)  # Reprocessing must not match the document's previous signature
+            match = index.best_match(document_id, sig, self.threshold)
+            cluster = index.clusters[match[0]] if match else document_id
+            moved = index.reroot(document_id) if was_root and cluster != document_id else None
+            index.insert(document_id, sig, cluster)
+        if moved is not None:
+            new_root, members = moved
+            await get_db().documents.update_many(
+                {"organization_id": org_id, "document_id": {"$in": members}},
+                {"$set": {"duplicate_cluster": new_root}},
+            )
+        return cluster, match[1] if match else 0.0
+
+    async def clusters(self, org_id: str, document_ids: list[str]) -> dict[str, str]:
+        """Cluster ID per document (a document outside any cluster maps to itself)."""
+        index = await self._tenant(org_id)
+        return {doc_id: index.clusters.get(doc_id, doc_id) for doc_id in document_ids}
+
+    def remove(self, org_id: str, document_ids: list[str]) -> None:
+        index = self._tenants.get(org_id)
+        if index is not None:
+            with self._lock:
+                for doc_id in document_ids:
+                    index.remove(doc_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tenants.clear()
+            self._loading.clear()
+
+
+_index: NearDuplicateIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> NearDuplicateIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = NearDuplicateIndex(get_settings().near_duplicate_threshold)
+    return _index
@@ -0,0 +1,198 @@
+"""Parser for the boolean/proximity search syntax.
+
+Grammar, loosest binding first::
+
+    query   := or ( OR or )*
+    or      := and ( [AND] [NOT] and )*          adjacent terms are ANDed
+    and     := near ( NEAR/n near )*             at most n words apart, either order
+    near    := "(" query ")" | "quoted phrase" | term
+
+Terms are tokenized like indexed text (so ``$2,500,000`` and ``§ 12.3`` match
+as written); ``*`` and ``?`` make a term a wildcard, e.g. ``indemnif*``, and a lone ``*``
+inside a phrase stands for any one word.
+Operators must be upper case; lower-case "and"/"or"/"not" are ordinary words.
+Execution lives in :mod:`backend.services.lexical_index`.
+"""
+
+import re
+from dataclasses import dataclass
+
+from backend.services import lexical_index
+
+_TOKEN_RE = re.compile(r'"[^"]*"?|\(|\)|NEAR/\d+|[^\s()"]+')
+_WILDCARD = re.compile(r"[*?]")
+# Expansions per wildcard term; keeps "a*" from touching the whole vocabulary
+MAX_WILDCARD_TERMS = 200
+
+
+class QuerySyntaxError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Term:
+    term: str
+
+
+@dataclass(frozen=True)
+class Wildcard:
+    pattern: str
+
+
+@dataclass(frozen=True)
+class Phrase:
+    # (Term or Wildcard, word offset from the phrase start); stop words leave gaps
+    parts: tuple[tuple["Term | Wildcard", int], ...]
+
+
+@dataclass(frozen=True)
+class Near:
+    left: "Node"
+    right: "Node"
+    distance: int
+
+
+@dataclass(frozen=True)
+class And:
+    include: tuple["Node", ...]
+    exclude: tuple["Node", ...] = ()
+
+
+@dataclass(frozen=True)
+class Or:
+    children: tuple["Node", ...]
+
+
+Node = Term | Wildcard | Phrase | Near | And | Or
+
+
+def _word(text: str) -> "Node | None":
+    """A bare query word: a wildcard, a term, or a phrase when it tokenizes to several terms."""
+    if _WILDCARD.search(text):
+        pattern = text.lower().strip(".,;:")
+        if not pattern.strip("*?"):
+            raise QuerySyntaxError(f"Wildcard needs at least one letter: {text}")
+        return Wildcard(pattern)
+    return _phrase(text)
+
+
+def _phrase(text: str) -> "Node | None":
+    parts: list[tuple[Term | Wildcard, int]] = []
+    cursor = 0
+    for word in text.split():
+        if word == "*":
+            cursor += 1  # Any single word
+            continue
+        if _WILDCARD.search(word):
+            parts.append((_word(word), cursor))
+            cursor += 1
+            continue
+        for term, position in lexical_index.tokenize_positions(word):
+            parts.append((Term(term), cursor + position))
+        # Stop words are not indexed but still occupy a position
+        cursor += lexical_index.count_positions(word)
+    if not parts:
+        return None
+    start = parts[0][1]
+    if len(parts) == 1:
+        return parts[0][0]
+    return Phrase(tuple((part, offset - start) for part, offset in parts))
+
+
+class _Parser:
+    def __init__(self, query: str):
+        self.tokens = _TOKEN_RE.findall(query)
+        self.i = 0
+
+    def peek(self) -> str | None:
+        return self.tokens[self.i] if self.i < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.tokens[self.i]
+        self.i += 1
+        return token
+
+    def parse(self) -> Node:
+        node = self.query()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"Unexpected '{self.peek()}'")
+        if node is None:
+            raise QuerySyntaxError("Query has no searchable terms")
+        return node
+
+    def query(self) -> "Node | None":
+        children = [self.conjunction()]
+        while self.peek() == "OR":
+            self.take()
+            children.append(self.conjunction())
+        children = [c for c in children if c is not None]
+        if len(children) > 1:
+            return Or(tuple(children))
+        return children[0] if children else None
+
+    def conjunction(self) -> "Node | None":
+        include: list[Node] = []
+        exclude: list[Node] = []
+        while self.peek() not in (None, "OR", ")"):
+            if self.peek() == "AND":
+                self.take()
+            negate = self.peek() == "NOT"
+            if negate:
+                self.take()
+            node = self.proximity()
+            if node is not None:
+                (exclude if negate else include).append(node)
+        if not include and not exclude:
+            return None
+        if not exclude and len(include) == 1:
+            return include[0]
+        return And(tuple(include), tuple(exclude))
+
+    def proximity(self) -> "Node | None":
+        node = self.unary()
+        while (token := self.peek()) and token.startswith("NEAR/"):
+            self.take()
+            right = self.unary()
+            if node is None or right is None:
+                raise QuerySyntaxError(f"{token} needs a searchable term on both sides")
+            if isinstance(node, And) or isinstance(right, And):
+                raise QuerySyntaxError(f"{token} applies to terms, phrases and OR groups only")
+            node = Near(node, right, int(token[5:]))
+        return node
+
+    def unary(self) -> "Node | None":
+        token = self.peek()
+        if token is None or token in ("OR", "AND", "NOT", ")") or token.startswith("NEAR/"):
+            raise QuerySyntaxError(f"Expected a term, got '{token or 'end of query'}'")
+        self.take()
+        if token == "(":
+            node = self.query()
+            if self.peek() != ")":
+                raise QuerySyntaxError("Missing ')'")
+            self.take()
+            return node
+        if token.startswith('"'):
+            if len(token) < 2 or not token.endswith('"'):
+                raise QuerySyntaxError("Unterminated phrase")
+            return _phrase(token[1:-1])
+        return _word(token)
+
+
+def parse(query: str) -> Node:
+    """Parse a query into a tree; raises QuerySyntaxError on malformed input."""
+    return _Parser(query).parse()
+
+
+def positive_terms(node: Node) -> list["Term | Wildcard"]:
+    """Terms and wildcards that must (or may) match, i.e. not under a NOT; used for ranking."""
+    if isinstance(node, (Term, Wildcard)):
+        return [node]
+    if isinstance(node, Phrase):
+        return [part for part, _ in node.parts]
+    if isinstance(node, Near):
+        return positive_terms(node.left) + positive_terms(node.right)
+    if isinstance(node, And):
+        return [t for child in node.include for t in positive_terms(child)]
+    if isinstance(node, Or):
+        return [t for child in node.children for t in positive_terms(child)]
+    return []
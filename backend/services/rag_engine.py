@@ -1,7 +1,14 @@
+import asyncio
 import logging
+from collections.abc import AsyncIterator
 
+from backend.core.settings import get_settings
+from backend.core.tracing import span
 from backend.models.schemas import Citation
-from backend.services.llm.manager import LLMManager
+from backend.services.ai_features import generate_follow_ups, heuristic_follow_ups
+from backend.services.llm.manager import LLMManager, get_llm_manager
+from backend.services.reranker import rerank
+from backend.services.result_processing import merge_adjacent
 from backend.services.search_engine import semantic_search
 
 logger = logging.getLogger(__name__)
@@ -10,6 +17,8 @@ SYSTEM_PROMPT = """You are a legal document assistant. Answer questions based ON
 If the documents don't contain enough information to answer, say so clearly.
 Always reference which document and page your information comes from using [1], [2] notation matching the source numbers provided."""
 
+NO_RESULTS_ANSWER = "No relevant documents found. Please upload documents first."
+
 
 def _build_context(citations: list[Citation]) -> str:
     parts = []
@@ -21,19 +30,24 @@ def _build_context(citations: list[Citation]) -> str:
     return "\n".join(parts)
 
 
-async def ask(
-    query: str,
-    top_k: int = 5,
-    llm_manager: LLMManager | None = None,
-    org_id: str = "",
-) -> tuple[str, list[Citation]]:
-    citations = semantic_search(query=query, top_k=top_k)
+async def retrieve(query: str, top_k: int = 5, org_id: str = "", where: dict | None = None) -> list[Citation]:
+    """The excerpts an answer is grounded in, best first."""
+    settings = get_settings()
+    # Overlapping neighbour chunks are merged so each excerpt in the prompt adds new text
+    depth = top_k * settings.postprocess_candidate_multiplier
+    if settings.rerank_enabled:
+        # Over-fetch, then keep the top_k the cross-encoder ranks best
+        candidates = semantic_search(
+            query=query, top_k=max(depth, settings.rerank_candidates), org_id=org_id or None, where=where,
+        )
+        with span("rerank"):
+            return await asyncio.to_thread(rerank, query, merge_adjacent(candidates), top_k)
+    return merge_adjacent(semantic_search(query=query, top_k=depth, org_id=org_id or None, where=where))[:top_k]
 
-    if not citations:
-        return "No relevant documents found. Please upload documents first.", []
 
+def build_prompt(query: str, citations: list[Citation]) -> str:
     context = _build_context(citations)
-    prompt = f"""Based on the following document excerpts, answer the question.
+    return f"""Based on the following document excerpts, answer the question.
 
 DOCUMENT EXCERPTS:
 {context}
@@ -42,6 +56,19 @@ QUESTION: {query}
 
 Provide a clear, detailed answer citing sources using [1], [2] notation. If the documents don't fully answer the question, state what information is available and what is missing."""
 
+
+async def ask(
+    query: str,
+    top_k: int = 5,
+    llm_manager: LLMManager | None = None,
+    org_id: str = "",
+    where: dict | None = None,
+) -> tuple[str, list[Citation]]:
+    citations = await retrieve(query, top_k, org_id, where)
+    if not citations:
+        return NO_RESULTS_ANSWER, []
+
+    prompt = build_prompt(query, citations)
     if llm_manager:
         answer = await llm_manager.generate(prompt=prompt, system=SYSTEM_PROMPT, org_id=org_id)
     else:
@@ -52,21 +79,65 @@ Provide a clear, detailed answer citing sources using [1], [2] notation. If the
     return answer, citations
 
 
+async def ask_stream(
+    query: str,
+    top_k: int = 5,
+    llm_manager: LLMManager | None = None,
+    org_id: str = "",
+    where: dict | None = None,
+) -> tuple[list[Citation], AsyncIterator[str]]:
+    """Like ask(), but returns the citations as soon as retrieval is done and the answer as a stream of text."""
+    citations = await retrieve(query, top_k, org_id, where)
+
+    async def answer() -> AsyncIterator[str]:
+        if not citations:
+            yield NO_RESULTS_ANSWER
+            return
+        prompt = build_prompt(query, citations)
+        manager = llm_manager or get_llm_manager()
+        async for text in manager.generate_stream(prompt=prompt, system=SYSTEM_PROMPT, org_id=org_id):
+            yield text
+
+    return citations, answer()
+
+
 async def ask_with_follow_ups(
     query: str,
     top_k: int = 5,
     llm_manager: LLMManager | None = None,
     org_id: str = "",
+    where: dict | None = None,
 ) -> tuple[str, list[Citation], list[str]]:
-    """Like ask(), but also returns follow-up question suggestions."""
-    answer, citations = await ask(query, top_k, llm_manager, org_id)
-
-    follow_ups: list[str] = []
-    if llm_manager and answer and not answer.startswith("No relevant documents"):
-        try:
-            from backend.services.ai_features import generate_follow_ups
-            follow_ups = await generate_follow_ups(query, answer, llm_manager, org_id)
-        except Exception as e:
-            logger.warning(f"Follow-up generation failed (non-blocking): {e}")
-
-    return answer, citations, follow_ups
+    """Like ask(), but also returns follow-up question suggestions.
+
+    The suggestions are heuristic, so they add no LLM call to the answer;
+    model-written ones come from :func:`follow_ups` (``/chat/follow-ups``, or
+    the trailing event of ``/chat/stream``).
+    """
+    answer, citations = await ask(query, top_k, llm_manager, org_id, where)
+    if answer == NO_RESULTS_ANSWER:
+        return answer, citations, []
+    return answer, citations, heuristic_follow_ups(query, answer, citations)
+
+
+async def follow_ups(
+    query: str,
+    answer: str,
+    citations: list[Citation],
+    llm_manager: LLMManager,
+    org_id: str = "",
+) -> list[str]:
+    """LLM follow-up suggestions for an answered question, or heuristic ones if the LLM fails or is too slow."""
+    if not answer or answer == NO_RESULTS_ANSWER:
+        return []
+    try:
+        with span("follow_ups"):
+            suggestions = await asyncio.wait_for(
+                generate_follow_ups(query, answer, llm_manager, org_id),
+                timeout=get_settings().follow_up_timeout_seconds,
+            )
+        if suggestions:
+            return suggestions
+    except Exception as e:
+        logger.warning(f"Follow-up generation failed, using heuristic suggestions: {e!r}")
+    return heuristic_follow_ups(query, answer, citations)
@@ -0,0 +1,213 @@
+"""Versioned vector collections and background re-embedding on model change.
+
+The active collection pointer and migration progress live in the
+``vector_index_state`` MongoDB collection so a migration interrupted by a
+restart resumes where it stopped. While it runs, search keeps serving from
+the old collection (queries are embedded with the old model) and new chunks
+are dual-written; once the shadow collection is complete the pointer is
+swapped in a single update.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from backend.core.database import get_db
+from backend.core.settings import get_settings
+from backend.services import clause_index, vector_store
+from backend.services.embeddings import embed_texts
+from backend.services.vectordb.base import StoredChunk, VectorStore
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_ID = "active"
+MIGRATION_ID = "migration"
+
+_task: asyncio.Task | None = None
+
+
+async def init_vector_index() -> None:
+    """Load the active collection pointer and start/resume a migration if the model changed."""
+    global _task
+    settings = get_settings()
+    db = get_db()
+
+    active = await db.vector_index_state.find_one({"_id": ACTIVE_ID})
+    if not active:
+        # First boot (or pre-versioning install): the configured collection is the active one
+        active = {
+            "_id": ACTIVE_ID,
+            "collection": settings.chroma_collection_name,
+            "embedding_model": settings.embedding_model_name,
+            "updated_at": datetime.now(timezone.utc),
+        }
+        await db.vector_index_state.update_one({"_id": ACTIVE_ID}, {"$set": active}, upsert=True)
+
+    vector_store.set_active_collection(active["collection"], active["embedding_model"])
+
+    if active["embedding_model"] == settings.embedding_model_name:
+        return
+
+    logger.info(
+        f"Embedding model changed ({active['embedding_model']} → {settings.embedding_model_name}); "
+        "starting background re-embedding"
+    )
+    _task = asyncio.create_task(
+        run_migration(active["collection"], active["embedding_model"], settings.embedding_model_name)
+    )
+
+
+async def stop_migration() -> None:
+    """Cancel a running migration; its progress is kept for resume on next start."""
+    global _task
+    if _task and not _task.done():
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+    _task = None
+
+
+async def _save_progress(**fields) -> None:
+    db = get_db()
+    await db.vector_index_state.update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {**fields, "updated_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+
+
+async def _copy(chunks: list[StoredChunk], target: VectorStore, target_model: str) -> None:
+    if not chunks:
+        return
+    texts = [c.text for c in chunks]
+    embeddings = await asyncio.to_thread(embed_texts, texts, target_model)
+    # Clause tags depend on the model, so they are recomputed rather than copied
+    tags = await asyncio.to_thread(clause_index.tag_embeddings, embeddings, target_model)
+    metadatas = [{**clause_index.strip_tags(c.metadata), **t} for c, t in zip(chunks, tags)]
+    await asyncio.to_thread(
+        target.upsert, [c.id for c in chunks], embeddings, texts, metadatas,
+    )
+
+
+async def run_migration(source: str, source_model: str, target_model: str) -> None:
+    """Re-embed every chunk of `source` into a shadow collection, then cut over."""
+    settings = get_settings()
+    db = get_db()
+    target_name = vector_store.collection_name_for(target_model)
+    batch_size = settings.reindex_batch_size
+
+    state = await db.vector_index_state.find_one({"_id": MIGRATION_ID})
+    resuming = bool(
+        state
+        and state.get("status") in ("running", "failed")
+        and state.get("source_collection") == source
+        and state.get("target_collection") == target_name
+    )
+    offset = state.get("offset", 0) if resuming else 0
+    if not resuming:
+        # Leftovers from an abandoned migration may include chunks deleted since
+        await asyncio.to_thread(vector_store.drop_collection, target_name)
+    source_store = vector_store.get_store(source, source_model)
+    target_store = vector_store.get_store(target_name, target_model)
+    total = await asyncio.to_thread(source_store.count)
+
+    await _save_progress(
+        status="running",
+        source_collection=source,
+        source_model=source_model,
+        target_collection=target_name,
+        target_model=target_model,
+        offset=offset,
+        total=total,
+        error=None,
+        **({} if resuming else {"started_at": datetime.now(timezone.utc), "completed_at": None}),
+    )
+    if resuming:
+        logger.info(f"Resuming re-embedding into '{target_name}' at {offset}/{total}")
+
+    vector_store.set_shadow_collection(target_name, target_model)
+    try:
+        while True:
+            chunks = await asyncio.to_thread(source_store.get, offset=offset, limit=batch_size)
+            if not chunks:
+                break
+            await _copy(chunks, target_store, target_model)
+            offset += len(chunks)
+            await _save_progress(offset=offset)
+            # Throttle so live search and ingestion keep priority
+            await asyncio.sleep(settings.reindex_throttle_seconds)
+
+        # Catch-up pass: deletes during the scan shift offsets and can skip chunks
+        source_ids, target_ids = await asyncio.gather(
+            asyncio.to_thread(source_store.list_ids),
+            asyncio.to_thread(target_store.list_ids),
+        )
+        missing = sorted(set(source_ids) - set(target_ids))
+        # A chunk deleted from the source after its page was copied must not return at cutover
+        stale = sorted(set(target_ids) - set(source_ids))
+        for i in range(0, len(stale), batch_size):
+            await asyncio.to_thread(target_store.delete, ids=stale[i:i + batch_size])
+        if stale:
+            logger.info(f"Removed {len(stale)} chunks deleted from the source during the scan")
+        for i in range(0, len(missing), batch_size):
+            chunks = await asyncio.to_thread(source_store.get, ids=missing[i:i + batch_size])
+            await _copy(chunks, target_store, target_model)
+            await asyncio.sleep(settings.reindex_throttle_seconds)
+        if missing:
+            logger.info(f"Re-embedded {len(missing)} chunks missed by the main scan")
+
+        # Cut over: one pointer update in Mongo, one swap in-process
+        await db.vector_index_state.update_one(
+            {"_id": ACTIVE_ID},
+            {"$set": {
+                "collection": target_name,
+                "embedding_model": target_model,
+                "updated_at": datetime.now(timezone.utc),
+            }},
+            upsert=True,
+        )
+        vector_store.promote_shadow()
+        await clause_index.mark_covered(target_name)
+        await _save_progress(status="completed", completed_at=datetime.now(timezone.utc))
+        logger.info(f"Re-embedding complete: {offset} chunks now served from '{target_name}'")
+    except asyncio.CancelledError:
+        vector_store.set_shadow_collection(None)
+        logger.info(f"Re-embedding paused at {offset}/{total}; it will resume on next start")
+        raise
+    except Exception as e:
+        vector_store.set_shadow_collection(None)
+        logger.error(f"Re-embedding failed at {offset}/{total}: {e}")
+        await _save_progress(status="failed", error=str(e))
+
+
+async def get_migration_status() -> dict:
+    """Active collection plus progress of the current or last migration."""
+    db = get_db()
+    active = await db.vector_index_state.find_one({"_id": ACTIVE_ID}) or {}
+    migration = await db.vector_index_state.find_one({"_id": MIGRATION_ID})
+
+    status: dict = {
+        "active_collection": active.get("collection", vector_store.get_active_collection_name()),
+        "embedding_model": active.get("embedding_model", vector_store.get_active_model()),
+        "configured_model": get_settings().embedding_model_name,
+        "migration": None,
+    }
+    if migration:
+        total = migration.get("total") or 0
+        offset = migration.get("offset", 0)
+        status["migration"] = {
+            "status": migration.get("status"),
+            "source_collection": migration.get("source_collection"),
+            "target_collection": migration.get("target_collection"),
+            "target_model": migration.get("target_model"),
+            "processed": offset,
+            "total": total,
+            "percent": round(min(offset, total) / total * 100, 1) if total else 100.0,
+            "error": migration.get("error"),
+            "started_at": migration["started_at"].isoformat() if migration.get("started_at") else None,
+            "updated_at": migration["updated_at"].isoformat() if migration.get("updated_at") else None,
+            "completed_at": migration["completed_at"].isoformat() if migration.get("completed_at") else None,
+        }
+    return status
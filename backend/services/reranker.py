@@ -0,0 +1,100 @@
+"""Optional cross-encoder reranking of dense retrieval candidates.
+
+A cross-encoder reads the query and a chunk together, so it orders candidates
+far better than bi-encoder cosine scores, but costs one forward pass per pair.
+Candidate pairs are scored in batches on CPU under a millisecond budget: if
+the budget runs out before every candidate is scored, the dense order is kept.
+Scores are cached per (query, chunk), so a repeated question only scores
+chunks it has not seen.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from sentence_transformers import CrossEncoder
+
+from backend.core.settings import get_settings
+from backend.models.schemas import Citation
+
+logger = logging.getLogger(__name__)
+
+_models: dict[str, CrossEncoder] = {}
+_models_lock = threading.Lock()
+
+
+class _ScoreCache:
+    """Bounded LRU of cross-encoder scores keyed by (model, query, chunk ID, chunk text hash)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._scores: OrderedDict[tuple, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> float | None:
+        with self._lock:
+            score = self._scores.get(key)
+            if score is not None:
+                self._scores.move_to_end(key)
+            return score
+
+    def put(self, key: tuple, score: float) -> None:
+        with self._lock:
+            self._scores[key] = score
+            self._scores.move_to_end(key)
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scores.clear()
+
+
+_cache = _ScoreCache(get_settings().rerank_cache_size)
+
+
+def load_model(model_name: str | None = None) -> CrossEncoder:
+    model_name = model_name or get_settings().rerank_model_name
+    model = _models.get(model_name)
+    if model is None:
+        with _models_lock:
+            model = _models.get(model_name)
+            if model is None:
+                logger.info(f"Loading reranker model: {model_name}")
+                model = _models[model_name] = CrossEncoder(model_name, device="cpu")
+                logger.info("Reranker model loaded")
+    return model
+
+
+def rerank(query: str, citations: list[Citation], top_k: int) -> list[Citation]:
+    """Reorder candidates by cross-encoder score; the dense order is kept if the budget is exceeded."""
+    if len(citations) < 2:
+        return citations[:top_k]
+    settings = get_settings()
+    model = load_model()
+    keys = [(settings.rerank_model_name, query, c.chunk_id or c.text, hash(c.text)) for c in citations]
+    scores = [_cache.get(key) for key in keys]
+    pending = [i for i, score in enumerate(scores) if score is None]
+
+    started = time.perf_counter()
+    batch_size = settings.rerank_batch_size
+    for start in range(0, len(pending), batch_size):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms > settings.rerank_budget_ms:
+            # Scored batches stay cached, so a repeat of this query finishes sooner
+            logger.info(
+                f"Rerank budget of {settings.rerank_budget_ms:.0f}ms exceeded after "
+                f"{start}/{len(pending)} pairs; keeping dense order"
+            )
+            return citations[:top_k]
+        batch = pending[start:start + batch_size]
+        predicted = model.predict(
+            [(query, citations[i].text) for i in batch], batch_size=batch_size, show_progress_bar=False,
+        )
+        for i, score in zip(batch, predicted):
+            scores[i] = float(score)
+            _cache.put(keys[i], scores[i])
+
+    order = sorted(range(len(citations)), key=lambda i: scores[i], reverse=True)
+    return [citations[i] for i in order[:top_k]]
@@ -0,0 +1,168 @@
+"""Post-processing of ranked citations: overlap merging, MMR diversification, per-document grouping.
+
+Chunks overlap by ``chunk_overlap_words``, so neighbouring chunks of one page
+often rank together and repeat each other. :func:`merge_adjacent` folds them
+into one citation, :func:`diversify` reorders by maximal marginal relevance
+using the embeddings already in the vector store, and :func:`group_by_document`
+keeps the best few hits per document. All three keep the input's best-first
+order otherwise; callers over-fetch so a merged or dropped hit does not leave
+a result slot empty.
+"""
+
+import re
+
+import numpy as np
+
+from backend.models.schemas import Citation, DocumentGroup
+from backend.services import vector_store
+
+_CHUNK_ID = re.compile(r"^(.*)_chunk_(\d+)$")
+
+
+def chunk_position(citation: Citation) -> tuple[str, int] | None:
+    """(document ID, chunk index) parsed from a chunk ID, or None for IDs of another shape."""
+    match = _CHUNK_ID.match(citation.chunk_id)
+    return (match.group(1), int(match.group(2))) if match else None
+
+
+def _join(left: str, right: str) -> str:
+    """Concatenate two consecutive chunks, dropping the words they share."""
+    left_words, right_words = left.split(), right.split()
+    for size in range(min(len(left_words), len(right_words)), 0, -1):
+        if left_words[-size:] == right_words[:size]:
+            return " ".join(left_words + right_words[size:])
+    return " ".join(left_words + right_words)
+
+
+def merge_adjacent(citations: list[Citation]) -> list[Citation]:
+    """Fold runs of consecutive chunks (same document and page) into one citation.
+
+    The merged citation takes the place and score of the run's best chunk and
+    keeps its chunk ID; its text is the run's text in document order.
+    """
+    by_position: dict[tuple[str, int], int] = {}
+    for i, citation in enumerate(citations):
+        position = chunk_position(citation)
+        if position is not None:
+            by_position[position] = i
+
+    merged: list[Citation] = []
+    consumed: set[int] = set()
+    for i, citation in enumerate(citations):
+        if i in consumed:
+            continue
+        position = chunk_position(citation)
+        if position is None:
+            merged.append(citation)
+            continue
+        document_id, index = position
+        run = [i]
+        for step in (-1, 1):
+            neighbour = index + step
+            while (j := by_position.get((document_id, neighbour))) is not None and j not in consumed:
+                if citations[j].page != citation.page:
+                    break
+                run.append(j)
+                neighbour += step
+        if len(run) == 1:
+            merged.append(citation)
+            continue
+        consumed.update(run)
+        ordered = sorted(run, key=lambda k: chunk_position(citations[k])[1])
+        text = citations[ordered[0]].text
+        for k in ordered[1:]:
+            text = _join(text, citations[k].text)
+        merged.append(citation.model_copy(update={
+            "text": text,
+            "paragraph": citations[ordered[0]].paragraph,
+        }))
+    return merged
+
+
+def diversify(citations: list[Citation], top_k: int, diversity: float, org_id: str | None = None) -> list[Citation]:
+    """Maximal marginal relevance: trade relevance (the citation score) against similarity to results already chosen.
+
+    ``diversity`` 0 keeps the ranking; 1 picks purely for novelty. Chunk
+    embeddings are read from the vector store, so no text is re-embedded.
+    """
+    if diversity <= 0 or len(citations) < 2:
+        return citations[:top_k]
+    stored = {
+        chunk.id: chunk.embedding
+        for chunk in vector_store.get_chunks([c.chunk_id for c in citations if c.chunk_id], org_id, include_embeddings=True)
+        if chunk.embedding
+    }
+    dimension = len(next(iter(stored.values()))) if stored else 1
+    matrix = np.zeros((len(citations), dimension), dtype=np.float32)
+    for i, citation in enumerate(citations):
+        if citation.chunk_id in stored:
+            matrix[i] = stored[citation.chunk_id]
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-12
+    relevance = np.array([c.score for c in citations], dtype=np.float32)
+
+    selected: list[int] = []
+    # Highest cosine similarity of each candidate to any selected result (dissimilar counts as 0)
+    redundancy = np.zeros(len(citations), dtype=np.float32)
+    available = np.ones(len(citations), dtype=bool)
+    for _ in range(min(top_k, len(citations))):
+        mmr = (1.0 - diversity) * relevance - diversity * redundancy
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, matrix @ matrix[best])
+    return [citations[i] for i in selected]
+
+
+def group_by_document(citations: list[Citation], per_document: int) -> list[DocumentGroup]:
+    """Hits grouped by document, documents ordered by their best hit, at most ``per_document`` hits each."""
+    groups: dict[str, DocumentGroup] = {}
+    for citation in citations:
+        group = groups.get(citation.document_id)
+        if group is None:
+            group = groups[citation.document_id] = DocumentGroup(
+                document_id=citation.document_id,
+                document_name=citation.document_name,
+                score=citation.score,
+                hits=[],
+            )
+        if len(group.hits) < per_document:
+            group.hits.append(citation)
+    return list(groups.values())
+
+
+def flatten(groups: list[DocumentGroup]) -> list[Citation]:
+    return [hit for group in groups for hit in group.hits]
+
+
+def collapse_clusters(citations: list[Citation], cluster_of: dict[str, str]) -> list[Citation]:
+    """Drop hits from documents whose near-duplicate cluster already has a better-ranked document."""
+    chosen: dict[str, str] = {}
+    kept = []
+    for citation in citations:
+        cluster = cluster_of.get(citation.document_id, citation.document_id)
+        if chosen.setdefault(cluster, citation.document_id) == citation.document_id:
+            kept.append(citation)
+    return kept
+
+
+def postprocess(
+    citations: list[Citation],
+    top_k: int,
+    merge: bool = True,
+    diversity: float = 0.0,
+    per_document: int | None = None,
+    org_id: str | None = None,
+    cluster_of: dict[str, str] | None = None,
+) -> list[Citation]:
+    """Collapse duplicates, merge, diversify and cap hits per document (each optional), then keep the best ``top_k``."""
+    if cluster_of is not None:
+        citations = collapse_clusters(citations, cluster_of)
+    if merge:
+        citations = merge_adjacent(citations)
+    if diversity > 0:
+        # Reorder every candidate so the per-document cap below still has fallbacks
+        citations = diversify(citations, len(citations), diversity, org_id)
+    if per_document is not None:
+        citations = flatten(group_by_document(citations, per_document))
+    return citations[:top_k]
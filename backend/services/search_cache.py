@@ -0,0 +1,120 @@
+"""In-memory cache of /search results per organization.
+
+Entries are keyed by the organization's index generation as well as the
+search parameters. The vector store facade bumps an organization's generation
+whenever its chunks are added or deleted (and every organization's when the
+active collection changes), so a result cached by a process never outlives
+index changes that process made: stale entries simply stop matching and age out.
+
+Generations are per process, like the cache itself. Writes made by another API
+worker are not seen here, so such entries stay until ``search_cache_ttl_seconds``
+expires them; maintenance scripts refuse to run while a server is up (see
+``services/server_presence.py``). Eviction is LRU with that TTL.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from backend.core.settings import get_settings
+from backend.models.schemas import Citation
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Stats:
+    hits: int = 0
+    misses: int = 0
+
+
+class SearchCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float, list[Citation]]] = OrderedDict()
+        self._generations: dict[str, int] = {}
+        # Bumped for changes that affect every organization (collection cutover, unscoped deletes)
+        self._epoch = 0
+        self._stats: dict[str, _Stats] = {}
+        self._lock = threading.Lock()
+
+    def generation(self, org_id: str | None) -> tuple[int, int]:
+        with self._lock:
+            return self._epoch, self._generations.get(org_id or "", 0)
+
+    def bump_generation(self, org_id: str | None = None) -> None:
+        """Invalidate an organization's cached results; None invalidates every organization."""
+        with self._lock:
+            if org_id:
+                self._generations[org_id] = self._generations.get(org_id, 0) + 1
+            else:
+                self._epoch += 1
+
+    def key(self, org_id: str | None, mode: str, query: str, top_k: int, **filters) -> tuple:
+        """Cache key for a search, bound to the organization's current index generation."""
+        normalized = " ".join(query.split())
+        if mode != "boolean":
+            # Operators are case-sensitive in boolean queries only
+            normalized = normalized.casefold()
+        return (org_id or "", self.generation(org_id), mode, normalized, top_k, tuple(sorted(filters.items())))
+
+    def get(self, key: tuple) -> list[Citation] | None:
+        org = key[0]
+        with self._lock:
+            stats = self._stats.setdefault(org, _Stats())
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            stats.hits += 1
+            return list(entry[1])
+
+    def put(self, key: tuple, results: list[Citation]) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self, org_id: str | None) -> dict:
+        org = org_id or ""
+        with self._lock:
+            stats = self._stats.get(org, _Stats())
+            entries = sum(1 for key in self._entries if key[0] == org)
+        lookups = stats.hits + stats.misses
+        return {
+            "hits": stats.hits,
+            "misses": stats.misses,
+            "hit_rate": round(stats.hits / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+
+_cache: SearchCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> SearchCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_settings()
+                _cache = SearchCache(settings.search_cache_max_entries, settings.search_cache_ttl_seconds)
+    return _cache
+
+
+def bump_generation(org_id: str | None = None) -> None:
+    get_cache().bump_generation(org_id)
@@ -0,0 +1,98 @@
+"""Server-side ranked candidate lists behind opaque /search cursors.
+
+A paginated search retrieves ``search_cursor_depth`` ranked results once and
+keeps them here for a short TTL; further pages and CSV export slice the stored
+list instead of re-running retrieval. A cursor string names the stored list and
+an offset into it, and is only valid for the organization that created it.
+Like the result cache, cursors live in process memory.
+"""
+
+import base64
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from backend.core.settings import get_settings
+from backend.models.schemas import Citation
+
+
+@dataclass
+class CursorResults:
+    org_id: str
+    query: str
+    results: list[Citation]
+    grouped: bool = False  # Pages are returned with per-document groups
+    mode: str = "semantic"  # With rank_query, how each served page is highlighted
+    rank_query: str = ""
+
+
+class CursorStore:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, CursorResults]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(
+        self, org_id: str, query: str, results: list[Citation], grouped: bool = False,
+        mode: str = "semantic", rank_query: str = "",
+    ) -> str:
+        """Store a ranked list (unhighlighted; pages are highlighted as they are served); returns its token."""
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            self._entries[token] = (
+                time.monotonic(), CursorResults(org_id, query, list(results), grouped, mode, rank_query),
+            )
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return token
+
+    def get(self, token: str, org_id: str) -> CursorResults | None:
+        """The stored list, or None if it expired, was evicted or belongs to another organization."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            created, stored = entry
+            if time.monotonic() - created > self.ttl_seconds:
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+        return stored if stored.org_id == org_id else None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def encode(token: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{token}:{offset}".encode()).decode().rstrip("=")
+
+
+def decode(cursor: str) -> tuple[str, int]:
+    """Split a cursor into (token, offset); raises ValueError for malformed input."""
+    try:
+        token, offset = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().rsplit(":", 1)
+        position = int(offset)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Malformed cursor") from e
+    if position < 0:
+        # A negative offset would slice from the end of the stored results
+        raise ValueError("Malformed cursor")
+    return token, position
+
+
+_store: CursorStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> CursorStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                settings = get_settings()
+                _store = CursorStore(settings.search_cursor_max_entries, settings.search_cursor_ttl_seconds)
+    return _store
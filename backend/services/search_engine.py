@@ -1,44 +1,191 @@
 import logging
 
+import numpy as np
+
+from backend.core.settings import get_settings
+from backend.core.tracing import span
 from backend.models.schemas import Citation
-from backend.services import vector_store
-from backend.services.embeddings import embed_query
+from backend.services import lexical_index, vector_store
+from backend.services.embeddings import embed_texts, query_embedding
+from backend.services.vectordb.base import StoredChunk, VectorHit
 
 logger = logging.getLogger(__name__)
 
+# Reciprocal-rank fusion constant; damps the influence of the very top ranks
+RRF_K = 60
+# Boolean matches (best BM25 first) re-scored when ranking them semantically
+BOOLEAN_RERANK_LIMIT = 500
 
-def semantic_search(query: str, top_k: int = 10) -> list[Citation]:
-    query_embedding = embed_query(query)
-    results = vector_store.search(query_embedding, top_k=top_k)
-
-    citations: list[Citation] = []
 
-    if not results["ids"] or not results["ids"][0]:
-        return citations
+def _to_citation(hit: VectorHit | StoredChunk, score: float | None = None) -> Citation:
+    if score is None:
+        # Cosine distance: 0 = identical, 2 = opposite
+        # Convert to similarity score: 1 - (distance / 2)
+        score = max(0.0, 1.0 - (hit.distance / 2.0))
+    meta = hit.metadata
 
-    ids = results["ids"][0]
-    documents = results["documents"][0] if results["documents"] else []
-    metadatas = results["metadatas"][0] if results["metadatas"] else []
-    distances = results["distances"][0] if results["distances"] else []
+    return Citation(
+        document_id=meta.get("document_id", ""),
+        document_name=meta.get("document_name", "Unknown"),
+        page=meta.get("page") or None,
+        paragraph=meta.get("paragraph"),
+        text=hit.text,
+        score=round(score, 4),
+        chunk_id=hit.id,
+    )
 
-    for i, doc_id in enumerate(ids):
-        # ChromaDB cosine distance: 0 = identical, 2 = opposite
-        # Convert to similarity score: 1 - (distance / 2)
-        distance = distances[i] if i < len(distances) else 1.0
-        score = max(0.0, 1.0 - (distance / 2.0))
 
-        meta = metadatas[i] if i < len(metadatas) else {}
-        text = documents[i] if i < len(documents) else ""
+def semantic_search(
+    query: str, top_k: int = 10, org_id: str | None = None, where: dict | None = None,
+) -> list[Citation]:
+    query_vector = query_embedding(query, vector_store.get_active_model())
+    hits = vector_store.search(query_vector, top_k=top_k, org_id=org_id, where=where)
 
-        citations.append(Citation(
-            document_id=meta.get("document_id", ""),
-            document_name=meta.get("document_name", "Unknown"),
-            page=meta.get("page") or None,
-            paragraph=meta.get("paragraph"),
-            text=text,
-            score=round(score, 4),
-        ))
+    citations = [_to_citation(hit) for hit in hits]
 
     # Sort by score descending
     citations.sort(key=lambda c: c.score, reverse=True)
     return citations
+
+
+def multi_query_search(
+    queries: list[str],
+    top_k: int = 10,
+    org_id: str | None = None,
+    fusion: str = "max",
+    where: dict | None = None,
+) -> list[Citation]:
+    """Search several phrasings of one information need with a single embedding batch and store query.
+
+    Hits are deduplicated by chunk ID. ``fusion="max"`` ranks each chunk by its
+    best score across queries; ``fusion="rrf"`` ranks by reciprocal-rank fusion,
+    favouring chunks that several phrasings agree on. Citation scores remain the
+    chunk's best cosine similarity either way.
+    """
+    if fusion not in ("max", "rrf"):
+        raise ValueError(f"Unknown fusion method: {fusion}")
+    if not queries:
+        return []
+
+    embeddings = embed_texts(queries, vector_store.get_active_model())
+    hit_lists = vector_store.search_many(embeddings, top_k=top_k, org_id=org_id, where=where)
+
+    best: dict[str, Citation] = {}
+    rrf: dict[str, float] = {}
+    for hits in hit_lists:
+        for rank, hit in enumerate(hits):
+            citation = _to_citation(hit)
+            if hit.id not in best or citation.score > best[hit.id].score:
+                best[hit.id] = citation
+            rrf[hit.id] = rrf.get(hit.id, 0.0) + 1.0 / (RRF_K + rank + 1)
+
+    if fusion == "rrf":
+        order = sorted(best, key=lambda chunk_id: (rrf[chunk_id], best[chunk_id].score), reverse=True)
+    else:
+        order = sorted(best, key=lambda chunk_id: best[chunk_id].score, reverse=True)
+    return [best[chunk_id] for chunk_id in order[:top_k]]
+
+
+def hybrid_search(
+    query: str,
+    top_k: int = 10,
+    org_id: str | None = None,
+    where: dict | None = None,
+    document_ids: set[str] | None = None,
+) -> list[Citation]:
+    """Dense and BM25 candidates fused by reciprocal rank.
+
+    Each side contributes ``top_k × hybrid_candidate_multiplier`` candidates, so
+    a chunk that only matches an exact term (a section number, an amount, a
+    defined term) can still reach the top ``top_k``. Citation scores are the
+    fused score scaled so that ranking first on both sides is 1.0. Filters are
+    applied inside both indexes: ``where`` on chunk metadata, ``document_ids``
+    (the documents passing the same filters) on the term index.
+    """
+    depth = top_k * get_settings().hybrid_candidate_multiplier
+    query_vector = query_embedding(query, vector_store.get_active_model())
+    dense = vector_store.search(query_vector, top_k=depth, org_id=org_id, where=where)
+    with span("bm25"):
+        lexical = lexical_index.search(query, top_k=depth, org_id=org_id, document_ids=document_ids)
+
+    fused: dict[str, float] = {}
+    for ranked in ([hit.id for hit in dense], [chunk_id for chunk_id, _ in lexical]):
+        for rank, chunk_id in enumerate(ranked):
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    order = sorted(fused, key=fused.get, reverse=True)[:top_k]
+
+    hits: dict[str, VectorHit | StoredChunk] = {hit.id: hit for hit in dense}
+    # Lexical-only hits have no payload yet; fetch them in one call
+    missing = [chunk_id for chunk_id in order if chunk_id not in hits]
+    hits.update((chunk.id, chunk) for chunk in vector_store.get_chunks(missing, org_id))
+
+    best = 2.0 / (RRF_K + 1)
+    return [
+        _to_citation(hits[chunk_id], round(fused[chunk_id] / best, 4))
+        for chunk_id in order
+        if chunk_id in hits  # Term index can briefly lag a vector-store delete
+    ]
+
+
+def boolean_search(
+    query: str,
+    top_k: int = 10,
+    org_id: str | None = None,
+    rank_query: str = "",
+    document_ids: set[str] | None = None,
+) -> list[Citation]:
+    """Chunks matching a boolean/phrase/proximity query (see ``services/query_language.py``).
+
+    Matches are ranked by BM25 over the query's terms, with scores scaled so
+    the best match is 1.0. With ``rank_query``, the best ``BOOLEAN_RERANK_LIMIT``
+    matches are instead ranked by cosine similarity to it, scored like
+    :func:`semantic_search`. ``document_ids`` restricts matches to those
+    documents. Raises ``QuerySyntaxError`` for malformed queries.
+    """
+    limit = BOOLEAN_RERANK_LIMIT if rank_query else top_k
+    with span("boolean_match"):
+        matches, _ = lexical_index.boolean_search(query, limit, org_id, document_ids)
+    if not matches:
+        return []
+    chunks = {
+        chunk.id: chunk
+        for chunk in vector_store.get_chunks([chunk_id for chunk_id, _ in matches], org_id, include_embeddings=bool(rank_query))
+    }
+    if rank_query:
+        ranked = [chunks[chunk_id] for chunk_id, _ in matches if chunk_id in chunks and chunks[chunk_id].embedding]
+        if not ranked:
+            return []
+        query_vector = np.asarray(query_embedding(rank_query, vector_store.get_active_model()), dtype=np.float32)
+        matrix = np.asarray([chunk.embedding for chunk in ranked], dtype=np.float32)
+        cosine = matrix @ query_vector / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector) + 1e-12)
+        order = np.argsort(-cosine, kind="stable")[:top_k]
+        return [_to_citation(ranked[i], round(max(0.0, (1.0 + float(cosine[i])) / 2.0), 4)) for i in order]
+    best = matches[0][1] or 1.0
+    return [
+        _to_citation(chunks[chunk_id], round(score / best, 4))
+        for chunk_id, score in matches
+        if chunk_id in chunks
+    ]
+
+
+def similar_chunks(
+    chunk_id: str,
+    top_k: int = 10,
+    org_id: str | None = None,
+    exclude_document: bool = False,
+) -> list[Citation] | None:
+    """Nearest neighbours of a stored chunk, by the embedding already in the store (no model call).
+
+    The source chunk itself is left out, as is the rest of its document with
+    ``exclude_document``. Returns None when the chunk does not exist for this
+    organization.
+    """
+    source = vector_store.get_chunks([chunk_id], org_id, include_embeddings=True)
+    if not source or not source[0].embedding:
+        return None
+    where = None
+    if exclude_document:
+        where = {"document_id": {"$ne": source[0].metadata.get("document_id", "")}}
+    # One extra hit covers the source chunk, which is its own nearest neighbour
+    hits = vector_store.search(source[0].embedding, top_k=top_k + 1, org_id=org_id, where=where)
+    return [_to_citation(hit) for hit in hits if hit.id != chunk_id][:top_k]
@@ -0,0 +1,101 @@
+"""Document attributes copied into chunk metadata, and search filters over them.
+
+Matter, client, tags, document type and upload date live on the MongoDB
+document record; ingestion copies them onto every chunk and
+``PUT /documents/{id}/matter`` keeps them in sync, so filters run inside the
+vector query instead of over-fetching and filtering afterwards. Tags become
+boolean keys (``tag_<slug>``) because chunk metadata holds scalars only.
+"""
+
+import re
+from datetime import datetime, timezone
+
+from backend.core.database import get_db
+from backend.models.schemas import SearchFilters
+
+TAG_PREFIX = "tag_"
+
+
+def tag_key(tag: str) -> str:
+    return TAG_PREFIX + re.sub(r"[^a-z0-9]+", "_", tag.strip().lower()).strip("_")
+
+
+def _timestamp(value: datetime) -> int:
+    # Motor returns naive UTC datetimes
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def chunk_attributes(doc: dict, previous_tags: list[str] | None = None) -> dict:
+    """Chunk metadata for a document record; tags no longer present are switched off."""
+    attributes: dict = {
+        "matter": doc.get("matter", ""),
+        "client": doc.get("client", ""),
+        "document_type": doc.get("document_type", ""),
+    }
+    if doc.get("uploaded_at"):
+        attributes["uploaded_ts"] = _timestamp(doc["uploaded_at"])
+    # Metadata updates merge, so removed tags must be written as False
+    for tag in previous_tags or []:
+        if tag.strip():
+            attributes[tag_key(tag)] = False
+    for tag in doc.get("tags", []):
+        if tag.strip():
+            attributes[tag_key(tag)] = True
+    return attributes
+
+
+def where_clause(filters: SearchFilters | None) -> dict | None:
+    """Chroma-style where clause over chunk metadata; None when nothing is filtered."""
+    if filters is None:
+        return None
+    clauses: list[dict] = []
+    if filters.matter:
+        clauses.append({"matter": filters.matter})
+    if filters.client:
+        clauses.append({"client": filters.client})
+    if filters.document_type:
+        clauses.append({"document_type": filters.document_type})
+    clauses.extend({tag_key(tag): True} for tag in filters.tags if tag.strip())
+    if filters.date_from:
+        clauses.append({"uploaded_ts": {"$gte": _timestamp(filters.date_from)}})
+    if filters.date_to:
+        clauses.append({"uploaded_ts": {"$lte": _timestamp(filters.date_to)}})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+async def matching_document_ids(org_id: str, filters: SearchFilters | None) -> set[str] | None:
+    """IDs of the organization's documents passing the filters (None when unfiltered).
+
+    The term index holds no document attributes, so lexical search is
+    restricted to this set instead.
+    """
+    if where_clause(filters) is None:
+        return None
+    query: dict = {"organization_id": org_id}
+    if filters.matter:
+        query["matter"] = filters.matter
+    if filters.client:
+        query["client"] = filters.client
+    if filters.document_type:
+        query["document_type"] = filters.document_type
+    wanted = {tag_key(tag) for tag in filters.tags if tag.strip()}
+    if filters.date_from or filters.date_to:
+        query["uploaded_at"] = {}
+        if filters.date_from:
+            query["uploaded_at"]["$gte"] = filters.date_from
+        if filters.date_to:
+            query["uploaded_at"]["$lte"] = filters.date_to
+    if not wanted:
+        cursor = get_db().documents.find(query, {"_id": 0, "document_id": 1})
+        return {doc["document_id"] async for doc in cursor}
+    # Tags are compared by tag_key, the same normalisation the chunk metadata (dense side) uses
+    query["tags"] = {"$exists": True, "$ne": []}
+    cursor = get_db().documents.find(query, {"_id": 0, "document_id": 1, "tags": 1})
+    return {
+        doc["document_id"] async for doc in cursor
+        if wanted <= {tag_key(tag) for tag in doc.get("tags", []) if tag.strip()}
+    }
@@ -0,0 +1,79 @@
+"""Heartbeats that tell maintenance scripts an API server is running.
+
+The lexical index and the NumPy vector backend append to their files at
+in-memory write positions, and the server keeps term statistics, chunk counts
+and search-cache generations in memory, so a second process writing the same
+stores corrupts or silently outdates them. Each API process upserts a
+``server:<owner>`` document in ``vector_index_state`` every
+``server_heartbeat_seconds``; scripts that write the stores check
+:func:`running_servers` first and refuse to run while any heartbeat is fresh.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from backend.core.database import get_db
+from backend.core.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "server:"
+# A heartbeat older than this many intervals means the process is gone
+STALE_AFTER_BEATS = 3
+
+_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+_task: asyncio.Task | None = None
+
+
+async def beat() -> None:
+    interval = get_settings().server_heartbeat_seconds
+    now = datetime.now(timezone.utc)
+    await get_db().vector_index_state.update_one(
+        {"_id": PREFIX + _owner},
+        {"$set": {"seen_at": now, "expires_at": now + timedelta(seconds=interval * STALE_AFTER_BEATS)}},
+        upsert=True,
+    )
+
+
+async def running_servers() -> list[str]:
+    """Owners of API processes whose heartbeat has not expired."""
+    cursor = get_db().vector_index_state.find(
+        {"_id": {"$regex": f"^{PREFIX}"}, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+        {"_id": 1},
+    )
+    return [doc["_id"][len(PREFIX):] async for doc in cursor]
+
+
+async def _loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await beat()
+        except Exception as e:
+            logger.warning(f"Server heartbeat failed: {e}")
+
+
+async def start_heartbeat() -> None:
+    global _task
+    await beat()
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_loop(get_settings().server_heartbeat_seconds))
+
+
+async def stop_heartbeat() -> None:
+    global _task
+    if _task and not _task.done():
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+    _task = None
+    try:
+        await get_db().vector_index_state.delete_one({"_id": PREFIX + _owner})
+    except Exception as e:
+        logger.warning(f"Could not clear server heartbeat: {e}")
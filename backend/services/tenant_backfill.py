@@ -0,0 +1,106 @@
+"""Tag chunks indexed before tenant partitioning with their organization_id.
+
+Vector-store reads, counts and deletes are scoped by ``organization_id`` in
+chunk metadata, so chunks from an install that predates it are invisible to
+their tenant until tagged. :func:`init_tenant_backfill` runs the tagging in the
+background at startup for any collection not yet marked done in
+``vector_index_state``; ``backend.scripts.backfill_chunk_tenants`` runs it by
+hand. Re-running is safe: chunks that already carry a tenant are skipped.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from backend.core.database import get_db
+from backend.core.settings import get_settings
+from backend.services import search_cache, vector_store
+from backend.services.vectordb.base import TENANT_KEY
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+
+_task: asyncio.Task | None = None
+
+
+def _state_id(collection: str) -> str:
+    return f"tenants:{collection}"
+
+
+async def is_backfilled(collection: str | None = None) -> bool:
+    state = await get_db().vector_index_state.find_one(
+        {"_id": _state_id(collection or vector_store.get_active_collection_name())}
+    )
+    return bool(state and state.get("completed_at"))
+
+
+async def backfill() -> int:
+    """Tag every untagged chunk of the active collection with its document's organization; returns chunks tagged."""
+    db = get_db()
+    collection = vector_store.get_active_collection_name()
+    store = vector_store.get_store()
+
+    org_by_doc: dict[str, str] = {}
+    offset = updated = 0
+    while True:
+        chunks = await asyncio.to_thread(store.get, offset=offset, limit=PAGE_SIZE)
+        if not chunks:
+            break
+        offset += len(chunks)
+
+        untagged = [c for c in chunks if not c.metadata.get(TENANT_KEY)]
+        for c in untagged:
+            doc_id = c.metadata.get("document_id", "")
+            if doc_id not in org_by_doc:
+                doc = await db.documents.find_one({"document_id": doc_id}, {"organization_id": 1})
+                org_by_doc[doc_id] = doc.get("organization_id", "") if doc else ""
+
+        tagged = [c for c in untagged if org_by_doc.get(c.metadata.get("document_id", ""))]
+        if tagged:
+            await asyncio.to_thread(
+                store.update_metadata,
+                [c.id for c in tagged],
+                [{TENANT_KEY: org_by_doc[c.metadata["document_id"]]} for c in tagged],
+            )
+            updated += len(tagged)
+        # Throttle so live search and ingestion keep priority
+        await asyncio.sleep(get_settings().reindex_throttle_seconds)
+
+    if updated:
+        # Tagged chunks move into their tenants' counts and search results
+        await asyncio.to_thread(vector_store.reconcile_counts)
+        for org_id in {org for org in org_by_doc.values() if org}:
+            search_cache.bump_generation(org_id)
+    await db.vector_index_state.update_one(
+        {"_id": _state_id(collection)},
+        {"$set": {"completed_at": datetime.now(timezone.utc), "tagged": updated}},
+        upsert=True,
+    )
+    logger.info(f"Tagged {updated} chunks with their organization ({offset} scanned)")
+    return updated
+
+
+async def init_tenant_backfill() -> None:
+    """Start a background tenant backfill if the active collection has not had one."""
+    global _task
+    if not await is_backfilled():
+        logger.info("Tagging chunks indexed before tenant partitioning with their organization")
+        _task = asyncio.create_task(backfill())
+
+
+async def wait() -> None:
+    """Return once a running background backfill has finished."""
+    if _task is not None and not _task.done():
+        await asyncio.shield(_task)
+
+
+async def stop_backfill() -> None:
+    global _task
+    if _task and not _task.done():
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+    _task = None
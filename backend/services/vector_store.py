@@ -1,23 +1,117 @@
+"""Vector index facade: routes chunk writes and searches to the configured backend.
+
+Backends implement :class:`backend.services.vectordb.base.VectorStore`;
+``VECTOR_BACKEND`` selects ChromaDB (default) or the in-process NumPy store.
+One store is opened per collection, and collections are versioned by
+embedding model (see ``services/reindex.py``).
+
+Chunk counts are kept in memory per collection and tenant: seeded from the
+store on first use, adjusted on add/delete, and recounted periodically by a
+background task, so neither search nor ``/stats`` pays a count round trip.
+
+Chunk text is also written to the per-tenant term index
+(``services/lexical_index.py``) used by hybrid search, and every write bumps
+the tenant's search cache generation (``services/search_cache.py``).
+"""
+
 from __future__ import annotations
 
+import asyncio
 import logging
+import re
+import threading
 from typing import Optional
 
 import chromadb
 
 from backend.core.settings import get_settings
+from backend.core.tracing import span
+from backend.services import clause_index, lexical_index, search_cache
 from backend.services.chunker import Chunk
 from backend.services.embeddings import embed_texts
+from backend.services.vectordb.base import (
+    TENANT_KEY,
+    StoredChunk,
+    VectorHit,
+    VectorStore,
+)
 
 logger = logging.getLogger(__name__)
 
 _client: Optional[chromadb.ClientAPI] = None
-_collection: Optional[chromadb.Collection] = None
+_stores: dict[str, VectorStore] = {}
+_stores_lock = threading.Lock()
+
+# (collection name, embedding model) currently serving reads and writes
+_active: tuple[str, str] | None = None
+# (collection name, embedding model) being filled by a re-embedding migration
+_shadow: tuple[str, str] | None = None
+_pointer_lock = threading.Lock()
+
+
+class _ChunkCounts:
+    """Chunk counts per (collection, tenant); tenant None is the whole collection."""
+
+    def __init__(self):
+        self._counts: dict[tuple[str, str | None], int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, collection: str, tenant: str | None, store: VectorStore) -> int:
+        key = (collection, tenant)
+        with self._lock:
+            if key in self._counts:
+                return self._counts[key]
+        count = store.count(tenant=tenant)
+        with self._lock:
+            return self._counts.setdefault(key, count)
+
+    def adjust(self, collection: str, tenant: str | None, delta: int) -> None:
+        with self._lock:
+            if tenant is None and delta < 0:
+                # Unknown tenant: drop per-tenant counts for this collection so they reseed
+                for key in [k for k in self._counts if k[0] == collection and k[1] is not None]:
+                    del self._counts[key]
+            for key in {(collection, tenant), (collection, None)}:
+                if key in self._counts:
+                    self._counts[key] = max(0, self._counts[key] + delta)
+
+    def invalidate(self, collection: str, tenant: str | None) -> None:
+        with self._lock:
+            self._counts.pop((collection, tenant), None)
+            self._counts.pop((collection, None), None)
+
+    def forget(self, collection: str) -> None:
+        with self._lock:
+            for key in [k for k in self._counts if k[0] == collection]:
+                del self._counts[key]
+
+    def reconcile(self) -> int:
+        """Recount every tracked entry from its store; returns how many had drifted."""
+        with self._lock:
+            keys = list(self._counts)
+        drifted = 0
+        for collection, tenant in keys:
+            store = _stores.get(collection)
+            if store is None:
+                continue
+            count = store.count(tenant=tenant)
+            with self._lock:
+                if self._counts.get((collection, tenant), count) != count:
+                    drifted += 1
+                self._counts[(collection, tenant)] = count
+        return drifted
+
+
+_counts = _ChunkCounts()
 
+# Documents per filter delete; keeps $in lists well inside backend limits
+DELETE_BATCH_SIZE = 500
+_reconcile_task: asyncio.Task | None = None
 
-def _get_collection() -> chromadb.Collection:
-    global _client, _collection
-    if _collection is None:
+
+def _get_client() -> chromadb.ClientAPI:
+    global _client
+    if _client is None:
         settings = get_settings()
 
         if settings.use_chroma_http:
@@ -32,23 +126,131 @@ def _get_collection() -> chromadb.Collection:
             chroma_dir.mkdir(parents=True, exist_ok=True)
             _client = chromadb.PersistentClient(path=str(chroma_dir))
             logger.info(f"ChromaDB PersistentClient → {chroma_dir}")
+    return _client
+
+
+def _create_store(name: str, model_name: str) -> VectorStore:
+    settings = get_settings()
+    if settings.vector_backend == "numpy":
+        from backend.services.vectordb.ivfpq import IVFPQConfig
+        from backend.services.vectordb.numpy_store import NumpyVectorStore
+        index_config = None
+        if settings.vector_index_mode == "ivfpq":
+            index_config = IVFPQConfig(
+                nlist=settings.ivfpq_nlist,
+                nprobe=settings.ivfpq_nprobe,
+                subvectors=settings.ivfpq_subvectors,
+                rerank_candidates=settings.ivfpq_rerank_candidates,
+                min_rows=settings.ivfpq_min_rows,
+            )
+        elif settings.vector_index_mode != "exact":
+            raise ValueError(f"Unknown VECTOR_INDEX_MODE: {settings.vector_index_mode}")
+        return NumpyVectorStore(settings.vectors_dir / name, index_config)
+    if settings.vector_backend != "chroma":
+        raise ValueError(f"Unknown VECTOR_BACKEND: {settings.vector_backend}")
+    from backend.services.vectordb.chroma import ChromaVectorStore
+    return ChromaVectorStore(_get_client(), name, model_name)
+
+
+def get_store(name: str | None = None, model_name: str | None = None) -> VectorStore:
+    """Store for a collection; defaults to the active one."""
+    if name is None:
+        name, model_name = _active_pointer()
+    store = _stores.get(name)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(name)
+            if store is None:
+                store = _create_store(name, model_name or get_settings().embedding_model_name)
+                _stores[name] = store
+    return store
+
+
+def collection_name_for(model_name: str) -> str:
+    """Versioned collection name for an embedding model, e.g. legal_documents__all-minilm-l6-v2."""
+    slug = re.sub(r"[^a-z0-9]+", "-", model_name.lower()).strip("-")
+    # Chroma names are limited to 63 characters and must end alphanumerically
+    return f"{get_settings().chroma_collection_name}__{slug}"[:63].rstrip("-_")
+
+
+def _active_pointer() -> tuple[str, str]:
+    if _active is None:
+        settings = get_settings()
+        return settings.chroma_collection_name, settings.embedding_model_name
+    return _active
+
+
+def get_active_collection_name() -> str:
+    return _active_pointer()[0]
+
+
+def get_active_model() -> str:
+    """Embedding model that query vectors must be produced with."""
+    return _active_pointer()[1]
 
-        _collection = _client.get_or_create_collection(
-            name=settings.chroma_collection_name,
-            metadata={"hnsw:space": "cosine"},
-        )
-        logger.info(f"ChromaDB collection '{settings.chroma_collection_name}' ready with {_collection.count()} items")
-    return _collection
 
+def set_active_collection(name: str, model_name: str) -> None:
+    global _active
+    with _pointer_lock:
+        _active = (name, model_name)
+    search_cache.bump_generation()
+    logger.info(f"Serving vectors from '{name}' ({model_name})")
 
-def add_chunks(chunks: list[Chunk]) -> int:
+
+def set_shadow_collection(name: str | None, model_name: str | None = None) -> None:
+    """Start (or stop, with None) dual-writing new chunks into a shadow collection."""
+    global _shadow
+    with _pointer_lock:
+        _shadow = (name, model_name) if name and model_name else None
+
+
+def promote_shadow() -> tuple[str, str]:
+    """Atomically make the shadow collection the active one."""
+    global _active, _shadow
+    with _pointer_lock:
+        if _shadow is None:
+            raise RuntimeError("No shadow collection to promote")
+        _active, _shadow = _shadow, None
+        promoted = _active
+    # Chunks were copied into it directly; count afresh
+    _counts.forget(promoted[0])
+    search_cache.bump_generation()
+    logger.info(f"Cut over to collection '{promoted[0]}' ({promoted[1]})")
+    return promoted
+
+
+def _write_targets() -> list[tuple[str, str]]:
+    with _pointer_lock:
+        targets = [_active_pointer()]
+        if _shadow is not None:
+            targets.append(_shadow)
+    return targets
+
+
+def drop_collection(name: str) -> None:
+    with _stores_lock:
+        store = _stores.pop(name, None)
+    _counts.forget(name)
+    try:
+        (store or _create_store(name, get_settings().embedding_model_name)).drop()
+    except Exception:
+        pass  # Did not exist
+
+
+def add_chunks(chunks: list[Chunk], org_id: str = "", generation: int = 1, attributes: dict | None = None) -> int:
+    """Idempotently write a document's chunks, then drop chunks left over from earlier runs.
+
+    Chunk IDs are deterministic, so a retry upserts over whatever a failed run
+    wrote. Every chunk carries the run's ``index_generation``; one filter delete
+    afterwards removes chunks from older generations (e.g. a previous run that
+    produced more chunks). ``attributes`` (matter, client, tags, ...; see
+    ``services/search_filters.py``) are copied onto every chunk.
+    """
     if not chunks:
         return 0
 
-    collection = _get_collection()
+    document_id = chunks[0].document_id
     texts = [c.text for c in chunks]
-    embeddings = embed_texts(texts)
-
     ids = [f"{c.document_id}_chunk_{c.chunk_index}" for c in chunks]
     metadatas = [
         {
@@ -57,45 +259,145 @@ def add_chunks(chunks: list[Chunk]) -> int:
             "page": c.page or 0,
             "paragraph": c.paragraph,
             "chunk_index": c.chunk_index,
+            "index_generation": generation,
+            **(attributes or {}),
+            TENANT_KEY: org_id,
         }
         for c in chunks
     ]
+    # Older chunks of this document; those without a generation predate it and are caught by chunk_index
+    stale = {"$and": [
+        {"document_id": document_id},
+        {"$or": [{"index_generation": {"$lt": generation}}, {"chunk_index": {"$gte": len(chunks)}}]},
+    ]}
+    # Chroma merges metadata on upsert, so a rerun must explicitly zero clause tags that no longer apply
+    cleared_tags = {clause_index.tag_key(c["id"]): 0.0 for c in clause_index.CLAUSE_CATEGORIES} if generation > 1 else {}
 
-    # ChromaDB has a batch limit; process in batches of 500
-    batch_size = 500
-    for i in range(0, len(ids), batch_size):
-        end = i + batch_size
-        collection.add(
-            ids=ids[i:end],
-            embeddings=embeddings[i:end],
-            documents=texts[i:end],
-            metadatas=metadatas[i:end],
-        )
-
-    logger.info(f"Added {len(chunks)} chunks for document {chunks[0].document_id}")
+    # While a migration runs, new chunks go to both collections, each embedded with its own model
+    for name, model_name in _write_targets():
+        embeddings = embed_texts(texts, model_name)
+        tagged = [
+            {**meta, **cleared_tags, **tags}
+            for meta, tags in zip(metadatas, clause_index.tag_embeddings(embeddings, model_name))
+        ]
+        store = get_store(name, model_name)
+        store.upsert(ids, embeddings, texts, tagged)
+        removed = store.delete(tenant=org_id or None, where=stale) if generation > 1 else 0
+        if generation > 1:
+            # Upserts over existing chunks do not change the count; recount lazily
+            _counts.invalidate(name, org_id or None)
+        else:
+            _counts.adjust(name, org_id or None, len(ids))
+        if removed:
+            logger.info(f"Removed {removed} stale chunks of document {document_id} from '{name}'")
+
+    # The term index is model-independent: one write covers every target collection
+    lexical = lexical_index.get_index()
+    if generation > 1:
+        lexical.delete_documents([document_id], org_id or None)
+    lexical.add(org_id or None, ids, [c.document_id for c in chunks], texts)
+    search_cache.bump_generation(org_id or None)
+
+    logger.info(f"Indexed {len(chunks)} chunks for document {document_id} (generation {generation})")
     return len(chunks)
 
 
-def search(query_embedding: list[float], top_k: int = 10) -> dict:
-    collection = _get_collection()
-    results = collection.query(
-        query_embeddings=[query_embedding],
-        n_results=min(top_k, collection.count() or 1),
-        include=["documents", "metadatas", "distances"],
-    )
-    return results
+def search(
+    query_embedding: list[float], top_k: int = 10, org_id: str | None = None, where: dict | None = None,
+) -> list[VectorHit]:
+    with span("vector_search"):
+        return get_store().search([query_embedding], top_k, tenant=org_id, where=where)[0]
+
+
+def search_many(
+    query_embeddings: list[list[float]], top_k: int = 10, org_id: str | None = None, where: dict | None = None,
+) -> list[list[VectorHit]]:
+    """One vectorized store query for several embeddings; one hit list per query."""
+    if not query_embeddings:
+        return []
+    with span("vector_search"):
+        return get_store().search(query_embeddings, top_k, tenant=org_id, where=where)
+
+
+def update_document_metadata(document_id: str, org_id: str, metadata: dict) -> int:
+    """Merge metadata into every chunk of a document (in all write targets); returns chunks updated."""
+    updated = 0
+    for index, (name, model_name) in enumerate(_write_targets()):
+        store = get_store(name, model_name)
+        ids = store.list_ids(tenant=org_id or None, where={"document_id": document_id})
+        if ids:
+            store.update_metadata(ids, [metadata] * len(ids), tenant=org_id or None)
+        if index == 0:
+            updated = len(ids)
+    search_cache.bump_generation(org_id or None)
+    return updated
+
+
+def get_chunks(ids: list[str], org_id: str | None = None, include_embeddings: bool = False) -> list[StoredChunk]:
+    """Stored text and metadata (optionally embeddings) for chunk IDs, e.g. lexical-only hits."""
+    if not ids:
+        return []
+    with span("vector_fetch"):
+        return get_store().get(ids=ids, tenant=org_id, include_embeddings=include_embeddings)
+
+
+def delete_by_document_id(document_id: str, org_id: str | None = None) -> int:
+    return delete_documents([document_id], org_id)
+
+
+def delete_documents(document_ids: list[str], org_id: str | None = None) -> int:
+    """Delete every chunk of the given documents with filter deletes, batched by DELETE_BATCH_SIZE documents."""
+    deleted = 0
+    for index, (name, model_name) in enumerate(_write_targets()):
+        store = get_store(name, model_name)
+        count = 0
+        for i in range(0, len(document_ids), DELETE_BATCH_SIZE):
+            batch = document_ids[i:i + DELETE_BATCH_SIZE]
+            where = {"document_id": batch[0]} if len(batch) == 1 else {"document_id": {"$in": batch}}
+            count += store.delete(tenant=org_id, where=where)
+        _counts.adjust(name, org_id, -count)
+        if index == 0:
+            deleted = count
+    lexical_index.get_index().delete_documents(document_ids, org_id)
+    search_cache.bump_generation(org_id)
+    if deleted:
+        logger.info(f"Deleted {deleted} chunks for {len(document_ids)} documents")
+    return deleted
+
+
+def get_total_chunks(org_id: str | None = None) -> int:
+    """Chunk count from the in-memory counters; the store is only hit to seed a new entry."""
+    return _counts.get(get_active_collection_name(), org_id or None, get_store())
+
+
+def reconcile_counts() -> int:
+    drifted = _counts.reconcile()
+    if drifted:
+        logger.info(f"Reconciled {drifted} drifted chunk counts")
+    return drifted
+
+
+async def _reconcile_loop(interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(reconcile_counts)
+        except Exception as e:
+            logger.warning(f"Chunk count reconciliation failed: {e}")
 
 
-def delete_by_document_id(document_id: str) -> int:
-    collection = _get_collection()
-    existing = collection.get(where={"document_id": document_id})
-    if existing["ids"]:
-        collection.delete(ids=existing["ids"])
-        logger.info(f"Deleted {len(existing['ids'])} chunks for document {document_id}")
-        return len(existing["ids"])
-    return 0
+def start_count_reconciler() -> None:
+    global _reconcile_task
+    if _reconcile_task is None or _reconcile_task.done():
+        _reconcile_task = asyncio.create_task(_reconcile_loop(get_settings().chunk_count_reconcile_seconds))
 
 
-def get_total_chunks() -> int:
-    collection = _get_collection()
-    return collection.count()
+async def stop_count_reconciler() -> None:
+    global _reconcile_task
+    if _reconcile_task and not _reconcile_task.done():
+        _reconcile_task.cancel()
+        try:
+            await _reconcile_task
+        except asyncio.CancelledError:
+            pass
+    _reconcile_task = None
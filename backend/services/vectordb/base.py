@@ -0,0 +1,157 @@
+"""Abstract interface for vector store backends."""
+
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+
+# Metadata key that partitions chunks by tenant
+TENANT_KEY = "organization_id"
+
+
+@dataclass
+class VectorHit:
+    """One nearest-neighbour result. `distance` is cosine distance (0 = identical, 2 = opposite)."""
+    id: str
+    text: str
+    metadata: dict
+    distance: float
+
+
+@dataclass
+class StoredChunk:
+    id: str
+    text: str
+    metadata: dict
+    embedding: list[float] | None = field(default=None, repr=False)
+
+
+class VectorStore(ABC):
+    """Interface that every vector store backend must implement.
+
+    A store holds one collection (one embedding model). Writes carry the
+    tenant in ``metadata["organization_id"]``; reads take an optional
+    ``tenant`` that scopes them to that partition (None = all tenants).
+    ``where`` filters use the Chroma operator subset understood by
+    :func:`matches_where`.
+    """
+
+    name: str = "base"
+
+    @abstractmethod
+    def add(self, ids: list[str], embeddings: list[list[float]], documents: list[str], metadatas: list[dict]) -> None:
+        """Insert new chunks."""
+        ...
+
+    @abstractmethod
+    def upsert(self, ids: list[str], embeddings: list[list[float]], documents: list[str], metadatas: list[dict]) -> None:
+        """Insert chunks, replacing any with the same ID."""
+        ...
+
+    @abstractmethod
+    def update_metadata(self, ids: list[str], metadatas: list[dict], tenant: str | None = None) -> None:
+        """Merge the given keys into the metadata of existing chunks."""
+        ...
+
+    @abstractmethod
+    def search(
+        self,
+        query_embeddings: list[list[float]],
+        top_k: int,
+        tenant: str | None = None,
+        where: dict | None = None,
+    ) -> list[list[VectorHit]]:
+        """Return the top_k nearest chunks for each query, best first."""
+        ...
+
+    @abstractmethod
+    def get(
+        self,
+        ids: list[str] | None = None,
+        tenant: str | None = None,
+        where: dict | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+        include_embeddings: bool = False,
+    ) -> list[StoredChunk]:
+        """Fetch chunks by ID and/or filter, in stable storage order."""
+        ...
+
+    @abstractmethod
+    def list_ids(self, tenant: str | None = None, where: dict | None = None, page_size: int = 5000) -> list[str]:
+        """IDs of matching chunks without their payloads, fetched in pages."""
+        ...
+
+    def iter_ids(self, tenant: str | None = None, where: dict | None = None, page_size: int = 5000) -> Iterator[list[str]]:
+        """Pages of chunk IDs; backends override this to avoid holding every ID at once."""
+        ids = self.list_ids(tenant, where, page_size)
+        for i in range(0, len(ids), page_size):
+            yield ids[i:i + page_size]
+
+    @abstractmethod
+    def delete(self, ids: list[str] | None = None, tenant: str | None = None, where: dict | None = None) -> int:
+        """Delete chunks by ID and/or filter. Returns the number deleted."""
+        ...
+
+    @abstractmethod
+    def count(self, tenant: str | None = None, where: dict | None = None) -> int:
+        """Number of chunks, optionally scoped to a tenant and filter."""
+        ...
+
+    @abstractmethod
+    def drop(self) -> None:
+        """Delete the whole collection."""
+        ...
+
+
+def scoped_where(tenant: str | None, where: dict | None) -> dict | None:
+    """Combine a tenant scope with a caller filter into one Chroma-style where clause."""
+    clauses = []
+    if tenant is not None:
+        clauses.append({TENANT_KEY: tenant})
+    if where:
+        clauses.append(where)
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def _match_value(value, condition) -> bool:
+    if not isinstance(condition, dict):
+        return value == condition
+    for op, operand in condition.items():
+        if op == "$eq" and not value == operand:
+            return False
+        if op == "$ne" and not value != operand:
+            return False
+        if op == "$in" and value not in operand:
+            return False
+        if op == "$nin" and value in operand:
+            return False
+        if op in ("$gt", "$gte", "$lt", "$lte"):
+            if value is None:
+                return False
+            if op == "$gt" and not value > operand:
+                return False
+            if op == "$gte" and not value >= operand:
+                return False
+            if op == "$lt" and not value < operand:
+                return False
+            if op == "$lte" and not value <= operand:
+                return False
+    return True
+
+
+def matches_where(metadata: dict, where: dict | None) -> bool:
+    """Evaluate a Chroma-style where clause ($and/$or, $eq/$ne/$in/$nin/$gt/$gte/$lt/$lte) in Python."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, c) for c in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, c) for c in condition):
+                return False
+        elif not _match_value(metadata.get(key), condition):
+            return False
+    return True
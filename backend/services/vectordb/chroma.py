@@ -0,0 +1,141 @@
+"""ChromaDB vector store backend (HTTP or local persistent client)."""
+
+import logging
+
+import chromadb
+
+from backend.services.vectordb.base import (
+    StoredChunk,
+    VectorHit,
+    VectorStore,
+    scoped_where,
+)
+
+logger = logging.getLogger(__name__)
+
+# Chroma warns on every query whose n_results exceeds a small tenant's chunk count
+for _name in ("chromadb.segment.impl.vector.local_hnsw", "chromadb.segment.impl.vector.local_persistent_hnsw"):
+    logging.getLogger(_name).setLevel(logging.ERROR)
+
+# ChromaDB has a batch limit; process in batches of 500
+_BATCH_SIZE = 500
+
+
+class ChromaVectorStore(VectorStore):
+    name = "chroma"
+
+    def __init__(self, client: chromadb.ClientAPI, collection_name: str, model_name: str):
+        self.client = client
+        self.collection_name = collection_name
+        self.collection = client.get_or_create_collection(
+            name=collection_name,
+            metadata={"hnsw:space": "cosine", "embedding_model": model_name},
+        )
+        logger.info(f"ChromaDB collection '{collection_name}' ready with {self.collection.count()} items")
+
+    def add(self, ids, embeddings, documents, metadatas) -> None:
+        for i in range(0, len(ids), _BATCH_SIZE):
+            end = i + _BATCH_SIZE
+            self.collection.add(
+                ids=ids[i:end],
+                embeddings=embeddings[i:end],
+                documents=documents[i:end],
+                metadatas=metadatas[i:end],
+            )
+
+    def upsert(self, ids, embeddings, documents, metadatas) -> None:
+        for i in range(0, len(ids), _BATCH_SIZE):
+            end = i + _BATCH_SIZE
+            self.collection.upsert(
+                ids=ids[i:end],
+                embeddings=embeddings[i:end],
+                documents=documents[i:end],
+                metadatas=metadatas[i:end],
+            )
+
+    def update_metadata(self, ids, metadatas, tenant=None) -> None:
+        # Chroma merges the given keys into existing metadata
+        for i in range(0, len(ids), _BATCH_SIZE):
+            self.collection.update(ids=ids[i:i + _BATCH_SIZE], metadatas=metadatas[i:i + _BATCH_SIZE])
+
+    def search(self, query_embeddings, top_k, tenant=None, where=None) -> list[list[VectorHit]]:
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            # No count() round trip to clamp n_results: Chroma caps it to the index size itself
+            n_results=max(top_k, 1),
+            where=scoped_where(tenant, where),
+            include=["documents", "metadatas", "distances"],
+        )
+        hits: list[list[VectorHit]] = []
+        for q in range(len(query_embeddings)):
+            ids = results["ids"][q] if results["ids"] else []
+            documents = results["documents"][q] if results["documents"] else []
+            metadatas = results["metadatas"][q] if results["metadatas"] else []
+            distances = results["distances"][q] if results["distances"] else []
+            hits.append([
+                VectorHit(
+                    id=chunk_id,
+                    text=documents[i] if i < len(documents) else "",
+                    metadata=metadatas[i] if i < len(metadatas) else {},
+                    distance=distances[i] if i < len(distances) else 2.0,
+                )
+                for i, chunk_id in enumerate(ids)
+            ])
+        return hits
+
+    def get(self, ids=None, tenant=None, where=None, offset=0, limit=None, include_embeddings=False) -> list[StoredChunk]:
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        page = self.collection.get(
+            ids=ids,
+            where=scoped_where(tenant, where),
+            offset=offset or None,
+            limit=limit,
+            include=include,
+        )
+        documents = page["documents"] or []
+        metadatas = page["metadatas"] or []
+        embeddings = page["embeddings"] if include_embeddings and page["embeddings"] is not None else []
+        return [
+            StoredChunk(
+                id=chunk_id,
+                text=documents[i] if i < len(documents) else "",
+                metadata=metadatas[i] if i < len(metadatas) else {},
+                embedding=list(embeddings[i]) if i < len(embeddings) else None,
+            )
+            for i, chunk_id in enumerate(page["ids"])
+        ]
+
+    def list_ids(self, tenant=None, where=None, page_size=5000) -> list[str]:
+        return [chunk_id for page in self.iter_ids(tenant, where, page_size) for chunk_id in page]
+
+    def iter_ids(self, tenant=None, where=None, page_size=5000):
+        offset = 0
+        while True:
+            page = self.collection.get(
+                where=scoped_where(tenant, where), offset=offset, limit=page_size, include=[],
+            )
+            if not page["ids"]:
+                break
+            yield page["ids"]
+            offset += len(page["ids"])
+
+    def delete(self, ids=None, tenant=None, where=None) -> int:
+        if ids is None and tenant is None and not where:
+            raise ValueError("Refusing to delete without ids, tenant or filter; use drop()")
+        # Filter delete runs inside Chroma: no IDs or payloads come back over the wire.
+        # The deleted count is the drop in collection size (concurrent writes can skew it).
+        before = self.collection.count()
+        for i in range(0, len(ids or [None]), _BATCH_SIZE):
+            self.collection.delete(
+                ids=ids[i:i + _BATCH_SIZE] if ids is not None else None,
+                where=scoped_where(tenant, where),
+            )
+        return max(0, before - self.collection.count())
+
+    def count(self, tenant=None, where=None) -> int:
+        if tenant is None and not where:
+            return self.collection.count()
+        return len(self.list_ids(tenant, where))
+
+    def drop(self) -> None:
+        self.client.delete_collection(self.collection_name)
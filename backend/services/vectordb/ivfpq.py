@@ -0,0 +1,223 @@
+"""Inverted-file index with product-quantized residuals (IVF-PQ).
+
+Used by the NumPy backend for large partitions. The index itself keeps in RAM
+only the coarse centroids, the PQ codebooks and ``subvectors`` bytes of code
+per chunk (48 bytes instead of 768 for a 384-dim float16 vector); the
+partition's IDs and metadata stay resident alongside it, while texts are read
+from disk (see ``numpy_store``). Search probes the
+``nprobe`` closest inverted lists, ranks their members with asymmetric
+distance lookup tables, then re-scores a shortlist exactly against the
+memory-mapped float16 vectors.
+"""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_PQ_CENTROIDS = 256
+_KMEANS_ITERS = 12
+# Training points per centroid; more adds time without improving the clustering
+_POINTS_PER_CENTROID = 64
+_ASSIGN_BLOCK_ROWS = 8192
+
+
+@dataclass
+class IVFPQConfig:
+    nlist: int = 0  # 0 = about 4·√n lists
+    nprobe: int = 16
+    subvectors: int = 48
+    rerank_candidates: int = 200
+    min_rows: int = 50000
+    train_sample: int = 65536
+
+    def lists_for(self, rows: int) -> int:
+        return self.nlist or int(min(max(4 * np.sqrt(rows), 16), 65536))
+
+
+def _assign(x: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (L2) for each row, computed blockwise."""
+    c_norms = (centroids * centroids).sum(axis=1)
+    out = np.empty(len(x), dtype=np.int32)
+    for start in range(0, len(x), _ASSIGN_BLOCK_ROWS):
+        block = x[start:start + _ASSIGN_BLOCK_ROWS]
+        out[start:start + len(block)] = np.argmax(2 * block @ centroids.T - c_norms, axis=1)
+    return out
+
+
+def kmeans(x: np.ndarray, k: int, rng: np.random.Generator, iters: int = _KMEANS_ITERS) -> np.ndarray:
+    k = min(k, len(x))
+    if len(x) > k * _POINTS_PER_CENTROID:
+        x = x[rng.choice(len(x), k * _POINTS_PER_CENTROID, replace=False)]
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+    for _ in range(iters):
+        assign = _assign(x, centroids)
+        counts = np.bincount(assign, minlength=k)
+        order = np.argsort(assign, kind="stable")
+        filled = np.flatnonzero(counts)
+        starts = (np.cumsum(counts) - counts)[filled]
+        centroids[filled] = np.add.reduceat(x[order], starts, axis=0) / counts[filled, None]
+        # Re-seed empty clusters from random points
+        empty = counts == 0
+        if empty.any():
+            centroids[empty] = x[rng.choice(len(x), int(empty.sum()), replace=False)]
+    return centroids
+
+
+class IVFPQIndex:
+    """Row-aligned IVF-PQ index: row i of the partition has list_of_row[i] and codes[i]."""
+
+    def __init__(self, path: Path, config: IVFPQConfig):
+        self.path = path
+        self.config = config
+        self.centroids: np.ndarray | None = None
+        self.codebooks: np.ndarray | None = None
+        self.trained_rows = 0
+        self.codes = np.zeros((0, config.subvectors), dtype=np.uint8)
+        self.list_of_row = np.zeros(0, dtype=np.int32)
+        self.size = 0
+        self._lists: list[np.ndarray] | None = None
+
+    @property
+    def _model_file(self) -> Path:
+        return self.path / "ivfpq_model.npz"
+
+    @property
+    def _codes_file(self) -> Path:
+        return self.path / "ivfpq_codes.u8"
+
+    @property
+    def _lists_file(self) -> Path:
+        return self.path / "ivfpq_lists.i32"
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def dsub(self) -> int:
+        return self.centroids.shape[1] // self.config.subvectors
+
+    # ─── Training and encoding ───
+
+    def train(self, vectors: np.ndarray, rows: int) -> None:
+        """Fit coarse centroids and PQ codebooks on a sample and encode rows [0, rows) in memory.
+
+        Touches no files, so it can run off the partition lock; call :meth:`persist` to commit.
+        """
+        dim = vectors.shape[1]
+        if dim % self.config.subvectors:
+            raise ValueError(f"PQ subvectors ({self.config.subvectors}) must divide the dimension ({dim})")
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(rows, min(rows, self.config.train_sample), replace=False))
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+
+        nlist = self.config.lists_for(rows)
+        self.centroids = kmeans(sample, nlist, rng)
+        residuals = sample - self.centroids[_assign(sample, self.centroids)]
+        dsub = dim // self.config.subvectors
+        self.codebooks = np.stack([
+            kmeans(residuals[:, m * dsub:(m + 1) * dsub], _PQ_CENTROIDS, rng)
+            for m in range(self.config.subvectors)
+        ])
+        self.trained_rows = rows
+
+        codes, lists = [], []
+        for start in range(0, rows, _ASSIGN_BLOCK_ROWS):
+            block_lists, block_codes = self.encode(np.asarray(vectors[start:min(start + _ASSIGN_BLOCK_ROWS, rows)], dtype=np.float32))
+            lists.append(block_lists)
+            codes.append(block_codes)
+        self.codes = np.concatenate(codes)
+        self.list_of_row = np.concatenate(lists)
+        self.size = rows
+        self._lists = None
+        logger.info(f"Trained IVF-PQ for {self.path.name}: {rows} rows, {nlist} lists, {self.config.subvectors} bytes/vector")
+
+    def persist(self) -> None:
+        np.savez(self._model_file, centroids=self.centroids, codebooks=self.codebooks, trained_rows=self.trained_rows)
+        self.codes.tofile(self._codes_file)
+        self.list_of_row.tofile(self._lists_file)
+
+    def encode(self, x: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        lists = _assign(x, self.centroids)
+        residuals = x - self.centroids[lists]
+        dsub = self.dsub
+        codes = np.empty((len(x), self.config.subvectors), dtype=np.uint8)
+        for m in range(self.config.subvectors):
+            codes[:, m] = _assign(residuals[:, m * dsub:(m + 1) * dsub], self.codebooks[m])
+        return lists, codes
+
+    def add_from(self, vectors: np.ndarray, rows: int) -> None:
+        """Encode partition rows [self.size, rows) and append them to the index files."""
+        for start in range(self.size, rows, _ASSIGN_BLOCK_ROWS):
+            end = min(start + _ASSIGN_BLOCK_ROWS, rows)
+            lists, codes = self.encode(np.asarray(vectors[start:end], dtype=np.float32))
+            with self._codes_file.open("ab") as f:
+                f.write(codes.tobytes())
+            with self._lists_file.open("ab") as f:
+                f.write(lists.tobytes())
+            self.codes = np.concatenate([self.codes, codes])
+            self.list_of_row = np.concatenate([self.list_of_row, lists])
+            self.size = end
+        self._lists = None
+
+    def load(self, vectors: np.ndarray | None, rows: int) -> bool:
+        """Restore a trained index; encodes rows appended after the last persisted code."""
+        if not self._model_file.exists():
+            return False
+        model = np.load(self._model_file)
+        self.centroids = model["centroids"]
+        self.codebooks = model["codebooks"]
+        self.trained_rows = int(model["trained_rows"])
+        m = self.config.subvectors
+        if self.codebooks.shape[0] != m:
+            logger.info(f"PQ subvectors changed for {self.path.name}; retraining")
+            self.centroids = None
+            return False
+        codes = np.fromfile(self._codes_file, dtype=np.uint8) if self._codes_file.exists() else np.zeros(0, np.uint8)
+        lists = np.fromfile(self._lists_file, dtype=np.int32) if self._lists_file.exists() else np.zeros(0, np.int32)
+        persisted = min(len(codes) // m, len(lists), rows)
+        self.codes = codes[:persisted * m].reshape(persisted, m)
+        self.list_of_row = lists[:persisted]
+        self.size = persisted
+        if persisted < rows and vectors is not None:
+            self.add_from(vectors, rows)
+        return True
+
+    def compact(self, keep_rows: np.ndarray) -> None:
+        """Drop tombstoned rows after the partition rewrote its vectors."""
+        self.codes = self.codes[keep_rows]
+        self.list_of_row = self.list_of_row[keep_rows]
+        self.size = len(keep_rows)
+        self._lists = None
+        self.persist()
+
+    # ─── Search ───
+
+    def _inverted_lists(self) -> list[np.ndarray]:
+        if self._lists is None:
+            order = np.argsort(self.list_of_row, kind="stable")
+            bounds = np.searchsorted(self.list_of_row[order], np.arange(len(self.centroids) + 1))
+            self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+        return self._lists
+
+    def shortlist(self, query: np.ndarray, mask: np.ndarray, candidates: int, nprobe: int) -> np.ndarray:
+        """Rows in the nprobe nearest lists, ranked by approximate inner product, best `candidates` first."""
+        coarse = self.centroids @ query
+        probe = np.argpartition(-coarse, min(nprobe, len(coarse)) - 1)[:nprobe]
+        lists = self._inverted_lists()
+        rows = np.concatenate([lists[i] for i in probe])
+        rows = rows[mask[rows]]
+        if not len(rows):
+            return rows
+        # Asymmetric distance: q·x ≈ q·centroid + Σ_m q_m·codebook_m[code_m]
+        dsub = self.dsub
+        lut = np.einsum("md,mkd->mk", query.reshape(self.config.subvectors, dsub), self.codebooks)
+        approx = coarse[self.list_of_row[rows]] + lut[np.arange(self.config.subvectors), self.codes[rows]].sum(axis=1)
+        if candidates < len(rows):
+            top = np.argpartition(-approx, candidates - 1)[:candidates]
+            return rows[top]
+        return rows
@@ -0,0 +1,525 @@
+"""In-process vector store on memory-mapped float16 matrices.
+
+Each tenant gets its own partition directory holding:
+
+- ``vectors.f16``: a row-major float16 matrix, memory-mapped and grown by
+  doubling so appends never rewrite existing rows
+- ``rows.jsonl``: an append-only log of add/update/delete records that is
+  replayed on load to rebuild IDs and metadata
+
+RAM holds IDs, metadata (filters are evaluated against it) and one log offset
+per row; chunk texts stay in the log and are read back by offset for the hits
+a query returns. Loading replays the whole log, so start-up time grows with
+it; compaction after deletes and re-adds keeps it close to the live rows.
+
+Search is exact by default: one vectorized matrix product per block of rows
+followed by ``argpartition`` top-k, with no HTTP or serialization overhead.
+With an :class:`IVFPQConfig`, partitions past ``min_rows`` also keep an IVF-PQ
+index (``ivfpq_*`` files) and search re-scores its shortlist exactly.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from array import array
+from pathlib import Path
+
+import numpy as np
+
+from backend.services.vectordb.base import (
+    TENANT_KEY,
+    StoredChunk,
+    VectorHit,
+    VectorStore,
+    matches_where,
+)
+from backend.services.vectordb.ivfpq import IVFPQConfig, IVFPQIndex
+
+logger = logging.getLogger(__name__)
+
+_SHARED_PARTITION = "_shared"
+_INITIAL_CAPACITY = 1024
+# Rows converted to float32 per matrix product; bounds temporary memory
+_SCORE_BLOCK_ROWS = 65536
+# Retrain the compressed index once the partition outgrows its training set this many times
+_RETRAIN_GROWTH = 4
+
+
+def _partition_dirname(tenant: str | None) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]", "_", tenant) if tenant else _SHARED_PARTITION
+
+
+class _Partition:
+    """One tenant's vectors and metadata, plus offsets of the texts in its log."""
+
+    def __init__(self, path: Path, index_config: IVFPQConfig | None = None):
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        self.index_config = index_config
+        self.index: IVFPQIndex | None = None
+        self._trainer: threading.Thread | None = None
+        # Bumped by compaction, which renumbers rows under a running trainer
+        self._layout_version = 0
+        self.dim = 0
+        self.size = 0
+        self.capacity = 0
+        self.vectors: np.memmap | None = None
+        self.ids: list[str] = []
+        # Byte offset in rows.jsonl of each row's add record, which holds its text
+        self.text_offsets = array("q")
+        self._reader = None
+        self.metadatas: list[dict] = []
+        self.alive = np.zeros(0, dtype=bool)
+        self.row_of: dict[str, int] = {}
+        self._mask_cache: dict[str, np.ndarray] = {}
+        self._load()
+
+    @property
+    def _vectors_file(self) -> Path:
+        return self.path / "vectors.f16"
+
+    @property
+    def _log_file(self) -> Path:
+        return self.path / "rows.jsonl"
+
+    @property
+    def _header_file(self) -> Path:
+        return self.path / "header.json"
+
+    @property
+    def live_count(self) -> int:
+        return len(self.row_of)
+
+    # ─── Persistence ───
+
+    def _load(self) -> None:
+        if self._header_file.exists():
+            self.dim = json.loads(self._header_file.read_text())["dim"]
+        if self._log_file.exists():
+            with self._log_file.open("rb") as f:
+                offset = 0
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn final line from a crash mid-append; vectors past it are ignored
+                        break
+                    self._apply(record, offset)
+                    offset += len(line)
+        if self.dim:
+            rows_on_disk = self._vectors_file.stat().st_size // (self.dim * 2) if self._vectors_file.exists() else 0
+            self._open_vectors(max(rows_on_disk, self.size, _INITIAL_CAPACITY))
+        self.alive = np.zeros(max(self.capacity, self.size), dtype=bool)
+        for row in self.row_of.values():
+            self.alive[row] = True
+        if self.index_config is not None and self.dim:
+            index = IVFPQIndex(self.path, self.index_config)
+            if index.load(self.vectors, self.size):
+                self.index = index
+            self._update_index()
+
+    def _apply(self, record: dict, offset: int = -1) -> None:
+        op = record["op"]
+        if op == "add":
+            old = self.row_of.pop(record["id"], None)
+            if old is not None and old < len(self.alive):
+                self.alive[old] = False
+            self.row_of[record["id"]] = self.size
+            self.ids.append(record["id"])
+            self.text_offsets.append(offset)
+            self.metadatas.append(record["meta"])
+            self.size += 1
+        elif op == "upd":
+            row = self.row_of.get(record["id"])
+            if row is not None:
+                self.metadatas[row] = {**self.metadatas[row], **record["meta"]}
+        elif op == "del":
+            self.row_of.pop(record["id"], None)
+
+    def _open_vectors(self, capacity: int) -> None:
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        nbytes = capacity * self.dim * 2
+        with open(self._vectors_file, "ab") as f:
+            if f.tell() < nbytes:
+                f.truncate(nbytes)
+        self.capacity = capacity
+        self.vectors = np.memmap(self._vectors_file, dtype=np.float16, mode="r+", shape=(capacity, self.dim))
+
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self.capacity:
+            return
+        self._open_vectors(max(rows, self.capacity * 2, _INITIAL_CAPACITY))
+        alive = np.zeros(self.capacity, dtype=bool)
+        alive[:len(self.alive)] = self.alive
+        self.alive = alive
+
+    def _append_log(self, records: list[dict]) -> list[int]:
+        """Append records to the log; returns the byte offset of each."""
+        lines = [(json.dumps(r, separators=(",", ":")) + "\n").encode() for r in records]
+        with self._log_file.open("ab") as f:
+            offset = f.tell()
+            f.write(b"".join(lines))
+        offsets = []
+        for line in lines:
+            offsets.append(offset)
+            offset += len(line)
+        return offsets
+
+    def _close_reader(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def text(self, row: int) -> str:
+        """A row's chunk text, read from its add record in the log."""
+        if self._reader is None:
+            self._reader = self._log_file.open("rb")
+        self._reader.seek(self.text_offsets[row])
+        return json.loads(self._reader.readline())["text"]
+
+    def _invalidate(self) -> None:
+        self._mask_cache.clear()
+
+    def _update_index(self) -> None:
+        """Encode new rows into the compressed index, (re)training it in the background when due."""
+        config = self.index_config
+        if config is None or self.size < config.min_rows:
+            return
+        if self.index is not None:
+            self.index.add_from(self.vectors, self.size)
+        due = self.index is None or self.size > _RETRAIN_GROWTH * self.index.trained_rows
+        if due and (self._trainer is None or not self._trainer.is_alive()):
+            # Searches keep using exact scoring (or the previous index) until training finishes
+            self._trainer = threading.Thread(target=self._train_index, name=f"ivfpq-{self.path.name}", daemon=True)
+            self._trainer.start()
+
+    def _train_index(self) -> None:
+        with self.lock:
+            rows, vectors, version = self.size, self.vectors, self._layout_version
+        index = IVFPQIndex(self.path, self.index_config)
+        try:
+            index.train(vectors, rows)
+        except Exception as e:
+            logger.error(f"IVF-PQ training failed for {self.path.name}: {e}")
+            return
+        with self.lock:
+            if version != self._layout_version:
+                logger.info(f"Discarding IVF-PQ index for {self.path.name}: partition compacted during training")
+                return
+            index.persist()
+            index.add_from(self.vectors, self.size)
+            self.index = index
+
+    # ─── Mutations ───
+
+    def append(self, ids: list[str], embeddings: np.ndarray, documents: list[str], metadatas: list[dict]) -> None:
+        with self.lock:
+            if not self.dim:
+                self.dim = embeddings.shape[1]
+                self._header_file.write_text(json.dumps({"dim": self.dim}))
+            elif embeddings.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {embeddings.shape[1]} does not match partition ({self.dim})")
+
+            start = self.size
+            self._ensure_capacity(start + len(ids))
+            # Vectors first: a crash before the log append leaves unreferenced rows, never dangling IDs
+            self.vectors[start:start + len(ids)] = embeddings.astype(np.float16)
+            self.vectors.flush()
+
+            records = [
+                {"op": "add", "id": chunk_id, "text": text, "meta": meta}
+                for chunk_id, text, meta in zip(ids, documents, metadatas)
+            ]
+            for record, offset in zip(records, self._append_log(records)):
+                self._apply(record, offset)
+            self.alive[start:self.size] = False
+            for row in range(start, self.size):
+                self.alive[row] = self.row_of.get(self.ids[row]) == row
+            self._invalidate()
+            self._update_index()
+            # Re-adding an ID (re-processing a document) tombstones its previous row
+            self._maybe_compact()
+
+    def update_metadata(self, ids: list[str], metadatas: list[dict]) -> list[str]:
+        with self.lock:
+            records = [
+                {"op": "upd", "id": chunk_id, "meta": meta}
+                for chunk_id, meta in zip(ids, metadatas)
+                if chunk_id in self.row_of
+            ]
+            if records:
+                self._append_log(records)
+                for record in records:
+                    self._apply(record)
+                self._invalidate()
+            return [r["id"] for r in records]
+
+    def delete_rows(self, rows: list[int]) -> int:
+        with self.lock:
+            records = [{"op": "del", "id": self.ids[row]} for row in rows if self.alive[row]]
+            if not records:
+                return 0
+            self._append_log(records)
+            for record in records:
+                row = self.row_of.pop(record["id"])
+                self.alive[row] = False
+            self._invalidate()
+            self._maybe_compact()
+            return len(records)
+
+    def _maybe_compact(self) -> None:
+        if self.size - self.live_count > max(_INITIAL_CAPACITY, self.size // 2):
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the partition without tombstoned rows."""
+        rows = np.flatnonzero(self.alive[:self.size])
+        tmp_vectors = self.path / "vectors.f16.tmp"
+        tmp_log = self.path / "rows.jsonl.tmp"
+        np.asarray(self.vectors[rows]).tofile(tmp_vectors)
+        offsets = array("q")
+        offset = 0
+        with tmp_log.open("wb") as f:
+            for row in rows:
+                record = {"op": "add", "id": self.ids[row], "text": self.text(row), "meta": self.metadatas[row]}
+                line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+                f.write(line)
+                offsets.append(offset)
+                offset += len(line)
+        self.vectors = None
+        self._close_reader()
+        os.replace(tmp_vectors, self._vectors_file)
+        os.replace(tmp_log, self._log_file)
+
+        self.ids = [self.ids[r] for r in rows]
+        self.text_offsets = offsets
+        self.metadatas = [self.metadatas[r] for r in rows]
+        self.row_of = {chunk_id: i for i, chunk_id in enumerate(self.ids)}
+        self.size = len(rows)
+        self.capacity = 0
+        self._open_vectors(max(self.size, _INITIAL_CAPACITY))
+        self.alive = np.zeros(self.capacity, dtype=bool)
+        self.alive[:self.size] = True
+        self._invalidate()
+        self._layout_version += 1
+        if self.index is not None:
+            self.index.compact(rows)
+        logger.info(f"Compacted vector partition {self.path.name}: {self.size} rows")
+
+    # ─── Reads ───
+
+    def mask(self, where: dict | None) -> np.ndarray:
+        """Boolean mask of live rows matching `where`, cached until the next mutation."""
+        live = self.alive[:self.size]
+        if not where:
+            return live
+        key = json.dumps(where, sort_keys=True, default=str)
+        cached = self._mask_cache.get(key)
+        if cached is None:
+            cached = np.fromiter(
+                (matches_where(m, where) for m in self.metadatas), dtype=bool, count=self.size,
+            )
+            self._mask_cache[key] = cached
+        return live & cached
+
+    def scores(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine similarity of every row against each (normalized) query, shape (n_queries, size)."""
+        out = np.empty((queries.shape[0], self.size), dtype=np.float32)
+        for start in range(0, self.size, _SCORE_BLOCK_ROWS):
+            end = min(start + _SCORE_BLOCK_ROWS, self.size)
+            out[:, start:end] = queries @ np.asarray(self.vectors[start:end], dtype=np.float32).T
+        return out
+
+    def top_k(self, queries: np.ndarray, k: int, mask: np.ndarray) -> list[tuple[np.ndarray, np.ndarray]]:
+        """(rows, cosine scores) of the best k rows under `mask` for each query, best first."""
+        config = self.index_config
+        candidates = max(config.rerank_candidates, k) if config else 0
+        # Selective filters leave few enough rows that exact scoring is cheaper than probing
+        if self.index is None or int(mask.sum()) <= 4 * candidates:
+            scores = self.scores(queries)
+            scores[:, ~mask] = -np.inf
+            results = []
+            for q in range(len(queries)):
+                rows = top_k_rows(scores[q], k)
+                results.append((rows, scores[q, rows]))
+            return results
+
+        results = []
+        for query in queries:
+            rows = np.sort(self.index.shortlist(query, mask, candidates, config.nprobe))
+            # Exact re-scoring of the shortlist against the float16 vectors
+            exact = np.asarray(self.vectors[rows], dtype=np.float32) @ query if len(rows) else np.zeros(0, np.float32)
+            best = top_k_rows(exact, k)
+            results.append((rows[best], exact[best]))
+        return results
+
+    def vector(self, row: int) -> list[float]:
+        return np.asarray(self.vectors[row], dtype=np.float32).tolist()
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, via argpartition (O(n) + O(k log k))."""
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class NumpyVectorStore(VectorStore):
+    name = "numpy"
+
+    def __init__(self, root: Path, index_config: IVFPQConfig | None = None):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_config = index_config
+        self._partitions: dict[str, _Partition] = {}
+        self._lock = threading.Lock()
+        for child in sorted(self.root.iterdir()):
+            if child.is_dir():
+                self._partitions[child.name] = _Partition(child, index_config)
+        logger.info(f"NumPy vector store at {root}: {self.count()} items in {len(self._partitions)} partitions")
+
+    def _partition(self, tenant: str | None, create: bool = False) -> _Partition | None:
+        dirname = _partition_dirname(tenant)
+        with self._lock:
+            partition = self._partitions.get(dirname)
+            if partition is None and create:
+                partition = _Partition(self.root / dirname, self.index_config)
+                self._partitions[dirname] = partition
+        return partition
+
+    def _scope(self, tenant: str | None) -> list[_Partition]:
+        if tenant is not None:
+            partition = self._partition(tenant)
+            return [partition] if partition else []
+        with self._lock:
+            return [self._partitions[name] for name in sorted(self._partitions)]
+
+    def upsert(self, ids, embeddings, documents, metadatas) -> None:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        by_tenant: dict[str | None, list[int]] = {}
+        for i, meta in enumerate(metadatas):
+            by_tenant.setdefault(meta.get(TENANT_KEY) or None, []).append(i)
+        for tenant, rows in by_tenant.items():
+            self._partition(tenant, create=True).append(
+                [ids[i] for i in rows],
+                matrix[rows],
+                [documents[i] for i in rows],
+                [metadatas[i] for i in rows],
+            )
+
+    def add(self, ids, embeddings, documents, metadatas) -> None:
+        # Appends are cheap either way; re-adding an ID replaces it
+        self.upsert(ids, embeddings, documents, metadatas)
+
+    def update_metadata(self, ids, metadatas, tenant=None) -> None:
+        remaining = dict(zip(ids, metadatas))
+        for partition in self._scope(tenant):
+            if not remaining:
+                break
+            done = partition.update_metadata(list(remaining), list(remaining.values()))
+            moved = [
+                chunk_id for chunk_id in done
+                if TENANT_KEY in remaining[chunk_id]
+                and _partition_dirname(remaining[chunk_id][TENANT_KEY] or None) != partition.path.name
+            ]
+            if moved:
+                self._move(partition, moved)
+            for chunk_id in done:
+                remaining.pop(chunk_id)
+
+    def _move(self, source: _Partition, ids: list[str]) -> None:
+        """Re-home rows whose tenant changed (e.g. the tenant backfill) in their new tenant's partition."""
+        with source.lock:
+            rows = [source.row_of[chunk_id] for chunk_id in ids]
+            self.upsert(
+                ids,
+                np.asarray(source.vectors[rows], dtype=np.float32),
+                [source.text(row) for row in rows],
+                [source.metadatas[row] for row in rows],
+            )
+            source.delete_rows(rows)
+
+    def search(self, query_embeddings, top_k, tenant=None, where=None) -> list[list[VectorHit]]:
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        merged: list[list[VectorHit]] = [[] for _ in range(len(queries))]
+        for partition in self._scope(tenant):
+            with partition.lock:
+                if not partition.size:
+                    continue
+                mask = partition.mask(where)
+                k = min(top_k, int(mask.sum()))
+                if not k:
+                    continue
+                for q, (rows, scores) in enumerate(partition.top_k(queries, k, mask)):
+                    for row, score in zip(rows, scores):
+                        merged[q].append(VectorHit(
+                            id=partition.ids[row],
+                            text=partition.text(row),
+                            metadata=partition.metadatas[row],
+                            distance=float(1.0 - score),
+                        ))
+        return [sorted(hits, key=lambda h: h.distance)[:top_k] for hits in merged]
+
+    def _matching_rows(self, partition: _Partition, ids, where) -> np.ndarray:
+        mask = partition.mask(where)
+        if ids is None:
+            return np.flatnonzero(mask)
+        rows = [partition.row_of[i] for i in ids if i in partition.row_of]
+        return np.array([r for r in rows if mask[r]], dtype=np.int64)
+
+    def get(self, ids=None, tenant=None, where=None, offset=0, limit=None, include_embeddings=False) -> list[StoredChunk]:
+        chunks: list[StoredChunk] = []
+        skip = offset
+        for partition in self._scope(tenant):
+            with partition.lock:
+                for row in self._matching_rows(partition, ids, where):
+                    if skip:
+                        skip -= 1
+                        continue
+                    chunks.append(StoredChunk(
+                        id=partition.ids[row],
+                        text=partition.text(row),
+                        metadata=partition.metadatas[row],
+                        embedding=partition.vector(row) if include_embeddings else None,
+                    ))
+                    if limit is not None and len(chunks) >= limit:
+                        return chunks
+        return chunks
+
+    def list_ids(self, tenant=None, where=None, page_size=5000) -> list[str]:
+        ids: list[str] = []
+        for partition in self._scope(tenant):
+            with partition.lock:
+                ids.extend(partition.ids[row] for row in np.flatnonzero(partition.mask(where)))
+        return ids
+
+    def delete(self, ids=None, tenant=None, where=None) -> int:
+        if ids is None and tenant is None and not where:
+            raise ValueError("Refusing to delete without ids, tenant or filter; use drop()")
+        deleted = 0
+        for partition in self._scope(tenant):
+            with partition.lock:
+                deleted += partition.delete_rows(self._matching_rows(partition, ids, where).tolist())
+        return deleted
+
+    def count(self, tenant=None, where=None) -> int:
+        total = 0
+        for partition in self._scope(tenant):
+            with partition.lock:
+                total += partition.live_count if not where else int(partition.mask(where).sum())
+        return total
+
+    def drop(self) -> None:
+        with self._lock:
+            self._partitions.clear()
+        shutil.rmtree(self.root, ignore_errors=True)
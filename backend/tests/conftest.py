@@ -38,6 +38,9 @@ def _make_async_cursor(items: list):
         def skip(self, *a, **kw):
             return self
 
+        def batch_size(self, *a, **kw):
+            return self
+
         def __aiter__(self):
             return self
 
@@ -57,13 +60,14 @@ def _build_mock_db():
     for coll_name in [
         "users", "organizations", "documents", "bookmarks",
         "activity", "search_history", "llm_configs", "ai_analyses",
-        "audit_log",
+        "audit_log", "vector_index_state",
     ]:
         coll = MagicMock()
         coll.find = MagicMock(return_value=_make_async_cursor([]))
         coll.find_one = AsyncMock(return_value=None)
         coll.insert_one = AsyncMock(return_value=MagicMock(inserted_id="mock-id"))
         coll.update_one = AsyncMock(return_value=MagicMock(matched_count=1, modified_count=1))
+        coll.update_many = AsyncMock(return_value=MagicMock(matched_count=0, modified_count=0))
         coll.delete_one = AsyncMock(return_value=MagicMock(deleted_count=1))
         coll.delete_many = AsyncMock(return_value=MagicMock(deleted_count=0))
         coll.count_documents = AsyncMock(return_value=0)
@@ -100,9 +104,22 @@ async def client(mock_db):
     """AsyncClient with mocked DB and bypassed auth."""
     from backend.main import app
     from backend.middleware.auth import get_current_user
+    from backend.services import (
+        autocomplete,
+        clause_index,
+        near_duplicates,
+        search_cache,
+        search_cursors,
+    )
 
     # Override auth
     app.dependency_overrides[get_current_user] = _override_auth()
+    # Results cached by an earlier test would bypass this test's patches
+    search_cache.get_cache().clear()
+    search_cursors.get_store().clear()
+    autocomplete.get_autocomplete().clear()
+    near_duplicates.get_index().clear()
+    clause_index._coverage_cache.clear()
 
     # Patch database layer
     with (
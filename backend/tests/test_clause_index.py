@@ -0,0 +1,49 @@
+"""Unit tests for ingest-time clause tagging — no DB or embedding model needed."""
+
+from unittest.mock import patch
+
+import numpy as np
+
+from backend.services import clause_index
+from backend.services.vectordb.numpy_store import NumpyVectorStore
+
+
+def _centroids():
+    ids = [c["id"] for c in clause_index.CLAUSE_CATEGORIES]
+    matrix = np.zeros((len(ids), 3), dtype=np.float32)
+    matrix[0] = [1, 0, 0]  # indemnification
+    matrix[1] = [0, 1, 0]  # limitation_of_liability
+    matrix[2:] = [0, 0, -1]
+    return ids, matrix
+
+
+def test_tag_embeddings_keeps_categories_above_threshold():
+    with patch.dict(clause_index._centroids, {"m": _centroids()}):
+        tags = clause_index.tag_embeddings([[1, 0, 0], [0.6, 0.8, 0]], "m")
+    assert tags[0] == {"clause_indemnification": 1.0}
+    assert tags[1] == {"clause_indemnification": 0.8, "clause_limitation_of_liability": 0.9}
+
+
+def test_tagged_search_reads_only_top_k_tagged_chunks(tmp_path):
+    store = NumpyVectorStore(tmp_path)
+    store.add(
+        ids=["d1_chunk_0", "d1_chunk_1", "d2_chunk_0"],
+        embeddings=[[1, 0, 0], [0, 1, 0], [0, 0, 1]],
+        documents=["indemnify", "liability cap", "other org"],
+        metadatas=[
+            {"document_id": "d1", "organization_id": "org1", "clause_indemnification": 0.7},
+            {"document_id": "d1", "organization_id": "org1", "clause_indemnification": 0.9},
+            {"document_id": "d2", "organization_id": "org2", "clause_indemnification": 0.95},
+        ],
+    )
+    with (
+        patch("backend.services.clause_index.vector_store.get_store", return_value=store),
+        patch("backend.services.clause_index.vector_store.get_active_model", return_value="m"),
+        patch.dict(clause_index._centroids, {"m": _centroids()}),
+    ):
+        results = clause_index.tagged_search("indemnification", top_k=5, org_id="org1")
+        top = clause_index.tagged_search("indemnification", top_k=1, org_id="org1")
+    assert [r.chunk_id for r in results] == ["d1_chunk_1", "d1_chunk_0"]
+    assert results[0].score == 0.9
+    # Only top_k hits are read from the store: the centroid's nearest tagged chunk
+    assert [r.chunk_id for r in top] == ["d1_chunk_0"]
@@ -37,6 +37,9 @@ async def test_list_documents_with_data(client, mock_db):
     data = res.json()
     assert data["total"] == 1
     assert data["documents"][0]["filename"] == "contract.pdf"
+    projection = mock_db.documents.find.call_args.args[1]
+    assert "minhash" not in projection and "defined_terms" not in projection
+    assert projection["duplicate_cluster"] == 1
 
 
 async def test_upload_unsupported_type(client):
@@ -81,12 +84,38 @@ async def test_delete_document(client, mock_db):
         "organization_id": TEST_USER["organization_id"],
         "filename": "old.pdf",
     })
-    with patch("backend.routers.documents.vector_store"):
+    with patch("backend.services.document_cleanup.vector_store"):
         res = await client.delete("/api/documents/doc-1")
     assert res.status_code == 200
     assert "deleted" in res.json()["message"].lower()
 
 
+async def test_bulk_delete_matter(client, mock_db):
+    """Deleting a matter removes chunks, records and cached analyses in batched calls."""
+    mock_db.documents.find = MagicMock(return_value=_make_async_cursor([
+        {"document_id": "doc-1", "filename": "a.pdf"},
+        {"document_id": "doc-2", "filename": "b.pdf"},
+    ]))
+    mock_db.documents.delete_many = AsyncMock(return_value=MagicMock(deleted_count=2))
+    mock_db.ai_analyses.delete_many = AsyncMock(return_value=MagicMock(deleted_count=3))
+    with patch("backend.services.document_cleanup.vector_store") as mock_vs:
+        mock_vs.delete_documents.return_value = 40
+        res = await client.post("/api/documents/bulk-delete", json={"matter": "Acme v. Beta"})
+
+    assert res.status_code == 200
+    data = res.json()
+    assert (data["documents"], data["chunks"], data["analyses"]) == (2, 40, 3)
+    assert "total_ms" in data["timing"]
+    mock_vs.delete_documents.assert_called_once_with(["doc-1", "doc-2"], TEST_USER["organization_id"])
+    query = mock_db.documents.find.call_args.args[0]
+    assert query == {"organization_id": TEST_USER["organization_id"], "matter": "Acme v. Beta"}
+
+
+async def test_bulk_delete_requires_selector(client):
+    res = await client.post("/api/documents/bulk-delete", json={})
+    assert res.status_code == 400
+
+
 async def test_stats(client, mock_db):
     """Stats endpoint returns expected shape."""
     with patch("backend.routers.documents.vector_store") as mock_vs:
@@ -100,3 +129,48 @@ async def test_stats(client, mock_db):
     data = res.json()
     assert "total_documents" in data
     assert "total_chunks" in data
+
+
+async def test_near_duplicate_documents_share_a_cluster(client, mock_db):
+    import random
+
+    from backend.services import near_duplicates
+
+    rng = random.Random(7)
+    words = [f"w{rng.randrange(5000)}" for _ in range(2000)]
+    draft = [" ".join(words[i:i + 200]) for i in range(0, 2000, 150)]
+    edited = list(draft)
+    edited[3] = edited[3].replace(words[460], "amended")
+    unrelated = [" ".join(f"x{rng.randrange(5000)}" for _ in range(200)) for _ in range(13)]
+
+    a, b, c = (near_duplicates.signature(texts) for texts in (draft, edited, unrelated))
+    assert near_duplicates.similarity(a, b) > 0.9
+    assert near_duplicates.similarity(a, c) < 0.1
+    assert near_duplicates.signature([]) is None
+    # Pairs at the default threshold almost surely share an LSH band
+    rows = near_duplicates.NUM_PERMUTATIONS // near_duplicates.LSH_BANDS
+    assert 1 - (1 - 0.8 ** rows) ** near_duplicates.LSH_BANDS > 0.999
+
+    index = near_duplicates.get_index()
+    assert await index.add("org1", "doc-a", a) == ("doc-a", 0.0)
+    cluster, score = await index.add("org1", "doc-b", b)
+    assert cluster == "doc-a" and score > 0.9
+    assert (await index.add("org1", "doc-c", c))[0] == "doc-c"
+    assert (await index.add("org2", "doc-d", b))[0] == "doc-d"  # Tenants never match each other
+    assert await index.clusters("org1", ["doc-b", "doc-x"]) == {"doc-b": "doc-a", "doc-x": "doc-x"}
+
+    # Reprocessing the root into another cluster hands its members a new root
+    await index.add("org1", "doc-e", b)
+    assert (await index.add("org1", "doc-a", c))[0] == "doc-c"
+    assert await index.clusters("org1", ["doc-b", "doc-e"]) == {"doc-b": "doc-b", "doc-e": "doc-b"}
+    query, update = mock_db.documents.update_many.call_args.args
+    assert query["document_id"] == {"$in": ["doc-b", "doc-e"]}
+    assert update == {"$set": {"duplicate_cluster": "doc-b"}}
+
+    mock_db.documents.find_one = AsyncMock(return_value={"duplicate_cluster": "doc-a"})
+    mock_db.documents.find = MagicMock(return_value=_make_async_cursor([
+        {"document_id": "doc-b", "filename": "draft-v2.pdf", "uploaded_at": "2024-01-02T00:00:00"},
+    ]))
+    res = await client.get("/api/documents/doc-a/duplicates")
+    assert res.json()["duplicates"] == [{"id": "doc-b", "filename": "draft-v2.pdf", "uploaded_at": "2024-01-02T00:00:00"}]
+    assert mock_db.documents.find.call_args.args[0]["document_id"] == {"$ne": "doc-a"}
@@ -1,5 +1,6 @@
 """Tests for health check endpoints."""
 
+from unittest.mock import AsyncMock, patch
 
 
 async def test_health_basic(client):
@@ -16,3 +17,34 @@ async def test_health_has_request_id(client):
     res = await client.get("/api/health")
     assert "x-request-id" in res.headers
     assert "x-response-time-ms" in res.headers
+
+
+async def test_health_detailed_served_from_cache(client):
+    from backend.services.health import HealthMonitor
+
+    probe = AsyncMock(return_value={"status": "ok"})
+    monitor = HealthMonitor()
+    monitor.register("mongodb", probe, ttl=60)
+    monitor.register("ollama", AsyncMock(side_effect=ConnectionError("down")), ttl=60, optional=True)
+
+    with patch("backend.routers.health.health_monitor", monitor):
+        first = await client.get("/api/health/detailed")
+        second = await client.get("/api/health/detailed")
+
+    assert first.status_code == 200
+    data = second.json()
+    assert data["status"] == "ok"
+    assert data["checks"]["ollama"]["status"] == "unavailable"
+    # Second request did not re-run the probe
+    assert probe.await_count == 1
+
+
+async def test_health_monitor_refreshes_expired_probes():
+    from backend.services.health import HealthMonitor
+
+    probe = AsyncMock(return_value={"status": "ok"})
+    monitor = HealthMonitor()
+    monitor.register("chromadb", probe, ttl=0)
+    await monitor.refresh()
+    await monitor.refresh()
+    assert probe.await_count == 2
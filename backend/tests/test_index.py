@@ -0,0 +1,94 @@
+"""Tests for vector collection versioning and the re-embedding migration."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from backend.services import reindex, vector_store
+from backend.services.vectordb.base import StoredChunk
+
+
+def _state_collection(docs: dict):
+    coll = MagicMock()
+    coll.find_one = AsyncMock(side_effect=lambda q: docs.get(q["_id"]))
+
+    async def _update(q, update, upsert=False):
+        docs.setdefault(q["_id"], {"_id": q["_id"]}).update(update["$set"])
+    coll.update_one = AsyncMock(side_effect=_update)
+    return coll
+
+
+def test_collection_name_for_model():
+    name = vector_store.collection_name_for("sentence-transformers/all-mpnet-base-v2")
+    assert name.startswith("legal_documents__")
+    assert "/" not in name
+    assert len(name) <= 63
+
+
+async def test_index_status(client, mock_db):
+    mock_db.vector_index_state = _state_collection({
+        "active": {"_id": "active", "collection": "legal_documents", "embedding_model": "all-MiniLM-L6-v2"},
+        "migration": {"_id": "migration", "status": "running", "offset": 50, "total": 200},
+    })
+    res = await client.get("/api/index/status")
+    assert res.status_code == 200
+    data = res.json()
+    assert data["active_collection"] == "legal_documents"
+    assert data["migration"]["percent"] == 25.0
+
+
+async def test_run_migration_cuts_over(mock_db):
+    docs: dict = {}
+    mock_db.vector_index_state = _state_collection(docs)
+    source = MagicMock()
+    source.count.return_value = 2
+    source.get.side_effect = [
+        [StoredChunk("c1", "a", {}), StoredChunk("c2", "b", {})],
+        [],
+    ]
+    source.list_ids.return_value = ["c1", "c2"]
+    target = MagicMock()
+    target.list_ids.return_value = ["c1", "c2"]
+
+    with (
+        patch("backend.core.database._db", mock_db),
+        patch.object(reindex.vector_store, "drop_collection"),
+        patch.object(reindex.vector_store, "get_store", side_effect=[source, target]),
+        patch.object(reindex.vector_store, "set_shadow_collection"),
+        patch.object(reindex.vector_store, "promote_shadow") as promote,
+        patch("backend.services.reindex.embed_texts", return_value=[[0.1], [0.2]]),
+        patch("backend.services.reindex.clause_index.tag_embeddings", return_value=[{}, {}]),
+        patch("backend.services.reindex.asyncio.sleep", new_callable=AsyncMock),
+    ):
+        await reindex.run_migration("legal_documents", "old-model", "new-model")
+
+    target.upsert.assert_called_once()
+    promote.assert_called_once()
+    assert docs["active"]["embedding_model"] == "new-model"
+    assert docs["migration"]["status"] == "completed"
+    assert docs["migration"]["offset"] == 2
+
+
+async def test_run_migration_drops_chunks_deleted_during_scan(mock_db):
+    docs: dict = {}
+    mock_db.vector_index_state = _state_collection(docs)
+    source = MagicMock()
+    source.count.return_value = 2
+    source.get.side_effect = [[StoredChunk("c1", "a", {}), StoredChunk("c2", "b", {})], []]
+    # c2 was deleted from the source after its page was copied
+    source.list_ids.return_value = ["c1"]
+    target = MagicMock()
+    target.list_ids.return_value = ["c1", "c2"]
+
+    with (
+        patch("backend.core.database._db", mock_db),
+        patch.object(reindex.vector_store, "drop_collection"),
+        patch.object(reindex.vector_store, "get_store", side_effect=[source, target]),
+        patch.object(reindex.vector_store, "set_shadow_collection"),
+        patch.object(reindex.vector_store, "promote_shadow"),
+        patch("backend.services.reindex.embed_texts", return_value=[[0.1], [0.2]]),
+        patch("backend.services.reindex.clause_index.tag_embeddings", return_value=[{}, {}]),
+        patch("backend.services.reindex.asyncio.sleep", new_callable=AsyncMock),
+    ):
+        await reindex.run_migration("legal_documents", "old-model", "new-model")
+
+    target.delete.assert_called_once_with(ids=["c2"])
+    assert docs["migration"]["status"] == "completed"
@@ -2,6 +2,7 @@
 
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from backend.models.schemas import Citation
 from tests.conftest import _make_async_cursor
 
 
@@ -19,20 +20,61 @@ async def test_clause_library(client):
 
 
 async def test_search_clause(client):
-    """Clause search returns deduplicated results."""
+    """Clause search returns deduplicated results: overlapping neighbour chunks come back as one."""
     mock_clause = {
         "id": "indemnification",
         "name": "Indemnification",
         "queries": ["indemnify", "hold harmless"],
     }
-    mock_result = MagicMock(text="Shall indemnify and hold harmless...", score=0.9)
+    results = [
+        Citation(document_id="d1", document_name="a.pdf", page=2, text="Seller shall indemnify and hold",
+                 score=0.9, chunk_id="d1_chunk_4"),
+        Citation(document_id="d2", document_name="b.pdf", page=1, text="Buyer shall indemnify", score=0.8,
+                 chunk_id="d2_chunk_0"),
+        Citation(document_id="d1", document_name="a.pdf", page=2, text="and hold harmless the Buyer",
+                 score=0.7, chunk_id="d1_chunk_5"),
+    ]
     with (
         patch("backend.routers.legal.get_clause_by_id", return_value=mock_clause),
-        patch("backend.routers.legal.semantic_search", return_value=[mock_result]),
+        patch("backend.routers.legal.multi_query_search", return_value=results) as mock_search,
     ):
         res = await client.get("/api/clauses/indemnification/search")
     assert res.status_code == 200
-    assert res.json()["total_results"] >= 1
+    body = res.json()
+    assert body["total_results"] == 2
+    assert body["results"][0]["text"] == "Seller shall indemnify and hold harmless the Buyer"
+    assert mock_search.call_args.args[0] == ["indemnify", "hold harmless"]
+
+
+async def test_search_clause_reads_precomputed_tags(client):
+    """Once a category is backfilled, clause search is a tag read with no embedding or vector query."""
+    mock_clause = {"id": "indemnification", "name": "Indemnification", "queries": ["indemnify"]}
+    tagged = [Citation(document_id="d1", document_name="a.pdf", text="Shall indemnify", score=0.81)]
+    with (
+        patch("backend.routers.legal.get_clause_by_id", return_value=mock_clause),
+        patch("backend.routers.legal.clause_index.uncovered_categories", new_callable=AsyncMock, return_value=[]),
+        patch("backend.routers.legal.clause_index.tagged_search", return_value=tagged) as mock_tagged,
+        patch("backend.routers.legal.multi_query_search") as mock_search,
+    ):
+        res = await client.get("/api/clauses/indemnification/search?top_k=5")
+    assert res.status_code == 200
+    assert res.json()["results"][0]["score"] == 0.81
+    mock_tagged.assert_called_once_with("indemnification", 15, "000000000000000000000099", None)
+    mock_search.assert_not_called()
+
+
+async def test_tag_document_matter_syncs_chunk_metadata(client, mock_db):
+    """Retagging a document rewrites the filter attributes on its chunks, switching removed tags off."""
+    mock_db.documents.find_one_and_update = AsyncMock(return_value={
+        "document_id": "d1", "matter": "Old", "client": "", "tags": ["Draft"], "document_type": "Contract",
+    })
+    with patch("backend.routers.legal.vector_store.update_document_metadata", return_value=3) as mock_update:
+        res = await client.put("/api/documents/d1/matter", json={"matter": "Acme v. Beta", "tags": ["NDA"]})
+    assert res.status_code == 200
+    doc_id, org_id, attributes = mock_update.call_args.args
+    assert (doc_id, org_id) == ("d1", "000000000000000000000099")
+    assert attributes["matter"] == "Acme v. Beta" and attributes["document_type"] == "Contract"
+    assert attributes["tag_draft"] is False and attributes["tag_nda"] is True
 
 
 async def test_bookmarks_crud(client, mock_db):
@@ -0,0 +1,101 @@
+"""Tests for the MongoDB ↔ vector store consistency sweep."""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from backend.services import index_reconciler
+from backend.services.vectordb.numpy_store import NumpyVectorStore
+from tests.conftest import _make_async_cursor
+
+
+def _store(tmp_path):
+    store = NumpyVectorStore(tmp_path)
+    ids = ["kept_chunk_0", "kept_chunk_1", "gone_chunk_0", "short_chunk_0"]
+    store.add(ids, [[1.0, 0.0]] * len(ids), ["t"] * len(ids), [{"document_id": i.split("_chunk_")[0]} for i in ids])
+    return store
+
+
+async def test_reconcile_deletes_orphans_and_requeues_incomplete(tmp_path, mock_db):
+    store = _store(tmp_path)
+    stale = datetime.now(timezone.utc) - timedelta(hours=2)
+    docs = [
+        {"document_id": "kept", "status": "ready", "chunk_count": 2},
+        {"document_id": "short", "status": "ready", "chunk_count": 3},
+        {"document_id": "stuck", "status": "processing", "processing_started_at": stale},
+        {"document_id": "fresh", "status": "pending", "uploaded_at": datetime.now(timezone.utc)},
+    ]
+    mock_db.documents.find = MagicMock(side_effect=[_make_async_cursor(docs), _make_async_cursor([])])
+
+    with (
+        patch("backend.core.database._db", mock_db),
+        patch.object(index_reconciler.vector_store, "get_store", return_value=store),
+        patch.object(index_reconciler.vector_store, "_write_targets", return_value=[("coll", "m")]),
+        patch.object(index_reconciler, "_requeue", new_callable=AsyncMock) as requeue,
+    ):
+        dry = await index_reconciler.reconcile(dry_run=True, throttle=0)
+        assert dry["orphan_chunks"] == 1 and store.count() == 4
+
+        mock_db.documents.find = MagicMock(side_effect=[_make_async_cursor(docs), _make_async_cursor([])])
+        report = await index_reconciler.reconcile(throttle=0)
+
+    assert report["orphan_documents"] == 1
+    assert report["orphan_chunks_deleted"] == 1
+    assert sorted(store.list_ids()) == ["kept_chunk_0", "kept_chunk_1", "short_chunk_0"]
+    assert report["incomplete_documents"] == ["short", "stuck"]
+    assert [c.args[0]["document_id"] for c in requeue.await_args_list] == ["short", "stuck"]
+
+
+async def test_only_one_worker_holds_the_lease(mock_db):
+    from pymongo.errors import DuplicateKeyError
+
+    lease: dict = {}
+
+    async def find_one_and_update(query, update, upsert=False, return_document=None):  # noqa: ARG001
+        now = update["$set"]["expires_at"] - timedelta(seconds=60)
+        if not lease:
+            lease.update(update["$set"])
+            return dict(lease)
+        if lease["owner"] == update["$set"]["owner"] or lease["expires_at"] < now:
+            lease.update(update["$set"])
+            return dict(lease)
+        raise DuplicateKeyError("E11000")
+
+    mock_db.vector_index_state.find_one_and_update = AsyncMock(side_effect=find_one_and_update)
+    with patch("backend.core.database._db", mock_db):
+        assert await index_reconciler.acquire_lease(60, owner="worker-a")
+        assert not await index_reconciler.acquire_lease(60, owner="worker-b")
+        assert await index_reconciler.acquire_lease(60, owner="worker-a")
+
+        lease["expires_at"] = datetime.now(timezone.utc) - timedelta(seconds=1)
+        assert await index_reconciler.acquire_lease(60, owner="worker-b")
+
+
+async def test_reconcile_endpoint_runs_the_sweep_in_the_server(client):
+    with patch.object(index_reconciler, "reconcile", new_callable=AsyncMock, return_value={"dry_run": True}) as sweep:
+        res = await client.post("/api/index/reconcile?dry_run=true")
+    assert res.status_code == 200 and res.json() == {"dry_run": True}
+    sweep.assert_awaited_once_with(dry_run=True)
+
+    with patch.object(index_reconciler, "acquire_lease", new_callable=AsyncMock, return_value=False):
+        res = await client.post("/api/index/reconcile")
+    assert res.status_code == 409
+
+
+async def test_scripts_refuse_to_write_while_a_server_is_running(mock_db):
+    from backend.scripts._server_check import exit_if_server_running
+
+    mock_db.vector_index_state.find = MagicMock(return_value=_make_async_cursor([{"_id": "server:host:1:ab"}]))
+    with (
+        patch("backend.core.database._db", mock_db),
+        patch("backend.scripts._server_check.close_db", new_callable=AsyncMock),
+        pytest.raises(SystemExit),
+    ):
+        await exit_if_server_running()
+    query = mock_db.vector_index_state.find.call_args.args[0]
+    assert query["_id"] == {"$regex": "^server:"} and "$gt" in query["expires_at"]
+
+    mock_db.vector_index_state.find = MagicMock(return_value=_make_async_cursor([]))
+    with patch("backend.core.database._db", mock_db):
+        await exit_if_server_running()
@@ -2,18 +2,22 @@
 
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import pytest
+
 
 async def test_search(client):  # noqa: ARG001
     """Search returns results."""
+    from backend.models.schemas import Citation
+
     mock_results = [
-        {
-            "document_id": "doc-1",
-            "text": "Indemnification clause found",
-            "document_name": "contract.pdf",
-            "page": 3,
-            "paragraph": 1,
-            "score": 0.85,
-        },
+        Citation(
+            document_id="doc-1",
+            text="Indemnification clause found",
+            document_name="contract.pdf",
+            page=3,
+            paragraph=1,
+            score=0.85,
+        ),
     ]
     with patch("backend.routers.search.semantic_search", return_value=mock_results):
         res = await client.post("/api/search", json={"query": "indemnification", "top_k": 5})
@@ -31,6 +35,51 @@ async def test_search_empty_results(client):
     assert res.json()["total_results"] == 0
 
 
+async def test_search_server_timing(client):
+    """With server timing enabled, stages timed in the services appear in the Server-Timing header."""
+    from backend.middleware import logging as request_logging
+
+    settings = request_logging.get_settings().model_copy(update={"server_timing_enabled": True})
+    store = MagicMock()
+    store.search.return_value = [[]]
+    with (
+        patch.object(request_logging, "get_settings", return_value=settings),
+        patch("backend.services.search_engine.query_embedding", return_value=[0.1] * 8),
+        patch("backend.services.vector_store.get_store", return_value=store),
+    ):
+        res = await client.post("/api/search", json={"query": "indemnification"})
+    assert res.status_code == 200
+    header = res.headers["Server-Timing"]
+    assert "vector_search;dur=" in header
+    assert "total;dur=" in header
+
+    with patch("backend.routers.search.semantic_search", return_value=[]):
+        res = await client.post("/api/search", json={"query": "termination"})
+    assert "Server-Timing" not in res.headers
+
+
+def test_span_is_noop_without_trace():
+    import contextvars
+
+    from backend.core import tracing
+
+    assert tracing.span("embed") is tracing.span("llm")
+
+    def traced():
+        stages = tracing.start_trace()
+        with tracing.span("llm"):
+            pass
+        with tracing.span("llm"):
+            pass
+        return stages()
+
+    # A copied context keeps the trace from leaking into later tests
+    [stage] = contextvars.copy_context().run(traced)
+    assert (stage.name, stage.count) == ("llm", 2)
+    assert 'llm;dur=' in tracing.server_timing_header([stage], 5.0)
+    assert tracing.span("llm") is tracing.span("embed")
+
+
 async def test_chat_status(client):
     """Chat status returns provider info."""
     mock_manager = MagicMock()
@@ -59,3 +108,694 @@ async def test_chat(client):
     assert "answer" in data
     assert "citations" in data
     assert "follow_up_suggestions" in data
+
+
+async def test_chat_stream_sends_citations_then_tokens(client):
+    """SSE chat: citations first, then each token as the provider yields it, then done."""
+    import json
+
+    from backend.models.schemas import Citation
+
+    async def tokens(**kwargs):  # noqa: ARG001
+        for text in ["The clause ", "caps liability."]:
+            yield text
+
+    citation = Citation(document_id="doc-1", document_name="contract.pdf", text="snippet", score=0.9, chunk_id="doc-1_chunk_0")
+    manager = MagicMock()
+    manager.generate_stream = tokens
+    with (
+        patch("backend.services.rag_engine.semantic_search", return_value=[citation]),
+        patch("backend.services.rag_engine.generate_follow_ups", AsyncMock(return_value=["Is the cap mutual?"])),
+        patch("backend.routers.chat.get_llm_manager", return_value=manager),
+    ):
+        res = await client.post("/api/chat/stream", json={"query": "What is the liability cap?"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    events = [
+        (block.split("\n")[0].removeprefix("event: "), json.loads(block.split("\n")[1].removeprefix("data: ")))
+        for block in res.text.strip().split("\n\n")
+    ]
+    assert [name for name, _ in events] == ["citations", "token", "token", "done", "follow_ups"]
+    assert events[0][1]["citations"][0]["chunk_id"] == "doc-1_chunk_0"
+    assert "".join(data["text"] for name, data in events if name == "token") == "The clause caps liability."
+    assert events[-1][1]["follow_up_suggestions"] == ["Is the cap mutual?"]
+
+    with (
+        patch("backend.services.rag_engine.semantic_search", side_effect=ConnectionError("Vector store unreachable")),
+        patch("backend.routers.chat.get_llm_manager", return_value=manager),
+    ):
+        res = await client.post("/api/chat/stream", json={"query": "What is the liability cap?"})
+    assert res.status_code == 503 and res.json()["detail"] == "Vector store unreachable"
+
+
+async def test_chat_follow_ups_fall_back_to_heuristics(client):
+    """/chat/follow-ups returns heuristic suggestions when the LLM is too slow."""
+    import asyncio
+
+    from backend.services import rag_engine
+
+    async def slow(*args):  # noqa: ARG001
+        await asyncio.sleep(5)
+
+    citation = {"document_id": "doc-1", "document_name": "msa.pdf", "text": "Termination on 30 days notice.", "score": 0.9}
+    settings = rag_engine.get_settings().model_copy(update={"follow_up_timeout_seconds": 0.05})
+    with (
+        patch.object(rag_engine, "generate_follow_ups", side_effect=slow),
+        patch.object(rag_engine, "get_settings", return_value=settings),
+        patch("backend.routers.chat.get_llm_manager"),
+    ):
+        res = await client.post(
+            "/api/chat/follow-ups",
+            json={"query": "Can we exit early?", "answer": "Either party may end it.", "citations": [citation]},
+        )
+    assert res.status_code == 200
+    assert res.json()["follow_up_suggestions"] == [
+        "What does the termination clause say?",
+        "What else in msa.pdf relates to this?",
+        "Are there any exceptions or carve-outs to this?",
+    ]
+
+
+async def test_generate_stream_falls_back_before_first_token():
+    """A provider that fails before yielding hands over to the next; one that fails mid-answer raises."""
+    from backend.services.llm.manager import LLMManager
+
+    class Provider:
+        def __init__(self, pieces, fail):
+            self.pieces, self.fail = pieces, fail
+
+        async def generate_stream(self, prompt, system=None):  # noqa: ARG002
+            for piece in self.pieces:
+                yield piece
+            if self.fail:
+                raise ConnectionError("down")
+
+    manager = LLMManager()
+    config = {"fallback_chain": ["ollama", "anthropic"]}
+    providers = {"ollama": Provider([], True), "anthropic": Provider(["a", "b"], False)}
+    with (
+        patch.object(manager, "_get_org_config", AsyncMock(return_value=config)),
+        patch.object(manager, "_build_provider", side_effect=lambda name, _: providers[name]),
+    ):
+        assert [t async for t in manager.generate_stream("q", org_id="org-1")] == ["a", "b"]
+
+        providers["ollama"] = Provider(["partial"], True)
+        with pytest.raises(ConnectionError):
+            [t async for t in manager.generate_stream("q", org_id="org-1")]
+
+
+def test_multi_query_search_fuses_by_chunk_id():
+    """One embedding batch and one store query; duplicates across phrasings collapse by chunk ID."""
+    from backend.services.search_engine import multi_query_search
+    from backend.services.vectordb.base import VectorHit
+
+    def hit(chunk_id, distance):
+        return VectorHit(id=chunk_id, text="same text", metadata={"document_id": "d1"}, distance=distance)
+
+    hit_lists = [[hit("d1_chunk_0", 0.4), hit("d1_chunk_1", 0.5)], [hit("d1_chunk_1", 0.2), hit("d1_chunk_2", 0.3)]]
+    with (
+        patch("backend.services.search_engine.embed_texts", return_value=[[0.1], [0.2]]) as mock_embed,
+        patch("backend.services.search_engine.vector_store.search_many", return_value=hit_lists) as mock_search,
+    ):
+        results = multi_query_search(["indemnify", "hold harmless"], top_k=5)
+        rrf = multi_query_search(["indemnify", "hold harmless"], top_k=5, fusion="rrf")
+
+    assert mock_embed.call_count == 2 and mock_search.call_count == 2
+    assert [r.chunk_id for r in results] == ["d1_chunk_1", "d1_chunk_2", "d1_chunk_0"]
+    assert results[0].score == 0.9
+    assert rrf[0].chunk_id == "d1_chunk_1"
+
+
+def test_tokenize_keeps_legal_identifiers():
+    from backend.services.lexical_index import tokenize
+
+    assert tokenize("Under § 14.2, the Buyer pays $2,500,000.") == ["under", "§", "14.2", "buyer", "pays", "$2500000", "2500000"]
+
+
+def test_bm25_ranks_exact_terms_and_survives_reload(tmp_path):
+    from backend.services.lexical_index import LexicalIndex
+
+    index = LexicalIndex(tmp_path)
+    index.add("org1", ["d1_chunk_0", "d1_chunk_1", "d2_chunk_0"], ["d1", "d1", "d2"], [
+        "Seller shall indemnify Buyer for losses.",
+        "Payment of $2,500,000 is due under Section 14.2 at closing.",
+        "Payment is due at closing.",
+    ])
+    index.add("org2", ["d3_chunk_0"], ["d3"], ["Section 14.2 payment of $2,500,000."])
+
+    assert [chunk_id for chunk_id, _ in index.search("section 14.2 payment", tenant="org1")] == ["d1_chunk_1", "d2_chunk_0"]
+    assert index.search("2500000", tenant="org1")[0][0] == "d1_chunk_1"
+
+    assert index.delete_documents(["d1"]) == 2  # No tenant: every partition is checked
+    reloaded = LexicalIndex(tmp_path)
+    assert reloaded.count("org1") == 1
+    assert reloaded.search("section 14.2", tenant="org1") == []
+    assert reloaded.search("section 14.2", tenant="org2")[0][0] == "d3_chunk_0"
+
+
+def test_bm25_with_no_live_terms_matches_nothing(tmp_path):
+    """A tenant whose live chunks have no indexable terms returns no matches instead of dividing by zero."""
+    from backend.services.lexical_index import LexicalIndex
+
+    index = LexicalIndex(tmp_path)
+    index.add("org1", ["d1_chunk_0", "d2_chunk_0"], ["d1", "d2"], ["The, of, and...", "Indemnify the buyer."])
+    index.delete_documents(["d2"], "org1")
+
+    assert index.search("indemnify", tenant="org1") == []
+    assert index.boolean_search("indemnify OR buyer", tenant="org1") == ([], 0)
+
+
+def test_hybrid_search_fuses_dense_and_lexical_hits():
+    """A chunk found only by exact terms is fetched and ranked alongside dense hits."""
+    from backend.services.search_engine import hybrid_search
+    from backend.services.vectordb.base import StoredChunk, VectorHit
+
+    dense = [
+        VectorHit(id="d1_chunk_0", text="dense and lexical", metadata={"document_id": "d1"}, distance=0.6),
+        VectorHit(id="d2_chunk_0", text="dense only", metadata={"document_id": "d2"}, distance=0.5),
+    ]
+    lexical = [("d3_chunk_4", 7.1), ("d1_chunk_0", 3.2)]
+    lexical_only = StoredChunk(id="d3_chunk_4", text="lexical only", metadata={"document_id": "d3", "page": 2})
+    with (
+        patch("backend.services.search_engine.query_embedding", return_value=[0.1]),
+        patch("backend.services.search_engine.vector_store.search", return_value=dense),
+        patch("backend.services.search_engine.lexical_index.search", return_value=lexical),
+        patch("backend.services.search_engine.vector_store.get_chunks", return_value=[lexical_only]) as mock_get,
+    ):
+        results = hybrid_search("section 14.2", top_k=3, org_id="org1")
+
+    assert [c.chunk_id for c in results] == ["d1_chunk_0", "d3_chunk_4", "d2_chunk_0"]
+    mock_get.assert_called_once_with(["d3_chunk_4"], "org1")
+    assert results[1].document_id == "d3" and results[1].page == 2
+    assert 0 < results[2].score < results[0].score <= 1.0
+
+
+async def test_search_hybrid_mode(client):
+    with patch("backend.routers.search.hybrid_search", return_value=[]) as mock_hybrid:
+        res = await client.post("/api/search", json={"query": "Section 14.2", "mode": "hybrid"})
+    assert res.status_code == 200
+    mock_hybrid.assert_called_once()
+
+
+async def test_lexical_backfill_indexes_existing_chunks_once(tmp_path, mock_db):
+    """Chunks stored before hybrid search get postings; chunks already indexed are left alone."""
+    from backend.services import lexical_backfill
+    from backend.services.lexical_index import LexicalIndex
+    from backend.services.vectordb.numpy_store import NumpyVectorStore
+
+    store = NumpyVectorStore(tmp_path / "vectors")
+    store.add(
+        ["d1_chunk_0", "d2_chunk_0"], [[1.0, 0.0], [0.0, 1.0]], ["Section 14.2 indemnity", "Payment at closing"],
+        [{"document_id": "d1", "organization_id": "org1"}, {"document_id": "d2", "organization_id": "org1"}],
+    )
+    index = LexicalIndex(tmp_path / "lexical")
+    index.add("org1", ["d2_chunk_0"], ["d2"], ["Payment at closing"])
+    # Completed before positions were indexed: that run's postings no longer load
+    state: dict = {"lexical_index": {"completed_at": "2024-01-01"}}
+    mock_db.vector_index_state.find_one = AsyncMock(side_effect=lambda q: state.get(q["_id"]))
+
+    async def _update(q, update, upsert=False):
+        state[q["_id"]] = update["$set"]
+    mock_db.vector_index_state.update_one = AsyncMock(side_effect=_update)
+
+    with (
+        patch("backend.core.database._db", mock_db),
+        patch.object(lexical_backfill.vector_store, "get_store", return_value=store),
+        patch.object(lexical_backfill.lexical_index, "get_index", return_value=index),
+        patch("backend.services.lexical_backfill.asyncio.sleep", new_callable=AsyncMock),
+    ):
+        assert not await lexical_backfill.is_backfilled()
+        assert await lexical_backfill.backfill() == 1
+        assert await lexical_backfill.is_backfilled()
+
+    assert index.search("14.2", tenant="org1")[0][0] == "d1_chunk_0"
+    assert index.count("org1") == 2
+
+
+async def test_hybrid_search_says_when_the_term_index_is_building(client):
+    from backend.services import lexical_backfill
+
+    with (
+        patch("backend.routers.search.hybrid_search", return_value=[]),
+        patch("backend.routers.search.semantic_search", return_value=[]),
+        patch.object(lexical_backfill, "is_building", return_value=True),
+    ):
+        hybrid = await client.post("/api/search", json={"query": "Section 14.2", "mode": "hybrid"})
+        semantic = await client.post("/api/search", json={"query": "Section 14.2"})
+    assert hybrid.json()["index_building"] is True
+    assert semantic.json()["index_building"] is False
+
+    with patch.object(lexical_backfill, "is_building", return_value=True):
+        boolean = await client.post("/api/search", json={"query": '"section 14.2"', "mode": "boolean"})
+    assert boolean.status_code == 503 and "Retry-After" in boolean.headers
+
+
+def test_search_filters_build_metadata_clauses(tmp_path):
+    from datetime import datetime
+
+    from backend.models.schemas import SearchFilters
+    from backend.services.lexical_index import LexicalIndex
+    from backend.services.search_filters import chunk_attributes, where_clause
+
+    assert where_clause(None) is None
+    assert where_clause(SearchFilters()) is None
+    assert where_clause(SearchFilters(matter="Acme v. Beta")) == {"matter": "Acme v. Beta"}
+    assert where_clause(SearchFilters(client="Acme", tags=["Due Diligence"], date_from=datetime(2024, 1, 1))) == {
+        "$and": [{"client": "Acme"}, {"tag_due_diligence": True}, {"uploaded_ts": {"$gte": 1704067200}}],
+    }
+    # Metadata updates merge, so a dropped tag has to be switched off explicitly
+    attributes = chunk_attributes({"matter": "M-1", "tags": ["NDA"]}, previous_tags=["NDA", "Draft"])
+    assert attributes == {"matter": "M-1", "client": "", "document_type": "", "tag_draft": False, "tag_nda": True}
+
+    index = LexicalIndex(tmp_path)
+    index.add("org1", ["d1_chunk_0", "d2_chunk_0"], ["d1", "d2"], ["Payment is due.", "Payment is late."])
+    assert [chunk_id for chunk_id, _ in index.search("payment", tenant="org1", document_ids={"d2"})] == ["d2_chunk_0"]
+    assert index.boolean_search("payment", tenant="org1", document_ids=set()) == ([], 0)
+
+
+async def test_search_filters_reach_both_indexes(client, mock_db):
+    from tests.conftest import _make_async_cursor
+
+    mock_db.documents.find = MagicMock(return_value=_make_async_cursor([
+        {"document_id": "d1", "tags": ["Due-Diligence"]},
+        {"document_id": "d2", "tags": ["NDA", "due diligence"]},
+    ]))
+    with patch("backend.routers.search.hybrid_search", return_value=[]) as mock_hybrid:
+        res = await client.post("/api/search", json={
+            "query": "payment", "mode": "hybrid",
+            "filters": {"matter": "Acme v. Beta", "tags": ["nda", "Due Diligence"]},
+        })
+    assert res.status_code == 200
+    kwargs = mock_hybrid.call_args.kwargs
+    assert kwargs["where"] == {"$and": [{"matter": "Acme v. Beta"}, {"tag_nda": True}, {"tag_due_diligence": True}]}
+    # Both sides compare tags by tag_key, so punctuation and spacing variants match alike
+    assert kwargs["document_ids"] == {"d2"}
+    assert mock_db.documents.find.call_args.args[0]["matter"] == "Acme v. Beta"
+
+
+def test_query_language_parses_phrases_proximity_and_negation():
+    from backend.services.query_language import (
+        And,
+        Near,
+        Phrase,
+        QuerySyntaxError,
+        Term,
+        Wildcard,
+        parse,
+    )
+
+    assert parse('"hold harmless" NEAR/5 indemnif*') == Near(
+        Phrase(((Term("hold"), 0), (Term("harmless"), 1))), Wildcard("indemnif*"), 5,
+    )
+    # Stop words keep their position inside a phrase
+    assert parse('"change of control" AND NOT assignment') == And(
+        (Phrase(((Term("change"), 0), (Term("control"), 2))),), (Term("assignment"),),
+    )
+    for bad in ['"unterminated', "(missing", "NEAR/3 x", "a AND", "the"]:
+        with pytest.raises(QuerySyntaxError):
+            parse(bad)
+
+
+def test_boolean_search_uses_positions(tmp_path):
+    from backend.services.lexical_index import LexicalIndex
+
+    index = LexicalIndex(tmp_path)
+    index.add("org1", ["a", "b", "c", "d"], ["A", "B", "C", "D"], [
+        "The Seller shall hold harmless and indemnify the Buyer.",
+        "Upon a change of control the agreement terminates; no assignment without consent.",
+        "A change of control triggers payment of $2,500,000.",
+        "The Buyer shall hold the Seller harmless; indemnification survives.",
+    ])
+
+    def ids(query):
+        return sorted(chunk_id for chunk_id, _ in index.boolean_search(query, tenant="org1")[0])
+
+    assert ids('"hold harmless" NEAR/5 indemnif*') == ["a"]
+    assert ids('"change of control" AND NOT assignment') == ["c"]
+    assert ids('"$2,500,000" OR "hold * * harmless"') == ["c", "d"]
+    assert ids("(seller OR buyer) NEAR/1 harmless") == ["d"]
+    assert ids("NOT buyer") == ["b", "c"]
+
+
+async def test_search_boolean_mode_rejects_malformed_query(client):
+    res = await client.post("/api/search", json={"query": '"hold harmless', "mode": "boolean"})
+    assert res.status_code == 400
+    assert "Unterminated phrase" in res.json()["detail"]
+
+
+def test_boolean_search_ranks_matches_semantically():
+    from backend.services.search_engine import boolean_search
+    from backend.services.vectordb.base import StoredChunk
+
+    matches = ([("d1_chunk_0", 4.0), ("d2_chunk_0", 2.0)], 2)
+    stored = [
+        StoredChunk(id="d1_chunk_0", text="far", metadata={"document_id": "d1"}, embedding=[0.0, 1.0]),
+        StoredChunk(id="d2_chunk_0", text="close", metadata={"document_id": "d2"}, embedding=[1.0, 0.0]),
+    ]
+    with (
+        patch("backend.services.search_engine.lexical_index.boolean_search", return_value=matches),
+        patch("backend.services.search_engine.vector_store.get_chunks", return_value=stored),
+        patch("backend.services.search_engine.query_embedding", return_value=[1.0, 0.0]),
+    ):
+        by_bm25 = boolean_search("indemnif*", top_k=5)
+        by_meaning = boolean_search("indemnif*", top_k=5, rank_query="capped liability")
+
+    assert [c.chunk_id for c in by_bm25] == ["d1_chunk_0", "d2_chunk_0"]
+    assert [c.score for c in by_bm25] == [1.0, 0.5]
+    assert [c.chunk_id for c in by_meaning] == ["d2_chunk_0", "d1_chunk_0"]
+    assert by_meaning[0].score == 1.0
+
+
+def _citations(n):
+    from backend.models.schemas import Citation
+
+    return [
+        Citation(document_id="d1", document_name="a.pdf", text=f"chunk {i}", score=0.9 - i / 100, chunk_id=f"d1_chunk_{i}")
+        for i in range(n)
+    ]
+
+
+def test_rerank_orders_by_cross_encoder_and_caches_pairs():
+    from backend.services import reranker
+
+    model = MagicMock()
+    model.predict.side_effect = lambda pairs, **kw: [float(text.split()[1]) for _, text in pairs]
+    reranker._cache.clear()
+    with patch.object(reranker, "load_model", return_value=model):
+        first = reranker.rerank("cap on liability", _citations(5), top_k=3)
+        again = reranker.rerank("cap on liability", _citations(5), top_k=3)
+
+    assert [c.chunk_id for c in first] == ["d1_chunk_4", "d1_chunk_3", "d1_chunk_2"]
+    assert again == first
+    assert model.predict.call_count == 1  # Second call served from the score cache
+
+
+def test_rerank_keeps_dense_order_when_over_budget():
+    from backend.services import reranker
+
+    model = MagicMock()
+    model.predict.side_effect = lambda pairs, **kw: [float(text.split()[1]) for _, text in pairs]
+    reranker._cache.clear()
+    settings = reranker.get_settings().model_copy(update={"rerank_batch_size": 2, "rerank_budget_ms": -1.0})
+    with patch.object(reranker, "load_model", return_value=model), patch.object(reranker, "get_settings", return_value=settings):
+        results = reranker.rerank("cap on liability", _citations(5), top_k=3)
+
+    assert [c.chunk_id for c in results] == ["d1_chunk_0", "d1_chunk_1", "d1_chunk_2"]
+
+
+async def test_search_results_are_cached_until_the_index_changes(client):
+    from backend.services import search_cache, vector_store
+
+    with patch("backend.routers.search.semantic_search", return_value=[]) as mock_search:
+        await client.post("/api/search", json={"query": "Indemnification  cap"})
+        await client.post("/api/search", json={"query": "indemnification cap"})  # Same normalized query
+        assert mock_search.call_count == 1
+
+        with patch.object(vector_store, "_write_targets", return_value=[]):
+            vector_store.delete_documents(["doc-9"], "000000000000000000000099")
+        await client.post("/api/search", json={"query": "indemnification cap"})
+        assert mock_search.call_count == 2
+
+    stats = search_cache.get_cache().stats("000000000000000000000099")
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+
+
+async def test_paginated_search_serves_pages_and_export_from_one_retrieval(client):
+    from backend.models.schemas import Citation
+    from backend.services import search_cursors
+
+    ranked = [
+        Citation(document_id=f"d{i}", document_name=f"doc{i}.pdf", text=f"=clause {i}", score=1 - i / 100)
+        for i in range(25)
+    ]
+    with patch("backend.routers.search.semantic_search", return_value=ranked) as mock_search:
+        res = await client.post("/api/search", json={"query": "termination", "top_k": 10, "paginate": True})
+        body = res.json()
+        assert [r["document_id"] for r in body["results"]] == [f"d{i}" for i in range(10)]
+
+        page = (await client.get("/api/search/page", params={"cursor": body["next_cursor"], "limit": 10})).json()
+        assert page["results"][0]["document_id"] == "d10"
+        last = (await client.get("/api/search/page", params={"cursor": page["next_cursor"], "limit": 10})).json()
+        assert len(last["results"]) == 5 and last["next_cursor"] is None
+
+        export = await client.get("/api/search/export", params={"cursor": body["cursor"]})
+    assert mock_search.call_count == 1
+    assert mock_search.call_args.kwargs["top_k"] == 200
+    assert export.headers["content-type"].startswith("text/csv")
+    rows = export.text.strip().splitlines()
+    assert len(rows) == 26 and rows[1].startswith("1,doc0.pdf") and "'=clause 0" in rows[1]
+
+    assert (await client.get("/api/search/page", params={"cursor": "bm9wZTow"})).status_code == 404
+    assert (await client.get("/api/search/page", params={"cursor": "%%%"})).status_code == 400
+    token = search_cursors.decode(body["cursor"])[0]
+    negative = search_cursors.encode(token, -5)
+    assert (await client.get("/api/search/page", params={"cursor": negative})).status_code == 400
+    with pytest.raises(ValueError, match="Malformed cursor"):
+        search_cursors.decode(negative)
+
+
+def test_result_postprocessing_merges_diversifies_and_groups():
+    from backend.models.schemas import Citation
+    from backend.services import result_processing
+    from backend.services.vectordb.base import StoredChunk
+
+    def hit(chunk_id, score, text, page=1):
+        return Citation(document_id=chunk_id.split("_")[0], document_name=f"{chunk_id[:2]}.pdf", page=page,
+                        text=text, score=score, chunk_id=chunk_id)
+
+    ranked = [
+        hit("d1_chunk_3", 0.9, "c d e f"),
+        hit("d1_chunk_2", 0.85, "a b c d"),
+        hit("d2_chunk_0", 0.8, "other"),
+        hit("d1_chunk_4", 0.75, "x y", page=2),  # Next page: kept apart
+        hit("d1_chunk_9", 0.7, "far away"),
+    ]
+    merged = result_processing.merge_adjacent(ranked)
+    assert [(c.chunk_id, c.text, c.score) for c in merged[:2]] == [("d1_chunk_3", "a b c d e f", 0.9), ("d2_chunk_0", "other", 0.8)]
+    assert len(merged) == 4
+
+    groups = result_processing.group_by_document(merged, per_document=2)
+    assert [(g.document_id, [h.chunk_id for h in g.hits]) for g in groups] == [
+        ("d1", ["d1_chunk_3", "d1_chunk_4"]), ("d2", ["d2_chunk_0"]),
+    ]
+
+    # d1_chunk_4 repeats d1_chunk_3, so diversification promotes the distinct d2 hit
+    embeddings = [
+        StoredChunk(id="d1_chunk_3", text="", metadata={}, embedding=[1.0, 0.0]),
+        StoredChunk(id="d1_chunk_4", text="", metadata={}, embedding=[0.99, 0.1]),
+        StoredChunk(id="d2_chunk_0", text="", metadata={}, embedding=[0.0, 1.0]),
+    ]
+    candidates = [hit("d1_chunk_3", 0.9, "a"), hit("d1_chunk_4", 0.88, "b", page=2), hit("d2_chunk_0", 0.8, "c")]
+    with patch("backend.services.result_processing.vector_store.get_chunks", return_value=embeddings):
+        diverse = result_processing.diversify(candidates, top_k=2, diversity=0.5)
+    assert [c.chunk_id for c in diverse] == ["d1_chunk_3", "d2_chunk_0"]
+
+
+async def test_search_stream_emits_ndjson_lines(client):
+    import json
+
+    from backend.models.schemas import Citation
+
+    ranked = [Citation(document_id=f"d{i}", document_name="a.pdf", text=f"clause {i}", score=0.9) for i in range(120)]
+    with patch("backend.routers.search.semantic_search", return_value=ranked) as mock_search:
+        res = await client.post("/api/search/stream?limit=100", json={"query": "termination", "merge_adjacent": False})
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in res.text.splitlines()]
+    assert lines[0] == {"type": "header", "query": "termination", "total_results": 100, "index_building": False}
+    assert lines[1]["rank"] == 1 and lines[1]["document_id"] == "d0"
+    assert lines[-1] == {"type": "end"} and len(lines) == 102
+    assert mock_search.call_args.kwargs["top_k"] == 100
+
+
+def test_highlights_terms_and_best_sentence_with_cached_embeddings():
+    from backend.models.schemas import Citation
+    from backend.services import highlighting, result_processing
+
+    text = "Buyer pays $2,500,000 at Closing. Seller shall Indemnify the Buyer for losses."
+    citation = Citation(document_id="d1", document_name="a.pdf", text=text, score=0.9, chunk_id="d1_chunk_0")
+
+    def fake_embed(texts, model_name=None):
+        return [[1.0, 0.0] if "ndemnif" in t else [0.0, 1.0] for t in texts]
+
+    highlighting._sentence_cache.clear()
+    with (
+        patch("backend.services.highlighting.embed_texts", side_effect=fake_embed) as mock_embed,
+        patch("backend.services.highlighting.vector_store.get_active_model", return_value="m"),
+    ):
+        [result] = highlighting.highlight([citation], "indemnify 2500000", query_embedding=[1.0, 0.0])
+        highlighting.highlight([citation], "indemnification", query_embedding=[1.0, 0.0])
+    assert mock_embed.call_count == 1  # Sentences embedded once, then served from the cache
+
+    spans = [(text[h.start:h.end], h.kind) for h in result.highlights]
+    assert spans == [
+        ("$2,500,000", "term"),
+        ("Seller shall Indemnify the Buyer for losses.", "sentence"),
+        ("Indemnify", "term"),
+    ]
+
+    [boolean] = highlighting.highlight([citation], 'indemnif* NOT closing', boolean=True)
+    assert [text[h.start:h.end] for h in boolean.highlights] == ["Indemnify"]
+
+    # Overlapping chunks are merged first; highlights are computed on the merged text
+    left = Citation(document_id="d1", document_name="a.pdf", text="the Seller shall", score=0.9, chunk_id="d1_chunk_0")
+    right = Citation(document_id="d1", document_name="a.pdf", text="Seller shall indemnify Buyer", score=0.8,
+                     chunk_id="d1_chunk_1")
+    [merged] = highlighting.highlight(result_processing.merge_adjacent([left, right]), "indemnify")
+    assert merged.text == "the Seller shall indemnify Buyer"
+    assert [merged.text[h.start:h.end] for h in merged.highlights] == ["indemnify"]
+
+
+async def test_search_highlights_only_the_returned_results(client):
+    """Highlighting runs after post-processing, on the page returned, not on every over-fetched candidate."""
+    from backend.models.schemas import Citation
+    from backend.services import highlighting
+
+    ranked = [
+        Citation(document_id=f"d{i}", document_name=f"doc{i}.pdf", text=f"Indemnify clause {i}.", score=1 - i / 100,
+                 chunk_id=f"d{i}_chunk_0")
+        for i in range(15)
+    ]
+    with (
+        patch("backend.routers.search.semantic_search", return_value=ranked) as mock_search,
+        patch.object(highlighting, "highlight", wraps=highlighting.highlight) as mock_highlight,
+        patch.object(highlighting, "query_embedding") as mock_embed,
+    ):
+        res = await client.post("/api/search", json={"query": "indemnify", "top_k": 5})
+    assert mock_search.call_args.kwargs["top_k"] == 15  # Over-fetched for merging
+    assert len(mock_highlight.call_args.args[0]) == 5
+    mock_embed.assert_not_called()  # Single-sentence results need no query embedding
+    first = res.json()["results"][0]
+    assert first["text"][first["highlights"][0]["start"]:first["highlights"][0]["end"]] == "Indemnify"
+
+
+def test_search_and_highlighting_embed_the_query_once():
+    import numpy as np
+
+    from backend.core.settings import get_settings
+    from backend.services import embeddings, highlighting, search_engine
+
+    text = "Buyer pays at Closing on the date. Seller shall indemnify the Buyer for losses."
+    hit = search_engine.VectorHit(id="d1_chunk_0", text=text, metadata={"document_id": "d1"}, distance=0.2)
+    embeddings._cached_query.cache_clear()
+    with (
+        patch.object(embeddings, "embed_query", return_value=[1.0, 0.0]) as mock_embed,
+        patch("backend.services.search_engine.vector_store.search", return_value=[hit]),
+        patch("backend.services.search_engine.vector_store.get_active_model", return_value="m"),
+        patch("backend.services.highlighting.vector_store.get_active_model", return_value="m"),
+        patch.object(highlighting._sentence_cache, "embeddings", return_value=np.array([[0.0, 1.0], [1.0, 0.0]])),
+    ):
+        results = search_engine.semantic_search("indemnify losses", top_k=1)
+        [result] = highlighting.highlight_results(results, "indemnify losses", "semantic")
+        assert mock_embed.call_count == 1
+        assert [h.kind for h in result.highlights if h.kind == "sentence"] == ["sentence"]
+
+        settings = get_settings().model_copy(update={"highlight_sentences": False})
+        with patch.object(highlighting, "get_settings", return_value=settings):
+            [plain] = highlighting.highlight_results(results, "indemnify", "semantic")
+        assert {h.kind for h in plain.highlights} == {"term"}
+        assert mock_embed.call_count == 1
+
+
+async def test_autocomplete_loads_lazily_and_learns_new_searches(client, mock_db):
+    from tests.conftest import _make_async_cursor
+
+    mock_db.search_history.aggregate = MagicMock(return_value=_make_async_cursor([
+        {"_id": "indemnification cap", "count": 5},
+        {"_id": "indemnity survival", "count": 2},
+        {"_id": "termination for convenience", "count": 9},
+    ]))
+    mock_db.documents.find = MagicMock(return_value=_make_async_cursor([{"defined_terms": ["Indemnified Party"]}]))
+
+    res = await client.get("/api/search/suggest", params={"q": "Indem"})
+    assert res.json()["suggestions"] == [
+        {"text": "indemnification cap", "source": "history"},
+        {"text": "indemnity survival", "source": "history"},
+        {"text": "Indemnified Party", "source": "term"},
+    ]
+
+    with patch("backend.routers.search.semantic_search", return_value=[]):
+        for _ in range(3):
+            await client.post("/api/search", json={"query": "Indemnity  survival"})
+    res = await client.get("/api/search/suggest", params={"q": "indemnity", "limit": 1})
+    assert res.json()["suggestions"] == [{"text": "indemnity survival", "source": "history"}]
+    assert mock_db.search_history.aggregate.call_count == 1  # Built once, then updated in place
+
+
+def test_autocomplete_ranks_short_prefixes_by_frequency():
+    """A frequent query that sorts late still leads the suggestions for its first letters."""
+    from backend.services.autocomplete import _OrgSuggestions
+
+    suggestions = _OrgSuggestions(max_entries=5000)
+    for i in range(2000):
+        suggestions.add(f"a{i:04d} clause", 1, "history")
+    suggestions.add("azure licence", 3, "history")
+    suggestions.add("assignment", 2, "history")
+    assert [e.text for e in suggestions.suggest("a", 2)] == ["azure licence", "assignment"]
+
+    for _ in range(5):
+        suggestions.add("assignment", 1, "history")
+    assert [e.text for e in suggestions.suggest("a", 2)] == ["assignment", "azure licence"]
+    assert [e.text for e in suggestions.suggest("az", 1)] == ["azure licence"]
+    assert [e.text for e in suggestions.suggest("a199", 1)] == ["a1990 clause"]
+
+
+def test_autocomplete_suggests_searches_as_the_history_load_does():
+    """Live searches are shown in the same normalized form as history grouped by MongoDB after a restart."""
+    from backend.services.autocomplete import _OrgSuggestions
+
+    live = _OrgSuggestions(max_entries=100)
+    live.add("Indemnified Party", 0.5, "term")
+    live.add("Termination  For Convenience", 1, "history")
+    live.add("termination for convenience", 1, "history")
+    live.add("INDEMNIFIED PARTY", 1, "history")
+
+    reloaded = _OrgSuggestions(max_entries=100)
+    reloaded.add("termination for convenience", 2, "history")
+    reloaded.add("indemnified party", 1, "history")
+    reloaded.add("Indemnified Party", 0.5, "term")
+
+    for suggestions in (live, reloaded):
+        assert [(e.text, e.weight) for e in suggestions.suggest("term", 5)] == [("termination for convenience", 2)]
+        assert [(e.text, e.source) for e in suggestions.suggest("in", 5)] == [("indemnified party", "history")]
+
+
+async def test_similar_chunks_reuse_the_stored_embedding(client):
+    from backend.services.vectordb.base import StoredChunk, VectorHit
+
+    source = StoredChunk(id="d1_chunk_3", text="Seller shall indemnify", metadata={"document_id": "d1"},
+                         embedding=[0.6, 0.8])
+    hits = [
+        VectorHit(id="d1_chunk_3", text="Seller shall indemnify", metadata={"document_id": "d1"}, distance=0.0),
+        VectorHit(id="d7_chunk_0", text="Vendor shall indemnify", metadata={"document_id": "d7"}, distance=0.2),
+    ]
+    with (
+        patch("backend.services.search_engine.vector_store.get_chunks", return_value=[source]) as mock_get,
+        patch("backend.services.search_engine.vector_store.search", return_value=hits) as mock_search,
+        patch("backend.services.search_engine.query_embedding") as mock_embed,
+    ):
+        res = await client.get("/api/search/similar/d1_chunk_3", params={"top_k": 5, "exclude_document": True})
+    assert res.status_code == 200
+    assert [r["chunk_id"] for r in res.json()["results"]] == ["d7_chunk_0"]
+    mock_embed.assert_not_called()
+    mock_get.assert_called_once_with(["d1_chunk_3"], "000000000000000000000099", include_embeddings=True)
+    assert mock_search.call_args.args[0] == [0.6, 0.8]
+    assert mock_search.call_args.kwargs["where"] == {"document_id": {"$ne": "d1"}}
+
+    with patch("backend.services.search_engine.vector_store.get_chunks", return_value=[]):
+        assert (await client.get("/api/search/similar/missing")).status_code == 404
+
+
+async def test_search_collapses_near_duplicate_documents(client):
+    from backend.models.schemas import Citation
+    from backend.services import near_duplicates
+
+    index = near_duplicates.get_index()
+    await index.add("000000000000000000000099", "draft-1", [1] * 128)
+    await index.add("000000000000000000000099", "draft-2", [1] * 127 + [2])
+    ranked = [
+        Citation(document_id=doc_id, document_name=f"{doc_id}.pdf", text="Seller shall indemnify", score=score)
+        for doc_id, score in [("draft-2", 0.9), ("draft-1", 0.89), ("other", 0.7), ("draft-2", 0.6)]
+    ]
+    with patch("backend.routers.search.semantic_search", return_value=ranked):
+        res = await client.post("/api/search", json={"query": "indemnify", "collapse_duplicates": True})
+    assert [r["document_id"] for r in res.json()["results"]] == ["draft-2", "other", "draft-2"]
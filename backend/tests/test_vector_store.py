@@ -0,0 +1,197 @@
+"""Unit tests for the in-process NumPy vector store backend — no DB needed."""
+
+import numpy as np
+
+from backend.services.vectordb.base import matches_where
+from backend.services.vectordb.ivfpq import IVFPQConfig
+from backend.services.vectordb.numpy_store import NumpyVectorStore, top_k_rows
+
+
+def _unit(*values):
+    v = np.array(values, dtype=np.float32)
+    return (v / np.linalg.norm(v)).tolist()
+
+
+def _seed(store):
+    store.add(
+        ids=["a_chunk_0", "a_chunk_1", "b_chunk_0"],
+        embeddings=[_unit(1, 0, 0), _unit(0, 1, 0), _unit(1, 1, 0)],
+        documents=["alpha", "beta", "gamma"],
+        metadatas=[
+            {"document_id": "a", "organization_id": "org1"},
+            {"document_id": "a", "organization_id": "org1"},
+            {"document_id": "b", "organization_id": "org2"},
+        ],
+    )
+
+
+def test_top_k_rows_orders_best_first():
+    scores = np.array([0.1, 0.9, 0.5, 0.7], dtype=np.float32)
+    assert top_k_rows(scores, 2).tolist() == [1, 3]
+    assert top_k_rows(scores, 10).tolist() == [1, 3, 2, 0]
+
+
+def test_matches_where_operators():
+    meta = {"document_id": "a", "page": 3}
+    assert matches_where(meta, {"document_id": "a"})
+    assert matches_where(meta, {"$and": [{"page": {"$gte": 2}}, {"document_id": {"$in": ["a", "b"]}}]})
+    assert not matches_where(meta, {"$or": [{"page": {"$lt": 2}}, {"document_id": {"$ne": "a"}}]})
+
+
+def test_search_is_partitioned_by_tenant(tmp_path):
+    store = NumpyVectorStore(tmp_path)
+    _seed(store)
+
+    hits = store.search([_unit(1, 0, 0)], top_k=5, tenant="org1")[0]
+    assert [h.id for h in hits] == ["a_chunk_0", "a_chunk_1"]
+    assert hits[0].distance < 0.01
+
+    all_hits = store.search([_unit(1, 0, 0)], top_k=2)[0]
+    assert [h.id for h in all_hits] == ["a_chunk_0", "b_chunk_0"]
+    assert store.count(tenant="org2") == 1
+
+
+def test_delete_update_and_reload(tmp_path):
+    store = NumpyVectorStore(tmp_path)
+    _seed(store)
+
+    assert store.delete(tenant="org1", where={"document_id": "a"}) == 2
+    store.update_metadata(["b_chunk_0"], [{"matter": "M-1"}])
+    store.upsert(["b_chunk_0"], [_unit(0, 0, 1)], ["gamma v2"], [{"document_id": "b", "organization_id": "org2"}])
+
+    reloaded = NumpyVectorStore(tmp_path)
+    assert reloaded.count() == 1
+    [chunk] = reloaded.get(include_embeddings=True)
+    assert chunk.text == "gamma v2"
+    assert abs(chunk.embedding[2] - 1.0) < 1e-3
+
+
+def test_reprocessing_compacts_partition(tmp_path):
+    """Re-adding the same IDs tombstones old rows; the partition compacts instead of growing."""
+    store = NumpyVectorStore(tmp_path)
+    ids = [f"a_chunk_{i}" for i in range(1500)]
+    metas = [{"document_id": "a", "organization_id": "org1"} for _ in ids]
+    for version in range(3):
+        store.upsert(ids, [_unit(1, 0, 0)] * len(ids), [f"v{version} {i}" for i in range(len(ids))], metas)
+
+    partition = store._partition("org1")
+    assert partition.size < 2 * len(ids)
+    assert store.get(ids=["a_chunk_7"])[0].text == "v2 7"
+    assert NumpyVectorStore(tmp_path).get(ids=["a_chunk_7"])[0].text == "v2 7"
+
+
+def test_ivfpq_search_matches_exact_and_survives_reload(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(2000, 16)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"d{i}_chunk_0" for i in range(len(vectors))]
+    config = IVFPQConfig(nlist=16, nprobe=16, subvectors=4, rerank_candidates=50, min_rows=1000)
+
+    store = NumpyVectorStore(tmp_path, config)
+    store.add(ids, vectors.tolist(), ["t"] * len(ids), [{"organization_id": "org1"} for _ in ids])
+    partition = store._partition("org1")
+    partition._trainer.join()
+    assert partition.index is not None
+    assert partition.index.codes.shape == (2000, 4)
+
+    query = vectors[42]
+    hits = store.search([query.tolist()], 5, tenant="org1")[0]
+    assert hits[0].id == "d42_chunk_0"
+    assert abs(hits[0].distance) < 1e-2  # Re-scored exactly, not from PQ codes
+
+    store.delete(ids=["d42_chunk_0"], tenant="org1")
+    assert "d42_chunk_0" not in [h.id for h in store.search([query.tolist()], 5, tenant="org1")[0]]
+
+    reopened = NumpyVectorStore(tmp_path, config)
+    assert reopened._partition("org1").index.size == 2000
+    assert reopened.search([vectors[7].tolist()], 1, tenant="org1")[0][0].id == "d7_chunk_0"
+
+
+def test_chunk_counts_seed_once_then_track_writes():
+    from unittest.mock import MagicMock
+
+    from backend.services import vector_store
+
+    store = MagicMock()
+    store.count.return_value = 5
+    counts = vector_store._ChunkCounts()
+    assert counts.get("coll", "org1", store) == 5
+    counts.adjust("coll", "org1", 3)
+    counts.adjust("coll", "org1", -2)
+    assert counts.get("coll", "org1", store) == 6
+    assert store.count.call_count == 1
+
+    # Drift (e.g. writes from another process) is corrected by the periodic recount
+    store.count.return_value = 9
+    vector_store._stores["coll"] = store
+    try:
+        assert counts.reconcile() == 1
+    finally:
+        vector_store._stores.pop("coll")
+    assert counts.get("coll", "org1", store) == 9
+
+
+def test_add_chunks_reprocessing_is_idempotent_and_collects_stale_chunks(tmp_path):
+    from unittest.mock import patch
+
+    from backend.services import vector_store
+    from backend.services.chunker import Chunk
+
+    store = NumpyVectorStore(tmp_path)
+    lexical = vector_store.lexical_index.LexicalIndex(tmp_path / "lexical")
+
+    def chunks(n):
+        return [Chunk(text=f"t{i}", document_id="doc", document_name="a.pdf", page=1, paragraph=i, chunk_index=i) for i in range(n)]
+
+    with (
+        patch.object(vector_store, "_write_targets", return_value=[("coll", "m")]),
+        patch.object(vector_store, "get_store", return_value=store),
+        patch.object(vector_store, "embed_texts", side_effect=lambda texts, _m: [_unit(1, i, 0) for i in range(len(texts))]),
+        patch.object(vector_store.clause_index, "tag_embeddings", side_effect=lambda e, _m: [{} for _ in e]),
+        patch.object(vector_store.lexical_index, "get_index", return_value=lexical),
+    ):
+        vector_store.add_chunks(chunks(3), "org1", generation=1)
+        vector_store.add_chunks(chunks(3), "org1", generation=1)  # Retry of the same run
+        assert store.count(tenant="org1") == 3
+        assert lexical.count("org1") == 3
+        vector_store.add_chunks(chunks(2), "org1", generation=2)
+    assert lexical.count("org1") == 2
+
+    remaining = store.get(tenant="org1")
+    assert sorted(c.id for c in remaining) == ["doc_chunk_0", "doc_chunk_1"]
+    assert {c.metadata["index_generation"] for c in remaining} == {2}
+
+
+async def test_tenant_backfill_tags_legacy_chunks(tmp_path, mock_db):
+    """Chunks from before tenant partitioning become visible to their organization, once."""
+    from unittest.mock import AsyncMock, patch
+
+    from backend.services import tenant_backfill
+
+    store = NumpyVectorStore(tmp_path)
+    store.add(
+        ids=["a_chunk_0", "b_chunk_0"],
+        embeddings=[_unit(1, 0, 0), _unit(0, 1, 0)],
+        documents=["alpha", "beta"],
+        metadatas=[{"document_id": "a"}, {"document_id": "b", "organization_id": "org2"}],
+    )
+    mock_db.documents.find_one = AsyncMock(return_value={"organization_id": "org1"})
+    state: dict = {}
+    mock_db.vector_index_state.find_one = AsyncMock(side_effect=lambda q: state.get(q["_id"]))
+
+    async def _update(q, update, upsert=False):
+        state[q["_id"]] = update["$set"]
+    mock_db.vector_index_state.update_one = AsyncMock(side_effect=_update)
+
+    with (
+        patch("backend.core.database._db", mock_db),
+        patch.object(tenant_backfill.vector_store, "get_store", return_value=store),
+        patch.object(tenant_backfill.vector_store, "reconcile_counts"),
+        patch("backend.services.tenant_backfill.asyncio.sleep", new_callable=AsyncMock),
+    ):
+        assert not await tenant_backfill.is_backfilled()
+        assert await tenant_backfill.backfill() == 1
+        assert await tenant_backfill.is_backfilled()
+
+    assert store.count(tenant="org1") == 1
+    assert [c.id for c in store.get(tenant="org1")] == ["a_chunk_0"]